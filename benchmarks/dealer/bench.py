@@ -0,0 +1,204 @@
+"""
+ツール単位のマイクロベンチマーク
+
+合成データ（generate.py）のサイズごとに、mcp-server-dealer のデータ読み込み（JSON解析・インデックス構築）と
+各ツール関数の処理時間を計測し、JSONで出力する。データサイズに対する処理時間の伸びを比較することで、
+全件走査や繰り返しの解析といった計算量の劣化を検出する。
+
+サイズごとに別プロセスで計測するため、前のサイズのキャッシュやメモリ使用量の影響を受けない。
+
+使い方（リポジトリのルートから）:
+    python benchmarks/dealer/bench.py --rows 10000 100000 1000000 --output dealer-bench.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEALER_DIR = BENCH_DIR.parents[1] / "mcp-server-dealer"
+DATASETS = ("customers.json", "contracts.json", "visits.json", "vehicles.json")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """最近傍順位法によるパーセンタイル"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _current_rss_mb() -> float | None:
+    """現在の RSS（Linux のみ）"""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _result_rows(result) -> int:
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        return sum(len(value) for value in result.values() if isinstance(value, list)) or 1
+    return 0
+
+
+def _time_calls(func, argument_sets: list[dict]) -> dict:
+    timings = []
+    rows = 0
+    for arguments in argument_sets:
+        start = time.perf_counter()
+        result = func(**arguments)
+        timings.append(time.perf_counter() - start)
+        rows += _result_rows(result)
+    return {
+        "calls": len(timings),
+        "mean_us": round(sum(timings) / len(timings) * 1e6, 1),
+        "p50_us": round(percentile(timings, 50) * 1e6, 1),
+        "p95_us": round(percentile(timings, 95) * 1e6, 1),
+        "max_us": round(max(timings) * 1e6, 1),
+        "mean_rows": round(rows / len(timings), 1),
+    }
+
+
+def measure(data_dir: Path, repeat: int, seed: int) -> dict:
+    """data_dir のデータに対してローダーと各ツールを計測する（子プロセスで実行）"""
+    os.environ["DEALER_DATA_DIR"] = str(data_dir)
+    sys.path.insert(0, str(DEALER_DIR))
+
+    from tools import data_store
+    from tools.contract import get_contracts
+    from tools.customer import get_customer_info, search_customer_by_name
+    from tools.customer_360 import get_customer_360
+    from tools.store import _read_json_file
+    from tools.vehicle import search_vehicles
+    from tools.visit import get_upcoming_services, get_visit_history
+
+    loaders = {}
+    for name in DATASETS:
+        start = time.perf_counter()
+        records = _read_json_file(data_dir / name)
+        parse_s = time.perf_counter() - start
+        del records
+
+        data_store.invalidate(name)
+        start = time.perf_counter()
+        snapshot = data_store.get(name)
+        load_s = time.perf_counter() - start
+        loaders[name] = {
+            "records": len(snapshot.records),
+            "bytes": (data_dir / name).stat().st_size,
+            "parse_s": round(parse_s, 4),
+            "load_s": round(load_s, 4),
+            "index_s": round(max(load_s - parse_s, 0.0), 4),
+        }
+
+    # 読み込み後に保持しているメモリ（解析中の一時的なピークを除く）
+    gc.collect()
+    rss_after_load = _current_rss_mb()
+
+    rng = random.Random(seed)
+    customer_ids = [record["id"] for record in data_store.get("customers.json").records]
+    sample_ids = [rng.choice(customer_ids) for _ in range(repeat)]
+    surnames = ("田中", "鈴木", "佐藤", "高橋", "山本", "たなか", "佐々木")
+    vehicle_types = ("SUV", "セダン", "ミニバン", "軽自動車")
+
+    cases = {
+        "search_customer_by_name": (search_customer_by_name, [{"name": rng.choice(surnames)} for _ in range(repeat)]),
+        "get_customer_info": (get_customer_info, [{"customer_id": cid} for cid in sample_ids]),
+        "get_contracts": (get_contracts, [{"customer_id": cid} for cid in sample_ids]),
+        "get_visit_history": (get_visit_history, [{"customer_id": cid} for cid in sample_ids]),
+        "get_customer_360": (get_customer_360, [{"customer_id": cid} for cid in sample_ids]),
+        "get_upcoming_services": (get_upcoming_services, [{"days": 30}] * max(repeat // 10, 1)),
+        "get_upcoming_services[limit=20]": (get_upcoming_services, [{"days": 365, "limit": 20}] * repeat),
+        "search_vehicles[type,color]": (search_vehicles, [
+            {"type": rng.choice(vehicle_types), "color": rng.choice(("赤", "白", "黒"))} for _ in range(max(repeat // 10, 1))
+        ]),
+        "search_vehicles[type,price,year]": (search_vehicles, [
+            {"type": rng.choice(vehicle_types), "max_price": 2500000, "min_year": 2024} for _ in range(max(repeat // 10, 1))
+        ]),
+    }
+    tools = {name: _time_calls(func, argument_sets) for name, (func, argument_sets) in cases.items()}
+
+    # ru_maxrss は Linux では KB、macOS では bytes
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "data_dir": str(data_dir),
+        "loaders": loaders,
+        "tools": tools,
+        "rss_after_load_mb": rss_after_load,
+        "max_rss_mb": round(max_rss * scale / 1024 / 1024, 1),
+    }
+
+
+def _run_child(data_dir: Path, repeat: int, seed: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", str(data_dir), "--repeat", str(repeat), "--seed", str(seed)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def _print_report(results: dict) -> None:
+    sizes = list(results)
+    header = f"{'':34}" + "".join(f"{size:>14}" for size in sizes)
+    print("load (parse + index) [s]")
+    print(header)
+    for name in DATASETS:
+        print(f"  {name:32}" + "".join(f"{results[size]['loaders'][name]['load_s']:>14}" for size in sizes))
+    print("tool p50 [us]")
+    print(header)
+    for name in results[sizes[0]]["tools"]:
+        print(f"  {name:32}" + "".join(f"{results[size]['tools'][name]['p50_us']:>14}" for size in sizes))
+    print(f"  {'RSS after load [MB]':32}" + "".join(f"{results[size]['rss_after_load_mb']!s:>14}" for size in sizes))
+    print(f"  {'max RSS [MB]':32}" + "".join(f"{results[size]['max_rss_mb']:>14}" for size in sizes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mcp-server-dealer ツールのマイクロベンチマーク")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="計測するデータサイズ（各データセットの件数）")
+    parser.add_argument("--data-root", default=str(BENCH_DIR / "data"), help="合成データの保存先（サイズごとのサブディレクトリ）")
+    parser.add_argument("--repeat", type=int, default=200, help="ツールごとの呼び出し回数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果をJSONで保存するパス")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        json.dump(measure(Path(args.measure), args.repeat, args.seed), sys.stdout, ensure_ascii=False)
+        return
+
+    from generate import generate
+
+    results = {}
+    for rows in args.rows:
+        data_dir = Path(args.data_root) / str(rows)
+        if not all((data_dir / name).exists() for name in DATASETS):
+            print(f"generating {rows} rows into {data_dir} ...", file=sys.stderr)
+            generate(data_dir, rows, args.seed)
+        print(f"measuring {rows} rows ...", file=sys.stderr)
+        results[str(rows)] = _run_child(data_dir, args.repeat, args.seed)
+
+    _print_report(results)
+    if args.output:
+        report = {"repeat": args.repeat, "python": sys.version.split()[0], "results": results}
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+合成データ生成
+
+mcp-server-dealer の data/*.json と同じスキーマの顧客・契約・来店履歴・車両データを
+任意の件数で生成する。乱数のシードを固定しているため、同じ引数なら同じデータになる。
+
+使い方:
+    python benchmarks/dealer/generate.py --rows 100000 --output benchmarks/dealer/data/100000
+"""
+
+import argparse
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+SURNAMES = (
+    "田中", "鈴木", "佐藤", "高橋", "伊藤", "渡辺", "山本", "中村", "小林", "加藤",
+    "吉田", "山田", "佐々木", "山口", "松本", "井上", "木村", "林", "清水", "斎藤",
+)
+GIVEN_NAMES = (
+    "太郎", "花子", "一郎", "美咲", "健太", "陽子", "翔太", "彩花", "大輔", "真由美",
+    "拓也", "恵", "直樹", "由美", "誠", "智子", "亮", "麻衣", "浩二", "愛",
+)
+PREFECTURES = ("東京都港区", "東京都世田谷区", "神奈川県横浜市", "埼玉県さいたま市", "千葉県千葉市", "大阪府大阪市")
+OCCUPATIONS = ("会社員", "IT企業 部長", "公務員", "自営業", "教員", "医師", "主婦", "学生")
+HOBBIES = ("ゴルフ", "キャンプ", "釣り", "ドライブ", "旅行", "写真", "スキー", "読書")
+STAFF = ("山本", "佐々木", "中島", "岡田")
+
+# (車種, 型式, グレード, 価格帯)
+MODELS = (
+    ("SUV", "CX-30", "20S Proactive", (2400000, 3300000)),
+    ("SUV", "CX-5", "25S L Package", (2900000, 4000000)),
+    ("SUV", "CX-60", "25S Premium Sports", (3500000, 5500000)),
+    ("セダン", "MAZDA3 セダン", "20S Proactive", (2200000, 3000000)),
+    ("セダン", "MAZDA6", "25T S Package", (2800000, 4300000)),
+    ("セダン", "ロードスター", "S Special Package", (2600000, 3400000)),
+    ("ミニバン", "CX-80", "XD-HYBRID Premium Modern", (4000000, 6200000)),
+    ("軽自動車", "MAZDA2", "15S Proactive", (1500000, 2300000)),
+    ("軽自動車", "フレア", "ハイブリッド XG", (1200000, 1700000)),
+)
+COLORS = (
+    "ソウルレッド", "アーティザンレッド", "ホワイト", "ロジウムホワイト", "ジェットブラック",
+    "マシングレー", "ポリメタルグレー", "ディープブルー", "シルキーシルバー", "プラチナクォーツ",
+)
+FEATURES = (
+    "360度ビューモニター", "アダプティブクルーズコントロール", "BOSE サウンドシステム", "シートヒーター",
+    "パワーリフトゲート", "本革シート", "サンルーフ", "衝突被害軽減ブレーキ", "ワイヤレス充電",
+)
+VEHICLE_STATUSES = ("在庫あり", "在庫あり", "在庫あり", "売約済み", "予約済み")
+CONTRACT_TYPES = ("新車購入", "新車購入", "中古購入")
+CONTRACT_STATUSES = ("完了", "完了", "完了", "進行中")
+VISIT_TYPES = ("6ヶ月点検", "12ヶ月点検", "24ヶ月点検", "車検", "オイル交換", "タイヤ交換", "修理", "試乗", "新規来店")
+# 次回サービスまでの日数（点検・車検系のみ）
+SERVICE_INTERVALS = {"6ヶ月点検": 182, "12ヶ月点検": 365, "24ヶ月点検": 730, "車検": 730, "オイル交換": 182}
+NOTES = (
+    "オイル交換実施。", "ブレーキパッド交換。", "買い替えの相談あり。", "家族構成の変化で3列シートを検討中。",
+    "試乗で静粛性を気に入った様子。", "タイヤの摩耗が進んでいるため次回交換を提案。", "特に問題なし。",
+)
+
+
+def _id(prefix: str, number: int, width: int) -> str:
+    return f"{prefix}{number:0{width}d}"
+
+
+def _random_date(rng: random.Random, start: date, end: date) -> date:
+    return start + timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def _customer(rng: random.Random, customer_id: str, today: date) -> dict:
+    surname = rng.choice(SURNAMES)
+    registered = _random_date(rng, date(2010, 1, 1), today)
+    model = rng.choice(MODELS)
+    return {
+        "id": customer_id,
+        "name": f"{surname} {rng.choice(GIVEN_NAMES)}",
+        "phone": f"090-{rng.randrange(10000):04d}-{rng.randrange(10000):04d}",
+        "email": f"{customer_id.lower()}@example.com",
+        "address": f"{rng.choice(PREFECTURES)}{rng.randrange(1, 10)}-{rng.randrange(1, 30)}-{rng.randrange(1, 20)}",
+        "registered_date": registered.isoformat(),
+        "occupation": rng.choice(OCCUPATIONS),
+        "family": {"spouse": None, "children": []},
+        "hobbies": rng.sample(HOBBIES, 2),
+        "preferences": {
+            "favorite_colors": rng.sample(("赤", "白", "黒", "青", "グレー"), 2),
+            "preferred_type": model[0],
+            "budget_range": "300万〜500万円",
+            "important_features": rng.sample(("安全性能", "燃費", "荷室の広さ", "デザイン"), 2),
+        },
+        "current_vehicle": {
+            "model": model[1],
+            "year": rng.randrange(2012, today.year + 1),
+            "purchase_date": _random_date(rng, registered, today).isoformat(),
+        },
+        "conversation_notes": [
+            {"date": _random_date(rng, registered, today).isoformat(), "staff": rng.choice(STAFF), "content": rng.choice(NOTES)}
+        ],
+        "sales_notes": [],
+    }
+
+
+def _vehicle(rng: random.Random, vehicle_id: str, today: date) -> dict:
+    vehicle_type, model, grade, (low, high) = rng.choice(MODELS)
+    year = rng.randrange(2015, today.year + 1)
+    return {
+        "id": vehicle_id,
+        "model": model,
+        "type": vehicle_type,
+        "color": rng.choice(COLORS),
+        "year": year,
+        "price": rng.randrange(low, high, 10000),
+        "status": rng.choice(VEHICLE_STATUSES),
+        "grade": grade,
+        "mileage": rng.randrange(0, 12000) * (today.year - year + 1),
+        "features": rng.sample(FEATURES, 2),
+    }
+
+
+def _contract(rng: random.Random, contract_id: str, customer_id: str, vehicle: dict, today: date) -> dict:
+    trade_in = None
+    if rng.random() < 0.3:
+        trade_in = {"model": rng.choice(MODELS)[1], "year": rng.randrange(2008, 2020), "price": rng.randrange(100000, 2000000, 10000)}
+    return {
+        "id": contract_id,
+        "customer_id": customer_id,
+        "vehicle_id": vehicle["id"],
+        "contract_date": _random_date(rng, date(2015, 1, 1), today).isoformat(),
+        "type": rng.choice(CONTRACT_TYPES),
+        "amount": vehicle["price"] + rng.randrange(0, 300000, 10000),
+        "status": rng.choice(CONTRACT_STATUSES),
+        "model": vehicle["model"],
+        "trade_in": trade_in,
+    }
+
+
+def _visit(rng: random.Random, visit_id: str, customer_id: str, vehicle_id: str, today: date) -> dict:
+    visit_type = rng.choice(VISIT_TYPES)
+    visit_date = _random_date(rng, today - timedelta(days=730), today)
+    visit = {
+        "id": visit_id,
+        "customer_id": customer_id,
+        "visit_date": visit_date.isoformat(),
+        "type": visit_type,
+        "vehicle_id": vehicle_id,
+        "staff": rng.choice(STAFF),
+        "notes": rng.choice(NOTES),
+    }
+    interval = SERVICE_INTERVALS.get(visit_type)
+    if interval:
+        visit["next_service_date"] = (visit_date + timedelta(days=interval)).isoformat()
+    return visit
+
+
+def _write_array(path: Path, records) -> None:
+    """レコードを1件ずつ書き出す（件数が多くてもメモリに全件を保持しない）"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for position, record in enumerate(records):
+            if position:
+                f.write(",\n")
+            f.write(json.dumps(record, ensure_ascii=False))
+        f.write("\n]\n")
+
+
+def generate(output_dir: Path, rows: int, seed: int = 0, today: date | None = None) -> None:
+    """各データセットを rows 件ずつ生成して output_dir に書き出す
+
+    Args:
+        output_dir: 出力先ディレクトリ（customers.json などを作成）
+        rows: 各データセットの件数
+        seed: 乱数のシード
+        today: 日付の基準日（None の場合は今日）
+    """
+    today = today or date.today()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    width = max(3, len(str(rows)))
+
+    rng = random.Random(seed)
+    _write_array(output_dir / "customers.json", (
+        _customer(rng, _id("C", number, width), today) for number in range(1, rows + 1)
+    ))
+
+    rng = random.Random(seed + 1)
+    vehicles = [_vehicle(rng, _id("V", number, width), today) for number in range(1, rows + 1)]
+    _write_array(output_dir / "vehicles.json", vehicles)
+
+    # 顧客ごとの件数に偏りを持たせる（一部の顧客に履歴が集中する）
+    def customer_id() -> str:
+        return _id("C", min(int(rng.paretovariate(1.2)), rows), width) if rng.random() < 0.2 \
+            else _id("C", rng.randrange(1, rows + 1), width)
+
+    rng = random.Random(seed + 2)
+    _write_array(output_dir / "contracts.json", (
+        _contract(rng, _id("CT", number, width), customer_id(), rng.choice(vehicles), today)
+        for number in range(1, rows + 1)
+    ))
+
+    rng = random.Random(seed + 3)
+    _write_array(output_dir / "visits.json", (
+        _visit(rng, _id("VS", number, width), customer_id(), _id("V", rng.randrange(1, rows + 1), width), today)
+        for number in range(1, rows + 1)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mcp-server-dealer の合成データを生成")
+    parser.add_argument("--rows", type=int, required=True, help="各データセットの件数")
+    parser.add_argument("--output", required=True, help="出力先ディレクトリ")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(Path(args.output), args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+モックLLM用のTLS証明書
+
+agent-framework の Azure OpenAI の設定は https のエンドポイントのみを受け付けるため、
+モックLLMを自己署名のCAで発行した証明書で HTTPS 配信する。
+エージェントには certifi の CA バンドルにこの CA を加えたファイルを SSL_CERT_FILE として渡す。
+"""
+
+import datetime
+import ipaddress
+from dataclasses import dataclass
+from pathlib import Path
+
+import certifi
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import ExtendedKeyUsageOID, NameOID
+
+
+@dataclass
+class TLSFiles:
+    """サーバー証明書・秘密鍵と、CA を加えた CA バンドルのパス"""
+
+    certfile: Path
+    keyfile: Path
+    ca_bundle: Path
+
+
+def _name(common_name: str) -> x509.Name:
+    return x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+
+
+def create_tls_files(directory: Path, host: str) -> TLSFiles:
+    """host（IPアドレスまたはホスト名）用のサーバー証明書と CA バンドルを directory に作成"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    valid_from, valid_to = now - datetime.timedelta(minutes=5), now + datetime.timedelta(days=1)
+
+    ca_key = ec.generate_private_key(ec.SECP256R1())
+    ca_cert = (
+        x509.CertificateBuilder()
+        .subject_name(_name("sales-staff-agent benchmark CA"))
+        .issuer_name(_name("sales-staff-agent benchmark CA"))
+        .public_key(ca_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(valid_from)
+        .not_valid_after(valid_to)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=0), critical=True)
+        .add_extension(
+            x509.KeyUsage(
+                digital_signature=True, key_cert_sign=True, crl_sign=True, content_commitment=False,
+                key_encipherment=False, data_encipherment=False, key_agreement=False,
+                encipher_only=False, decipher_only=False,
+            ),
+            critical=True,
+        )
+        .add_extension(x509.SubjectKeyIdentifier.from_public_key(ca_key.public_key()), critical=False)
+        .sign(ca_key, hashes.SHA256())
+    )
+
+    try:
+        names: list[x509.GeneralName] = [x509.IPAddress(ipaddress.ip_address(host))]
+    except ValueError:
+        names = [x509.DNSName(host)]
+    if host != "localhost":
+        names.append(x509.DNSName("localhost"))
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(_name(host))
+        .issuer_name(ca_cert.subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(valid_from)
+        .not_valid_after(valid_to)
+        .add_extension(x509.SubjectAlternativeName(names), critical=False)
+        .add_extension(x509.BasicConstraints(ca=False, path_length=None), critical=True)
+        .add_extension(x509.ExtendedKeyUsage([ExtendedKeyUsageOID.SERVER_AUTH]), critical=False)
+        .add_extension(
+            x509.AuthorityKeyIdentifier.from_issuer_public_key(ca_key.public_key()), critical=False
+        )
+        .sign(ca_key, hashes.SHA256())
+    )
+
+    files = TLSFiles(directory / "mock_llm.pem", directory / "mock_llm.key", directory / "ca_bundle.pem")
+    files.certfile.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    files.keyfile.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    )
+    # SSL_CERT_FILE は既定の CA を置き換えるため、certifi の CA も含める
+    files.ca_bundle.write_bytes(
+        Path(certifi.where()).read_bytes() + b"\n" + ca_cert.public_bytes(serialization.Encoding.PEM)
+    )
+    return files
@@ -0,0 +1,49 @@
+"""
+ローカルMCPサーバー
+
+mcp-server-dealer のツールレジストリ（tool_registry.py）のツールを FastMCP の Streamable HTTP で公開する。
+Azure Functions Core Tools なしでエージェントから接続でき、
+ツールごとのサーバー側処理時間を TOOL_LATENCIES に記録する。
+"""
+
+import functools
+import sys
+import threading
+import time
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+
+DEALER_DIR = Path(__file__).resolve().parents[2] / "mcp-server-dealer"
+sys.path.insert(0, str(DEALER_DIR))
+
+from tool_registry import ToolSpec, registry  # noqa: E402
+
+# function_app.py の MCP エンドポイントと同じパス
+MCP_PATH = "/runtime/webhooks/mcp"
+
+# ツール名 -> 処理時間（秒）のリスト
+TOOL_LATENCIES: dict[str, list[float]] = {}
+_latency_lock = threading.Lock()
+
+
+def _timed(spec: ToolSpec):
+    # 入力スキーマはハンドラーのシグネチャから、呼び出しは Functions と同じ spec 経由で行う
+    @functools.wraps(spec.handler)
+    def wrapper(**kwargs):
+        start = time.perf_counter()
+        try:
+            return spec(**kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _latency_lock:
+                TOOL_LATENCIES.setdefault(spec.name, []).append(elapsed)
+    return wrapper
+
+
+def create_server(host: str, port: int) -> FastMCP:
+    """ツールを登録した FastMCP サーバーを作成"""
+    server = FastMCP("mcp-server-dealer", host=host, port=port, streamable_http_path=MCP_PATH)
+    for spec in registry:
+        server.add_tool(_timed(spec), name=spec.name, description=spec.description)
+    return server
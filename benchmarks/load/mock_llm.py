@@ -0,0 +1,133 @@
+"""
+モックLLMサーバー
+
+Azure OpenAI Responses API（POST .../responses）の最小限の互換実装。
+ユーザー入力をルールで判定してツール呼び出し（function_call）を返し、
+ツール結果（function_call_output）を受け取ったら最終メッセージを返す。
+MOCK_LLM_LATENCY_MS で1回あたりのモデル応答時間を模擬する。
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# 1回のモデル呼び出しで模擬する遅延（ミリ秒）
+LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "50"))
+
+VEHICLE_TYPES = ("SUV", "セダン", "軽自動車", "ミニバン")
+CUSTOMER_NAMES = ("田中", "鈴木", "佐藤", "高橋", "伊藤", "渡辺", "山田", "中村")
+
+
+def _text_of(item: dict) -> str:
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _choose_tool(message: str) -> tuple[str, dict] | None:
+    """ユーザー入力から呼び出すツールを決める"""
+    customer_id = re.search(r"C\d{3,}", message, re.IGNORECASE)
+    if customer_id:
+        arguments = {"customer_id": customer_id.group(0).upper()}
+        if "契約" in message and "来店" in message:
+            return "get_customer_360", arguments
+        if "契約" in message:
+            return "get_contracts", arguments
+        if "来店" in message:
+            return "get_visit_history", arguments
+        return "get_customer_info", arguments
+    for vehicle_type in VEHICLE_TYPES:
+        if vehicle_type in message:
+            arguments = {"type": vehicle_type}
+            for color in ("赤", "白", "黒", "青", "グレー"):
+                if color in message:
+                    arguments["color"] = color
+            return "search_vehicles", arguments
+    if "予定" in message:
+        return "get_upcoming_services", {"days": 60}
+    for name in CUSTOMER_NAMES:
+        if name in message:
+            return "search_customer_by_name", {"name": name}
+    return None
+
+
+def _response(output: list[dict], model: str) -> dict:
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": model,
+        "output": output,
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": 100,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": 20,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": 120,
+        },
+    }
+
+
+def _message(text: str) -> dict:
+    return {
+        "type": "message",
+        "id": f"msg_{uuid.uuid4().hex}",
+        "role": "assistant",
+        "status": "completed",
+        "content": [{"type": "output_text", "text": text, "annotations": []}],
+    }
+
+
+async def responses(request: Request) -> JSONResponse:
+    body = await request.json()
+    model = body.get("model", "mock")
+    items = body.get("input")
+    if isinstance(items, str):
+        items = [{"role": "user", "content": items}]
+    items = items or []
+
+    await asyncio.sleep(LATENCY_MS / 1000)
+
+    last = items[-1] if items else {}
+    if last.get("type") == "function_call_output":
+        output = str(last.get("output", ""))
+        return JSONResponse(_response([_message(f"検索結果です: {output[:200]}")], model))
+
+    user_message = ""
+    for item in reversed(items):
+        if item.get("role") == "user":
+            user_message = _text_of(item)
+            break
+
+    choice = _choose_tool(user_message)
+    if choice is None:
+        return JSONResponse(_response([_message("ご用件を具体的に教えてください。")], model))
+
+    name, arguments = choice
+    call_id = f"call_{uuid.uuid4().hex[:12]}"
+    return JSONResponse(_response([{
+        "type": "function_call",
+        "id": f"fc_{uuid.uuid4().hex}",
+        "call_id": call_id,
+        "name": name,
+        "arguments": json.dumps(arguments, ensure_ascii=False),
+        "status": "completed",
+    }], model))
+
+
+app = Starlette(routes=[Route("/{path:path}", responses, methods=["POST"])])
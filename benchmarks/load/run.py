@@ -0,0 +1,257 @@
+"""
+負荷試験・レイテンシ計測ハーネス
+
+モックLLM（Azure OpenAI Responses API 互換）とローカルMCPサーバー（mcp-server-dealer のツール）を
+このプロセス内で起動し、sales-staff-agent（src/container.py）を子プロセスとして起動して
+HTTP（/responses）経由でシナリオの会話を一定の並列数で流す。
+
+計測結果:
+    - ターンごとのレイテンシ（p50/p95/p99）
+    - ツールごとのサーバー側処理時間（p50/p95/p99）
+    - スループット（リクエスト/秒）
+    - エージェントプロセスのメモリ使用量（RSS）
+
+使い方（リポジトリのルートから）:
+    uv run --project sales-staff-agent python benchmarks/load/run.py --concurrency 8 --conversations 200
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import mock_llm  # noqa: E402
+from certs import TLSFiles, create_tls_files  # noqa: E402
+from mcp_server import MCP_PATH, TOOL_LATENCIES, create_server  # noqa: E402
+from scenarios import SCENARIOS  # noqa: E402
+
+AGENT_DIR = Path(__file__).resolve().parents[2] / "sales-staff-agent"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """最近傍順位法によるパーセンタイル"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(values: list[float]) -> dict:
+    """秒のリストをミリ秒の統計値にまとめる"""
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def _serve_in_thread(app, host: str, port: int, tls: TLSFiles | None = None) -> uvicorn.Server:
+    ssl_options = {"ssl_certfile": str(tls.certfile), "ssl_keyfile": str(tls.keyfile)} if tls else {}
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", **ssl_options))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _rss_bytes(pid: int) -> int | None:
+    """プロセスの RSS（Linux は /proc、それ以外は psutil があれば使用）"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+
+def _start_agent(args, tls: TLSFiles) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        # agent-framework は https のエンドポイントのみ受け付けるため、モックLLMは TLS で配信し CA を信頼させる
+        "AZURE_OPENAI_ENDPOINT": f"https://{args.host}:{args.llm_port}/",
+        "AZURE_OPENAI_API_KEY": "benchmark",
+        "SSL_CERT_FILE": str(tls.ca_bundle),
+        "MCP_SERVER_URL": f"http://{args.host}:{args.mcp_port}{MCP_PATH}",
+    })
+    return subprocess.Popen([sys.executable, "src/container.py"], cwd=AGENT_DIR, env=env)
+
+
+async def _wait_ready(client: httpx.AsyncClient, base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            # ウォームアップ（トークン取得・MCP接続）の完了を待ち、初回リクエストの遅延を計測に含めない
+            if (await client.get(f"{base_url}/readiness")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"Agent did not become ready within {timeout}s")
+
+
+async def _run_conversation(client: httpx.AsyncClient, base_url: str, turns: list[str], results: dict) -> None:
+    previous_response_id = None
+    for index, text in enumerate(turns):
+        payload = {"input": {"messages": [{"role": "user", "content": text}]}}
+        if previous_response_id:
+            payload["previous_response_id"] = previous_response_id
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"{base_url}/responses", json=payload)
+            elapsed = time.perf_counter() - start
+            ok = response.status_code == 200
+            body = response.json() if ok else {}
+            # エラー時もHTTPステータスは200のため、レスポンスの status で判定する
+            ok = ok and body.get("status") == "completed"
+            previous_response_id = body.get("id") or previous_response_id
+        except httpx.HTTPError:
+            elapsed = time.perf_counter() - start
+            ok = False
+        results["turns"].append(elapsed)
+        results["turns_by_index"].setdefault(index + 1, []).append(elapsed)
+        if not ok:
+            results["errors"] += 1
+
+
+async def _sample_memory(pid: int, samples: list[int], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        rss = _rss_bytes(pid)
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load(args, agent_pid: int | None) -> dict:
+    base_url = f"http://{args.host}:{args.agent_port}"
+    results = {"turns": [], "turns_by_index": {}, "errors": 0}
+    memory: list[int] = []
+
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        await _wait_ready(client, base_url, args.startup_timeout)
+
+        # ウォームアップ（計測対象外）
+        warmup = {"turns": [], "turns_by_index": {}, "errors": 0}
+        for turns in SCENARIOS:
+            await _run_conversation(client, base_url, turns, warmup)
+        TOOL_LATENCIES.clear()
+
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(_sample_memory(agent_pid, memory, stop)) if agent_pid else None
+
+        conversations = itertools.islice(itertools.cycle(SCENARIOS), args.conversations)
+        queue: asyncio.Queue = asyncio.Queue()
+        for turns in conversations:
+            queue.put_nowait(turns)
+
+        async def worker():
+            while not queue.empty():
+                turns = queue.get_nowait()
+                await _run_conversation(client, base_url, turns, results)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        if sampler:
+            await sampler
+
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "conversations": args.conversations,
+            "llm_latency_ms": mock_llm.LATENCY_MS,
+            "python": platform.python_version(),
+        },
+        "elapsed_s": round(elapsed, 3),
+        "requests": len(results["turns"]),
+        "errors": results["errors"],
+        "requests_per_second": round(len(results["turns"]) / elapsed, 2) if elapsed else 0.0,
+        "turn_latency": summarize(results["turns"]),
+        "turn_latency_by_index": {
+            str(index): summarize(values) for index, values in sorted(results["turns_by_index"].items())
+        },
+        "tool_latency": {name: summarize(values) for name, values in sorted(TOOL_LATENCIES.items())},
+        "agent_memory": {
+            "rss_peak_mb": round(max(memory) / 1024 / 1024, 1) if memory else None,
+            "rss_last_mb": round(memory[-1] / 1024 / 1024, 1) if memory else None,
+        },
+    }
+
+
+def _print_report(report: dict) -> None:
+    print(f"\nrequests={report['requests']} errors={report['errors']} "
+          f"elapsed={report['elapsed_s']}s rps={report['requests_per_second']}")
+    turn = report["turn_latency"]
+    print(f"turn latency  p50={turn['p50_ms']}ms p95={turn['p95_ms']}ms p99={turn['p99_ms']}ms")
+    for index, stats in report["turn_latency_by_index"].items():
+        print(f"  turn #{index:<3} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms (n={stats['count']})")
+    print("tool latency (server side)")
+    for name, stats in report["tool_latency"].items():
+        print(f"  {name:<24} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms (n={stats['count']})")
+    memory = report["agent_memory"]
+    print(f"agent RSS peak={memory['rss_peak_mb']}MB last={memory['rss_last_mb']}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sales-staff-agent の負荷試験")
+    parser.add_argument("--concurrency", type=int, default=8, help="同時に実行する会話数")
+    parser.add_argument("--conversations", type=int, default=120, help="実行する会話の総数")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--agent-port", type=int, default=8088)
+    parser.add_argument("--llm-port", type=int, default=18080)
+    parser.add_argument("--mcp-port", type=int, default=17071)
+    parser.add_argument("--timeout", type=float, default=60.0, help="1リクエストのタイムアウト（秒）")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--no-spawn-agent", action="store_true", help="起動済みのエージェントに対して実行する")
+    parser.add_argument("--output", help="結果をJSONで保存するパス")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="load-bench-") as tls_dir:
+        tls = create_tls_files(Path(tls_dir), args.host)
+        _serve_in_thread(mock_llm.app, args.host, args.llm_port, tls)
+        _serve_in_thread(create_server(args.host, args.mcp_port).streamable_http_app(), args.host, args.mcp_port)
+        if args.no_spawn_agent:
+            print(f"mock LLM: https://{args.host}:{args.llm_port}/ (CA bundle: {tls.ca_bundle})")
+
+        agent = None if args.no_spawn_agent else _start_agent(args, tls)
+        try:
+            report = asyncio.run(run_load(args, agent.pid if agent else None))
+        finally:
+            if agent:
+                agent.terminate()
+                agent.wait(timeout=10)
+
+    _print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+ベンチマーク用の会話シナリオ
+
+各シナリオは1会話分のユーザー発話の列。2ターン目以降は
+previous_response_id で前のターンを引き継ぐ。
+"""
+
+SCENARIOS: list[list[str]] = [
+    # 顧客名から検索 → 詳細 → 契約
+    ["田中様を検索して", "C001の顧客情報を教えて", "その方の契約履歴は？"],
+    # ID指定の定型問い合わせ（ファストパス対象）
+    ["C002の来店履歴", "C002の契約履歴"],
+    # 全体像の取得
+    ["C003の契約と来店をまとめて教えて"],
+    # 在庫検索
+    ["赤いSUVの在庫はある？", "白のミニバンの在庫を見せて"],
+    # サービス予定
+    ["今後60日のサービス予定を教えて"],
+    # 提案を伴う問い合わせ（LLM経由）
+    ["鈴木様におすすめの車を提案して"],
+]
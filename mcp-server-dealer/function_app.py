@@ -8,12 +8,10 @@ import azure.functions as func
 import json
 import logging
 
-from tools.customer import search_customer_by_name as _search_customer_by_name
-from tools.customer import get_customer_info as _get_customer_info
-from tools.contract import get_contracts as _get_contracts
-from tools.visit import get_visit_history as _get_visit_history
-from tools.visit import get_upcoming_services as _get_upcoming_services
-from tools.vehicle import search_vehicles as _search_vehicles
+import json_codec
+import tool_metrics
+from tool_logging import ToolLogger
+from tool_registry import ToolSpec, registry
 
 try:
     from azure.functions import McpToolProperty
@@ -43,27 +41,20 @@ except ImportError:  # Fallback for local environments without MCP helpers
 # Azure Functions アプリケーション
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
+# ツール呼び出しログ（MCP_LOG_MODE などの環境変数で出力量を制御）
+tool_log = ToolLogger.from_env()
 
-def _log_json(message: str, payload: dict) -> None:
-    """ログ出力（開発時はコンソールに表示）"""
-    try:
-        output = json.dumps(payload, ensure_ascii=False, default=str, indent=2)
-        print(f"[MCP] {message}\n{output}")
-        logging.info("%s %s", message, output)
-    except Exception:
-        print(f"[MCP] {message} {payload}")
-        logging.info("%s %s", message, payload)
 
-
-def _get_arguments(context) -> dict:
-    """MCP Tool Trigger の入力から arguments を取得"""
+def _get_payload(context) -> dict:
     if isinstance(context, str):
-        payload = json.loads(context)
-    elif isinstance(context, dict):
-        payload = context
-    else:
-        payload = {}
+        return json.loads(context)
+    if isinstance(context, dict):
+        return context
+    return {}
+
 
+def _get_arguments(payload: dict) -> dict:
+    """MCP Tool Trigger の入力から arguments を取得"""
     if "arguments" in payload:
         return payload.get("arguments", {}) or {}
 
@@ -80,183 +71,65 @@ def _get_arguments(context) -> dict:
     return {}
 
 
-tool_properties_search_customer = json.dumps([
-    McpToolProperty(
-        name="name",
-        description="顧客名（部分一致）。姓のみ/名のみ/フルネーム可（例: '田中', '田中 太郎'）",
-        property_type="string",
-        is_required=True,
-    ).to_dict()
-], ensure_ascii=False)
-
-tool_properties_get_customer_info = json.dumps([
-    McpToolProperty(
-        name="customer_id",
-        description="顧客ID（例: 'C001'）。文字列内にIDが含まれていても抽出して照合します（例: 'C001の顧客情報'）",
-        property_type="string",
-        is_required=True,
-    ).to_dict()
-], ensure_ascii=False)
-
-tool_properties_get_contracts = json.dumps([
-    McpToolProperty(
-        name="customer_id",
-        description="顧客ID（例: 'C001'）。文字列内にIDが含まれていても抽出して照合します",
-        property_type="string",
-        is_required=True,
-    ).to_dict()
-], ensure_ascii=False)
-
-tool_properties_get_visit_history = json.dumps([
-    McpToolProperty(
-        name="customer_id",
-        description="顧客ID（例: 'C001'）。文字列内にIDが含まれていても抽出して照合します",
-        property_type="string",
-        is_required=True,
-    ).to_dict()
-], ensure_ascii=False)
-
-tool_properties_get_upcoming_services = json.dumps([
-    McpToolProperty(
-        name="days",
-        description="何日先まで検索するか（省略時: 30）。例: 60 → 今後60日分",
-        property_type="integer",
-        is_required=False,
-        default=30,
-    ).to_dict()
-], ensure_ascii=False)
-
-tool_properties_search_vehicles = json.dumps([
-    McpToolProperty(
-        name="type",
-        description="車種（'SUV', 'セダン', '軽自動車', 'ミニバン'）",
-        property_type="string",
-        is_required=True,
-        enum=["SUV", "セダン", "軽自動車", "ミニバン"],
-    ).to_dict(),
-    McpToolProperty(
-        name="color",
-        description="色（部分一致）。例: '赤' → 'ソウルレッド' にマッチ",
-        property_type="string",
-        is_required=False,
-    ).to_dict(),
-], ensure_ascii=False)
-
-
-@app.generic_trigger(
-    arg_name="context",
-    type="mcpToolTrigger",
-    toolName="search_customer_by_name",
-    description="顧客名からID候補を検索します（部分一致）。姓のみ/名のみ/フルネーム可",
-    toolProperties=tool_properties_search_customer,
-)
-def search_customer_by_name(context) -> list[dict]:
-    try:
-        args = _get_arguments(context)
-        _log_json("search_customer_by_name args:", args)
-        name = args.get("name") or args.get("query") or ""
-        result = _search_customer_by_name(name)
-        _log_json("search_customer_by_name result:", result)
-        return result
-    except Exception:
-        logging.exception("search_customer_by_name failed")
-        return [{"error": "search_customer_by_name failed"}]
-
-
-@app.generic_trigger(
-    arg_name="context",
-    type="mcpToolTrigger",
-    toolName="get_customer_info",
-    description="顧客IDから詳細情報を取得します。入力内に含まれるIDも抽出して照合します",
-    toolProperties=tool_properties_get_customer_info,
-)
-def get_customer_info(context) -> dict:
-    try:
-        args = _get_arguments(context)
-        _log_json("get_customer_info args:", args)
-        result = _get_customer_info(args.get("customer_id", ""))
-        _log_json("get_customer_info result:", result)
-        return result
-    except Exception:
-        logging.exception("get_customer_info failed")
-        return {"error": "get_customer_info failed"}
-
-
-@app.generic_trigger(
-    arg_name="context",
-    type="mcpToolTrigger",
-    toolName="get_contracts",
-    description="顧客IDから契約履歴を取得します。入力内に含まれるIDも抽出して照合します",
-    toolProperties=tool_properties_get_contracts,
-)
-def get_contracts(context) -> list[dict]:
-    try:
-        args = _get_arguments(context)
-        _log_json("get_contracts args:", args)
-        result = _get_contracts(args.get("customer_id", ""))
-        _log_json("get_contracts result:", result)
-        return result
-    except Exception:
-        logging.exception("get_contracts failed")
-        return [{"error": "get_contracts failed"}]
-
-
-@app.generic_trigger(
-    arg_name="context",
-    type="mcpToolTrigger",
-    toolName="get_visit_history",
-    description="顧客IDから来店履歴を取得します。入力内に含まれるIDも抽出して照合します",
-    toolProperties=tool_properties_get_visit_history,
-)
-def get_visit_history(context) -> list[dict]:
-    try:
-        args = _get_arguments(context)
-        _log_json("get_visit_history args:", args)
-        result = _get_visit_history(args.get("customer_id", ""))
-        _log_json("get_visit_history result:", result)
-        return result
-    except Exception:
-        logging.exception("get_visit_history failed")
-        return [{"error": "get_visit_history failed"}]
-
-
-@app.generic_trigger(
-    arg_name="context",
-    type="mcpToolTrigger",
-    toolName="get_upcoming_services",
-    description="今後のサービス予定一覧を取得します（指定日数先まで）",
-    toolProperties=tool_properties_get_upcoming_services,
-)
-def get_upcoming_services(context) -> list[dict]:
-    try:
-        args = _get_arguments(context)
-        _log_json("get_upcoming_services args:", args)
-        days = args.get("days", 30)
-        result = _get_upcoming_services(days=days)
-        _log_json("get_upcoming_services result:", result)
-        return result
-    except Exception:
-        logging.exception("get_upcoming_services failed")
-        return [{"error": "get_upcoming_services failed"}]
-
-
-@app.generic_trigger(
-    arg_name="context",
-    type="mcpToolTrigger",
-    toolName="search_vehicles",
-    description="条件に合う車両在庫を検索します（色は部分一致）",
-    toolProperties=tool_properties_search_vehicles,
-)
-def search_vehicles(context) -> list[dict]:
-    try:
-        args = _get_arguments(context)
-        _log_json("search_vehicles args:", args)
-        result = _search_vehicles(args.get("type", ""), args.get("color"))
-        _log_json("search_vehicles result:", result)
-        return result
-    except Exception:
-        logging.exception("search_vehicles failed")
-        return [{"error": "search_vehicles failed"}]
+def _get_trace_context(payload: dict) -> dict | None:
+    """MCP Tool Trigger の入力から呼び出し元のトレースコンテキスト（params._meta の traceparent）を取得"""
+    params = payload.get("params") if isinstance(payload.get("params"), dict) else {}
+    for meta in (payload.get("_meta"), payload.get("meta"), params.get("_meta")):
+        if isinstance(meta, dict) and meta.get("traceparent"):
+            return {key: meta[key] for key in ("traceparent", "tracestate") if meta.get(key)}
+    return None
+
+
+def _tool_properties(spec: ToolSpec) -> str:
+    """レジストリの入力スキーマから mcpToolTrigger の toolProperties を作成"""
+    properties = []
+    for parameter in spec.parameters:
+        options = {}
+        if parameter.enum:
+            options["enum"] = parameter.enum
+        if parameter.default is not None:
+            options["default"] = parameter.default
+        properties.append(McpToolProperty(
+            name=parameter.name,
+            description=parameter.description,
+            property_type=parameter.type,
+            is_required=parameter.required,
+            **options,
+        ).to_dict())
+    return json.dumps(properties, ensure_ascii=False)
+
+
+def _register_trigger(spec: ToolSpec) -> None:
+    """レジストリのツールを mcpToolTrigger として登録"""
+    def trigger(context) -> str:
+        try:
+            request = _get_payload(context)
+            args = _get_arguments(request)
+            with tool_metrics.track(spec.name, _get_trace_context(request)) as call:
+                tool_log.args(spec.name, args, call.trace_id)
+                result = spec(**args)
+                # 結果は1回だけシリアライズし、ログ・メトリクス・レスポンスで同じものを使う
+                payload = json_codec.dumps(result)
+                call.record(result, payload)
+            tool_log.result(spec.name, result, payload, call.trace_id)
+            return payload.decode("utf-8")
+        except Exception:
+            logging.exception("%s failed", spec.name)
+            return json.dumps({"error": f"{spec.name} failed"}, ensure_ascii=False)
+
+    # Functions のインデックスは関数名で行うため、ツール名に合わせる
+    trigger.__name__ = trigger.__qualname__ = spec.name
+    app.generic_trigger(
+        arg_name="context",
+        type="mcpToolTrigger",
+        toolName=spec.name,
+        description=spec.description,
+        toolProperties=_tool_properties(spec),
+    )(trigger)
+
+
+for _spec in registry:
+    _register_trigger(_spec)
 
 
 @app.route(route="health", methods=["GET"])
@@ -267,3 +140,13 @@ def health_check(req: func.HttpRequest) -> func.HttpResponse:
         status_code=200,
         mimetype="application/json"
     )
+
+
+@app.route(route="metrics", methods=["GET"])
+def metrics(req: func.HttpRequest) -> func.HttpResponse:
+    """Prometheus 形式のメトリクス（ツールごとの呼び出し数・処理時間・件数・サイズ・エラー、データ読み込み）"""
+    return func.HttpResponse(
+        tool_metrics.render(),
+        status_code=200,
+        headers={"Content-Type": tool_metrics.CONTENT_TYPE},
+    )
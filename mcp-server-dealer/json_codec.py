@@ -0,0 +1,56 @@
+"""
+JSON エンコード
+
+レスポンス本文とログで同じシリアライズ結果（UTF-8 の bytes）を使い回すためのエンコーダー。
+orjson がインストールされていれば使用し、なければ標準ライブラリの json にフォールバックする。
+出力はどちらも ensure_ascii=False 相当・区切りの空白なし。
+
+環境変数:
+    MCP_JSON_ENCODER: auto / orjson / json（既定: auto）
+        - auto:   orjson があれば orjson、なければ json
+        - json:   常に標準ライブラリを使用（比較・切り分け用）
+"""
+
+import json
+import logging
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # 任意の依存関係
+    orjson = None
+
+_requested = os.getenv("MCP_JSON_ENCODER", "auto").strip().lower()
+if _requested == "orjson" and orjson is None:
+    logging.warning("MCP_JSON_ENCODER=orjson but orjson is not installed; using json")
+
+# 使用するエンコーダー名（"orjson" / "json"）
+ENCODER = "orjson" if orjson is not None and _requested in ("auto", "orjson") else "json"
+
+
+def _dumps_stdlib(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(value: Any) -> bytes:
+    """値を JSON の bytes にシリアライズする（未対応の型は str() で文字列化）"""
+    if ENCODER == "orjson":
+        try:
+            return orjson.dumps(value, default=str)
+        except TypeError:
+            # 64bit を超える整数・文字列以外のキーなど orjson が扱えない値
+            pass
+    return _dumps_stdlib(value)
+
+
+def dumps_text(payload: bytes) -> bytes:
+    """シリアライズ済みの JSON を、JSON の文字列リテラルとして埋め込める形にする
+
+    MCP の text コンテンツのように JSON を文字列として入れ子にする場合に、
+    値全体を再度シリアライズせず、1回の文字列エスケープで済ませる。
+    """
+    text = payload.decode("utf-8")
+    if ENCODER == "orjson":
+        return orjson.dumps(text)
+    return json.dumps(text, ensure_ascii=False).encode("utf-8")
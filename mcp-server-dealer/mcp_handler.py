@@ -7,8 +7,31 @@ Model Context Protocol (MCP) サーバーの実装
 
 from mcp.server import Server
 from mcp.types import Tool, TextContent
+from concurrent.futures import ThreadPoolExecutor
 import azure.functions as func
-import json
+import asyncio
+import contextvars
+import functools
+import hashlib
+import os
+
+import json_codec
+import tool_metrics
+from tool_registry import registry
+
+# 同期ツールを実行するスレッドプールのサイズ
+DEFAULT_MAX_WORKERS = int(os.getenv("MCP_TOOL_MAX_WORKERS", "8"))
+
+# ツール実行のタイムアウト（秒）
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("MCP_TOOL_TIMEOUT", "30"))
+
+# tools/call のバッチリクエストで受け付ける最大件数
+MAX_BATCH_SIZE = int(os.getenv("MCP_MAX_BATCH_SIZE", "20"))
+
+# JSON-RPC 2.0 エラーコード
+JSONRPC_INVALID_REQUEST = -32600
+JSONRPC_INVALID_PARAMS = -32602
+JSONRPC_INTERNAL_ERROR = -32603
 
 # MCPサーバーインスタンス
 server = Server("mcp-server-dealer")
@@ -29,93 +52,251 @@ def register_tool(name: str, description: str, parameters: dict):
     return decorator
 
 
+def _tool_error(message: str) -> dict:
+    """MCPのツール実行エラー（isError）の結果を作成"""
+    return {"content": [{"type": "text", "text": message}], "isError": True}
+
+
+def _jsonrpc_error(request_id, code: int, message: str) -> dict:
+    """JSON-RPC 2.0 のエラーレスポンスを作成"""
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def _text_content(payload: bytes) -> bytes:
+    """シリアライズ済みのツール結果から MCP のツール実行結果（text コンテンツ）を作成
+
+    結果を再度シリアライズせず、文字列としてのエスケープ1回で埋め込む。
+    """
+    return b'{"content":[{"type":"text","text":' + json_codec.dumps_text(payload) + b"}]}"
+
+
+def _trace_context(meta, headers=None) -> dict | None:
+    """W3C Trace Context（traceparent / tracestate）を params._meta、なければ HTTP ヘッダーから取得"""
+    for source in (meta, headers):
+        if source is not None and hasattr(source, "get") and source.get("traceparent"):
+            return {key: source.get(key) for key in ("traceparent", "tracestate") if source.get(key)}
+    return None
+
+
+def _json_response(body, status_code: int = 200) -> func.HttpResponse:
+    """JSON のレスポンス（body はシリアライズ前の値またはシリアライズ済みの bytes）"""
+    if not isinstance(body, bytes):
+        body = json_codec.dumps(body)
+    return func.HttpResponse(body, status_code=status_code, mimetype="application/json")
+
+
+def _run_tool(call, encode: bool):
+    """ツールを実行して (結果, シリアライズ済みの結果 or None) を返す（ワーカースレッドで実行）"""
+    result = call()
+    return result, json_codec.dumps(result) if encode else None
+
+
 class MCPApp:
-    """Azure Functions用MCPアプリケーション"""
+    """Azure Functions用MCPアプリケーション
 
-    def __init__(self):
+    コルーチン関数のツールはイベントループ上で、同期関数のツールは
+    上限付きスレッドプール上で実行するため、遅いツールが
+    同じワーカーの他のリクエストをブロックしない。
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, default_timeout: float = DEFAULT_TOOL_TIMEOUT):
         self.tools = {}
+        self.default_timeout = default_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-tool")
+        # tools/list のレスポンス（シリアライズ済みの本文, ETag）。ツールの登録時に作り直す
+        self._tools_list: tuple[bytes, str] = self._build_tools_list()
+
+    def register(self, name: str, description: str, parameters: dict, max_concurrency: int | None = None, timeout: float | None = None):
+        """ツールを登録
 
-    def register(self, name: str, description: str, parameters: dict):
-        """ツールを登録"""
+        Args:
+            name: ツール名
+            description: ツールの説明
+            parameters: 入力スキーマ
+            max_concurrency: 同時実行数の上限（None の場合は無制限）
+            timeout: タイムアウト秒数（None の場合は既定値）
+        """
         def decorator(func):
             self.tools[name] = {
                 "handler": func,
                 "description": description,
-                "parameters": parameters
+                "parameters": parameters,
+                "is_async": asyncio.iscoroutinefunction(func),
+                "semaphore": asyncio.Semaphore(max_concurrency) if max_concurrency else None,
+                "timeout": timeout if timeout is not None else self.default_timeout,
             }
+            self._tools_list = self._build_tools_list()
             return func
         return decorator
 
+    def _build_tools_list(self) -> tuple[bytes, str]:
+        tools_list = [
+            {
+                "name": name,
+                "description": info["description"],
+                "inputSchema": info["parameters"]
+            }
+            for name, info in self.tools.items()
+        ]
+        body = json_codec.dumps({"tools": tools_list})
+        return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    def tools_list_response(self, req: func.HttpRequest) -> func.HttpResponse:
+        """tools/list のレスポンス（If-None-Match が一致すれば 304）
+
+        本文はツールの登録時にシリアライズ済みのため、リクエストごとの処理はヘッダーの比較のみ。
+        """
+        body, etag = self._tools_list
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if_none_match = req.headers.get("If-None-Match") or ""
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return func.HttpResponse(status_code=304, headers=headers)
+        return func.HttpResponse(body, status_code=200, headers=headers, mimetype="application/json")
+
+    async def call_tool(self, name: str, arguments: dict, encode: bool = False, trace_context: dict | None = None):
+        """ツールを実行して結果を返す
+
+        encode=True の場合はシリアライズ済みの結果（bytes）を返す。同期関数のツールでは
+        シリアライズもワーカースレッドで行い、イベントループを占有しない。
+        タイムアウト時は asyncio.TimeoutError を送出する。
+        同時実行数の上限待ちもタイムアウトに含まれる。
+        trace_context（traceparent / tracestate）を指定すると、ツールのスパンをその子として作成する。
+        """
+        with tool_metrics.track(name, trace_context) as call:
+            result, payload = await self._execute(self.tools[name], arguments, encode)
+            call.record(result, payload)
+        return payload if encode else result
+
+    async def _execute(self, info: dict, arguments: dict, encode: bool) -> tuple:
+        semaphore = info["semaphore"]
+
+        async with asyncio.timeout(info["timeout"]):
+            if semaphore is not None:
+                await semaphore.acquire()
+
+            if info["is_async"]:
+                try:
+                    result = await info["handler"](**arguments)
+                finally:
+                    if semaphore is not None:
+                        semaphore.release()
+                return result, json_codec.dumps(result) if encode else None
+
+            loop = asyncio.get_running_loop()
+            call = functools.partial(info["handler"], **arguments)
+            # ワーカースレッド内のスパン（データ読み込みなど）も同じトレースに含めるため、コンテキストを引き継ぐ
+            context = contextvars.copy_context()
+            future = loop.run_in_executor(self.executor, context.run, _run_tool, call, encode)
+            if semaphore is not None:
+                # スレッドは中断できないため、実際に終了した時点で枠を返す
+                future.add_done_callback(lambda _: semaphore.release())
+            return await asyncio.shield(future)
+
+    async def _call_batch_item(self, item, headers=None) -> bytes:
+        """バッチ内の1件（JSON-RPC 2.0 の tools/call）を実行してシリアライズ済みのレスポンスを返す"""
+        if not isinstance(item, dict):
+            return json_codec.dumps(_jsonrpc_error(None, JSONRPC_INVALID_REQUEST, "Invalid request"))
+
+        request_id = item.get("id")
+        if item.get("method", "tools/call") != "tools/call":
+            return json_codec.dumps(
+                _jsonrpc_error(request_id, JSONRPC_INVALID_REQUEST, f"Unsupported method '{item.get('method')}' in batch")
+            )
+
+        params = item.get("params") if isinstance(item.get("params"), dict) else item
+        tool_name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if tool_name not in self.tools:
+            return json_codec.dumps(_jsonrpc_error(request_id, JSONRPC_INVALID_PARAMS, f"Tool '{tool_name}' not found"))
+
+        try:
+            payload = await self.call_tool(
+                tool_name, arguments, encode=True, trace_context=_trace_context(params.get("_meta"), headers)
+            )
+        except TimeoutError:
+            return json_codec.dumps(
+                {"jsonrpc": "2.0", "id": request_id, "result": _tool_error(f"Tool '{tool_name}' timed out")}
+            )
+        except Exception as e:
+            return json_codec.dumps(_jsonrpc_error(request_id, JSONRPC_INTERNAL_ERROR, str(e)))
+
+        return b'{"jsonrpc":"2.0","id":' + json_codec.dumps(request_id) + b',"result":' + _text_content(payload) + b"}"
+
+    async def handle_batch(self, items: list, headers=None) -> func.HttpResponse:
+        """JSON-RPC 2.0 バッチの tools/call を並行実行し、リクエスト順に結果を返す
+
+        id を持たない要素（通知）のレスポンスは返さない。
+        すべて通知の場合は本文なしの 202 Accepted を返す（JSON-RPC 2.0 では空配列も返さない）。
+        """
+        if not items:
+            return _json_response(_jsonrpc_error(None, JSONRPC_INVALID_REQUEST, "Empty batch"), status_code=400)
+        if len(items) > MAX_BATCH_SIZE:
+            return _json_response(
+                _jsonrpc_error(None, JSONRPC_INVALID_REQUEST, f"Batch size exceeds limit ({MAX_BATCH_SIZE})"),
+                status_code=400,
+            )
+
+        responses = await asyncio.gather(*(self._call_batch_item(item, headers) for item in items))
+        responses = [
+            response
+            for item, response in zip(items, responses)
+            if not (isinstance(item, dict) and "id" not in item)
+        ]
+        if not responses:
+            return func.HttpResponse(status_code=202)
+        return _json_response(b"[" + b",".join(responses) + b"]")
+
     async def handle_request(self, req: func.HttpRequest) -> func.HttpResponse:
         """MCPリクエストを処理"""
         path = req.route_params.get("path", "")
 
-        # ツール一覧を返す
-        if path == "tools/list" or req.method == "GET":
-            tools_list = [
-                {
-                    "name": name,
-                    "description": info["description"],
-                    "inputSchema": info["parameters"]
-                }
-                for name, info in self.tools.items()
-            ]
+        # メトリクス（Prometheus のテキスト形式）
+        if path == "metrics":
             return func.HttpResponse(
-                json.dumps({"tools": tools_list}, ensure_ascii=False),
-                status_code=200,
-                mimetype="application/json"
+                tool_metrics.render(), status_code=200, headers={"Content-Type": tool_metrics.CONTENT_TYPE}
             )
 
+        # ツール一覧を返す
+        if path == "tools/list" or req.method == "GET":
+            return self.tools_list_response(req)
+
         # ツール呼び出し
         if path == "tools/call" and req.method == "POST":
             try:
                 body = req.get_json()
+
+                # JSON-RPC 2.0 バッチ（配列）は並行実行
+                if isinstance(body, list):
+                    return await self.handle_batch(body, req.headers)
+
                 tool_name = body.get("name")
                 arguments = body.get("arguments", {})
 
                 if tool_name not in self.tools:
-                    return func.HttpResponse(
-                        json.dumps({"error": f"Tool '{tool_name}' not found"}, ensure_ascii=False),
-                        status_code=404,
-                        mimetype="application/json"
-                    )
+                    return _json_response({"error": f"Tool '{tool_name}' not found"}, status_code=404)
 
-                handler = self.tools[tool_name]["handler"]
-                result = handler(**arguments)
+                try:
+                    payload = await self.call_tool(
+                        tool_name, arguments or {}, encode=True, trace_context=_trace_context(body.get("_meta"), req.headers)
+                    )
+                except TimeoutError:
+                    return _json_response(_tool_error(f"Tool '{tool_name}' timed out"))
 
-                return func.HttpResponse(
-                    json.dumps({"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False)}]}, ensure_ascii=False),
-                    status_code=200,
-                    mimetype="application/json"
-                )
+                return _json_response(_text_content(payload))
             except Exception as e:
-                return func.HttpResponse(
-                    json.dumps({"error": str(e)}, ensure_ascii=False),
-                    status_code=500,
-                    mimetype="application/json"
-                )
+                return _json_response({"error": str(e)}, status_code=500)
 
         # ヘルスチェック
         if path == "health":
-            return func.HttpResponse(
-                json.dumps({"status": "healthy"}, ensure_ascii=False),
-                status_code=200,
-                mimetype="application/json"
-            )
+            return _json_response({"status": "healthy"})
 
-        return func.HttpResponse(
-            json.dumps({"error": "Unknown endpoint"}, ensure_ascii=False),
-            status_code=404,
-            mimetype="application/json"
-        )
+        return _json_response({"error": "Unknown endpoint"}, status_code=404)
 
 
 # MCPアプリケーションインスタンス
 mcp_app = MCPApp()
 
-# ツールのインポートと登録
-# デコレータにより、インポート時に自動的に mcp_app に登録される
-from tools.customer import search_customer_by_name, get_customer_info
-from tools.contract import get_contracts
-from tools.visit import get_visit_history, get_upcoming_services
-from tools.vehicle import search_vehicles
+# ツールレジストリ（function_app.py と共通）の全ツールを登録
+for _spec in registry:
+    mcp_app.register(_spec.name, _spec.description, _spec.input_schema)(_spec)
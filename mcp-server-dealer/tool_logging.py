@@ -0,0 +1,137 @@
+"""
+ツール呼び出しログ
+
+MCPツールの引数・結果を構造化ログ（1行のJSON）として出力する。
+出力量は環境変数で切り替え、無効なレベルでは一切シリアライズしない。
+呼び出し元からトレースコンテキストが渡された場合は trace_id を付け、エージェント側のトレースと突き合わせられるようにする。
+
+環境変数:
+    MCP_LOG_MODE: off / args / summary / full（既定: summary）
+        - off:     出力しない
+        - args:    引数のみ
+        - summary: 引数 + 結果の件数
+        - full:    引数 + 結果の件数 + 結果本体（MCP_LOG_SAMPLE_RATE の割合のみ）
+    MCP_LOG_SAMPLE_RATE: full モードで結果本体を出力する割合 0.0〜1.0（既定: 1.0）
+    MCP_LOG_REDACT_FIELDS: マスクするフィールド名（カンマ区切り、既定: 個人情報系）
+"""
+
+import logging
+import os
+import random
+from typing import Any, Optional
+
+import json_codec
+
+logger = logging.getLogger("mcp.tools")
+
+LOG_MODES = ("off", "args", "summary", "full")
+
+# 既定でマスクする個人情報フィールド
+DEFAULT_REDACT_FIELDS = (
+    "name",
+    "customer_name",
+    "phone",
+    "email",
+    "address",
+    "family",
+    "conversation_notes",
+    "sales_notes",
+)
+
+REDACTED = "***"
+
+
+def _redact(value: Any, fields: frozenset[str]) -> Any:
+    """指定フィールドの値をマスクしたコピーを返す"""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in fields and item is not None else _redact(item, fields)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_redact(item, fields) for item in value]
+    return value
+
+
+def result_count(result: Any) -> int:
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    # 一覧を返すツールの結果（items / total / has_more / next_cursor）
+    if isinstance(result, dict) and isinstance(result.get("items"), list):
+        return len(result["items"])
+    return 0 if result is None else 1
+
+
+class ToolLogger:
+    """MCPツール呼び出しの構造化ロガー"""
+
+    def __init__(self, mode: str = "summary", sample_rate: float = 1.0, redact_fields: tuple[str, ...] = DEFAULT_REDACT_FIELDS):
+        self.mode = mode if mode in LOG_MODES else "summary"
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.redact_fields = frozenset(redact_fields)
+
+    @classmethod
+    def from_env(cls) -> "ToolLogger":
+        """環境変数から設定を読み込んで作成"""
+        try:
+            sample_rate = float(os.getenv("MCP_LOG_SAMPLE_RATE", "1.0"))
+        except ValueError:
+            sample_rate = 1.0
+        redact_env = os.getenv("MCP_LOG_REDACT_FIELDS")
+        redact_fields = (
+            tuple(field.strip() for field in redact_env.split(",") if field.strip())
+            if redact_env is not None
+            else DEFAULT_REDACT_FIELDS
+        )
+        return cls(
+            mode=os.getenv("MCP_LOG_MODE", "summary").strip().lower(),
+            sample_rate=sample_rate,
+            redact_fields=redact_fields,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off" and logger.isEnabledFor(logging.INFO)
+
+    def _emit(self, record: dict[str, Any], raw_result: Optional[bytes] = None) -> None:
+        """1行のJSONとして出力（raw_result はシリアライズ済みの結果をそのまま result として付ける）"""
+        try:
+            line = json_codec.dumps(record)
+            if raw_result is not None:
+                line = line[:-1] + b',"result":' + raw_result + b"}"
+            logger.info("%s", line.decode("utf-8"))
+        except Exception:
+            logger.info("%s", record)
+
+    def args(self, tool: str, args: dict, trace_id: Optional[str] = None) -> None:
+        """ツール引数を出力"""
+        if not self.enabled:
+            return
+        record: dict[str, Any] = {"event": "tool_args", "tool": tool, "args": _redact(args, self.redact_fields)}
+        if trace_id:
+            record["trace_id"] = trace_id
+        self._emit(record)
+
+    def result(self, tool: str, result: Any, payload: Optional[bytes] = None, trace_id: Optional[str] = None) -> None:
+        """ツール結果を出力（モードに応じて件数のみ/サンプリングした本体）
+
+        Args:
+            tool: ツール名
+            result: ツールの結果
+            payload: レスポンス用にシリアライズ済みの結果（あればサイズを記録し、
+                マスク対象のフィールドがない場合は本体の出力に再利用する）
+            trace_id: 呼び出し元のトレース ID
+        """
+        if not self.enabled or self.mode == "args":
+            return
+        record: dict[str, Any] = {"event": "tool_result", "tool": tool, "count": result_count(result)}
+        if payload is not None:
+            record["bytes"] = len(payload)
+        if trace_id:
+            record["trace_id"] = trace_id
+        if self.mode == "full" and (self.sample_rate >= 1.0 or random.random() < self.sample_rate):
+            if payload is not None and not self.redact_fields:
+                self._emit(record, raw_result=payload)
+                return
+            record["result"] = _redact(result, self.redact_fields)
+        self._emit(record)
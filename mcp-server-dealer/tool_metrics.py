@@ -0,0 +1,300 @@
+"""
+ツールのメトリクス
+
+ツール呼び出し（function_app.py / mcp_handler.py の両方）とデータセットの読み込みを計測し、
+/metrics で Prometheus のテキスト形式として公開する。
+OpenTelemetry（opentelemetry-api）がインストールされていれば、ツール呼び出しごとにスパンも作成する。
+呼び出し元（エージェント）から W3C Trace Context（traceparent / tracestate）が渡された場合は
+その子スパンとし、呼び出し中に発生したデータセットの読み込みもスパンとして記録する。
+OpenTelemetry がなくても traceparent のトレース ID はログの相関用に取り出す。
+
+メトリクスはワーカープロセスごとの値（スケールアウト時はインスタンスごとに収集する）。
+
+    mcp_tool_calls_total{tool}                       呼び出し回数
+    mcp_tool_errors_total{tool,kind}                 エラー回数（exception / timeout / tool_error）
+    mcp_tool_duration_seconds{tool}                  処理時間（ヒストグラム）
+    mcp_tool_result_rows{tool}                       結果の件数（ヒストグラム）
+    mcp_tool_response_bytes{tool}                    シリアライズ後のサイズ（ヒストグラム）
+    dealer_data_loads_total{dataset,source,status}   データセットの読み込み回数（再読み込み・失敗を含む）
+    dealer_data_load_duration_seconds{dataset,phase} 読み込み時間（parse / index / snapshot、ヒストグラム）
+    dealer_data_records{dataset}                     読み込み済みの件数
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Iterator, Mapping, Optional, Sequence
+
+from tool_logging import result_count
+from tools import data_store
+from tools.store import LoadEvent
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # 任意の依存関係
+    propagate = trace = None
+
+# Prometheus のテキスト形式の Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_ROW_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 500, 1000, 5000)
+_BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+_LOAD_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_INF_LABEL = 'le="+Inf"'
+
+# traceparent（version-traceid-parentid-flags）
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+
+_tracer = trace.get_tracer("mcp_server_dealer") if trace is not None else None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """単調増加するカウンター"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """最新の値"""
+
+    kind = "gauge"
+
+    def set(self, *label_values: str, value: float) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    """累積バケット・合計・件数を持つヒストグラム"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # ラベルの値 -> (バケットごとの件数, 合計, 件数)
+        self._values: dict[tuple[str, ...], list[Any]] = {}
+
+    def observe(self, *label_values: str, value: float) -> None:
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][position] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, _INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+tool_calls = Counter("mcp_tool_calls_total", "MCP tool calls", ["tool"])
+tool_errors = Counter("mcp_tool_errors_total", "MCP tool errors by kind", ["tool", "kind"])
+tool_duration = Histogram("mcp_tool_duration_seconds", "MCP tool latency", ["tool"], _LATENCY_BUCKETS)
+tool_rows = Histogram("mcp_tool_result_rows", "Rows returned by MCP tools", ["tool"], _ROW_BUCKETS)
+tool_bytes = Histogram("mcp_tool_response_bytes", "Serialized MCP tool result size", ["tool"], _BYTE_BUCKETS)
+data_loads = Counter("dealer_data_loads_total", "Dataset loads and reloads", ["dataset", "source", "status"])
+data_load_duration = Histogram(
+    "dealer_data_load_duration_seconds", "Dataset load time by phase", ["dataset", "phase"], _LOAD_BUCKETS
+)
+data_records = Gauge("dealer_data_records", "Records in the loaded dataset", ["dataset"])
+
+METRICS = (tool_calls, tool_errors, tool_duration, tool_rows, tool_bytes, data_loads, data_load_duration, data_records)
+
+
+def render() -> str:
+    """全メトリクスを Prometheus のテキスト形式で返す"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def trace_id_from(carrier: Optional[Mapping[str, Any]]) -> Optional[str]:
+    """W3C Trace Context の carrier（traceparent を含む dict）からトレース ID を取り出す"""
+    if not carrier:
+        return None
+    match = _TRACEPARENT.match(str(carrier.get("traceparent") or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32:
+        return None
+    return match.group(1)
+
+
+class ToolCall:
+    """1回のツール呼び出しの計測（track() が返す）"""
+
+    def __init__(self, tool: str, trace_id: Optional[str] = None):
+        self.tool = tool
+        # ログに付けるトレース ID（スパンがあればそのトレース ID）
+        self.trace_id = trace_id
+        self.rows: Optional[int] = None
+        self.size: Optional[int] = None
+        self.is_error = False
+
+    def record(self, result: Any, payload: Optional[bytes] = None) -> None:
+        """ツールの結果（とシリアライズ後の bytes）を記録する"""
+        self.is_error = isinstance(result, dict) and "error" in result
+        self.rows = None if self.is_error else result_count(result)
+        self.size = len(payload) if payload is not None else None
+
+
+def _start_span(tool: str, carrier: Optional[Mapping[str, Any]]):
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(
+        f"execute_tool {tool}",
+        context=propagate.extract(dict(carrier)) if carrier else None,
+        kind=trace.SpanKind.SERVER,
+        attributes={"gen_ai.operation.name": "execute_tool", "gen_ai.tool.name": tool},
+    )
+
+
+@contextmanager
+def track(tool: str, carrier: Optional[Mapping[str, Any]] = None) -> Iterator[ToolCall]:
+    """ツール呼び出しを計測する（OpenTelemetry があればスパンも作成する）
+
+    with ブロック内で例外が発生した場合は exception（TimeoutError は timeout）として数え、
+    例外はそのまま送出する。
+
+    Args:
+        tool: ツール名
+        carrier: 呼び出し元のトレースコンテキスト（traceparent / tracestate）。
+            指定された場合はスパンをその子として作成する
+    """
+    with _start_span(tool, carrier) as span:
+        trace_id = trace_id_from(carrier)
+        if span is not None and span.get_span_context().is_valid:
+            trace_id = trace.format_trace_id(span.get_span_context().trace_id)
+        call = ToolCall(tool, trace_id)
+        start = time.perf_counter()
+        error_kind = None
+        try:
+            yield call
+        except TimeoutError:
+            error_kind = "timeout"
+            raise
+        except Exception:
+            error_kind = "exception"
+            raise
+        finally:
+            if error_kind is None and call.is_error:
+                error_kind = "tool_error"
+            tool_calls.inc(tool)
+            tool_duration.observe(tool, value=time.perf_counter() - start)
+            if error_kind is not None:
+                tool_errors.inc(tool, error_kind)
+            if call.rows is not None:
+                tool_rows.observe(tool, value=call.rows)
+            if call.size is not None:
+                tool_bytes.observe(tool, value=call.size)
+            if span is not None:
+                _annotate_span(span, call, error_kind)
+
+
+def _annotate_span(span: Any, call: ToolCall, error_kind: Optional[str]) -> None:
+    if call.rows is not None:
+        span.set_attribute("mcp.tool.result_rows", call.rows)
+    if call.size is not None:
+        span.set_attribute("mcp.tool.response_bytes", call.size)
+    if error_kind is not None:
+        span.set_attribute("error.type", error_kind)
+        span.set_status(trace.Status(trace.StatusCode.ERROR))
+
+
+def _record_load_span(event: LoadEvent) -> None:
+    """ツール呼び出し中に発生した読み込みを、呼び出しのスパンの子として記録する"""
+    if _tracer is None or not trace.get_current_span().is_recording():
+        return
+    end = time.time_ns()
+    elapsed = int((event.parse_seconds + event.index_seconds) * 1e9)
+    span = _tracer.start_span(
+        f"load_data {event.name}",
+        start_time=end - elapsed,
+        attributes={
+            "dealer.dataset": event.name,
+            "dealer.data.source": event.source,
+            "dealer.data.reload": event.reload,
+            "dealer.data.records": event.records,
+        },
+    )
+    if not event.ok:
+        span.set_status(trace.Status(trace.StatusCode.ERROR))
+    span.end(end_time=end)
+
+
+def _on_data_load(event: LoadEvent) -> None:
+    _record_load_span(event)
+    data_loads.inc(event.name, event.source, "ok" if event.ok else "error")
+    if event.source == "snapshot":
+        data_load_duration.observe(event.name, "snapshot", value=event.parse_seconds)
+    else:
+        data_load_duration.observe(event.name, "parse", value=event.parse_seconds)
+        if event.ok or event.index_seconds:
+            data_load_duration.observe(event.name, "index", value=event.index_seconds)
+    if event.ok:
+        data_records.set(event.name, value=event.records)
+
+
+data_store.add_listener(_on_data_load)
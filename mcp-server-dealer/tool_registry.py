@@ -0,0 +1,342 @@
+"""
+ツールレジストリ
+
+MCPツールの定義（名前・説明・ハンドラー・入力スキーマ）を一か所にまとめ、
+Azure Functions の mcpToolTrigger（function_app.py）と MCPApp（mcp_handler.py）の両方から参照する。
+
+入力スキーマはハンドラーのシグネチャ（型注釈・既定値）と docstring の Args から
+読み込み時に一度だけ生成する。ツールを追加する場合は、型注釈と Args を書いた関数に
+@registry.tool を付けるだけでよい。
+"""
+
+import inspect
+import types
+import typing
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Literal, Optional, Sequence
+
+from tools.contract import CONTRACT_FIELDS
+from tools.contract import get_contracts as _get_contracts
+from tools.customer import SEARCH_FIELDS
+from tools.customer import get_customer_info as _get_customer_info
+from tools.customer import search_customer_by_name as _search_customer_by_name
+from tools.customer_360 import get_customer_360 as _get_customer_360
+from tools.paging import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, PagingError, make_page, page_request, paginate
+from tools.vehicle import VEHICLE_FIELDS
+from tools.vehicle import search_vehicles as _search_vehicles
+from tools.visit import UPCOMING_SERVICE_FIELDS, VISIT_FIELDS
+from tools.visit import count_upcoming_services as _count_upcoming_services
+from tools.visit import get_upcoming_services as _get_upcoming_services
+from tools.visit import get_visit_history as _get_visit_history
+
+# Python の型 -> JSON Schema の type
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+# 一覧を返すツール共通のパラメータの説明（docstring に書かない）
+_PAGING_DESCRIPTIONS = {
+    "limit": f"最大件数（省略時: {DEFAULT_PAGE_LIMIT}、上限: {MAX_PAGE_LIMIT}）",
+    "cursor": "続きを取得する場合に、前回の結果の next_cursor をそのまま指定",
+}
+
+
+@dataclass(frozen=True)
+class ToolParameter:
+    """ツールの入力パラメータ（JSON Schema の1プロパティ）"""
+
+    name: str
+    type: str
+    description: str
+    required: bool
+    default: Any = None
+    enum: Optional[list[Any]] = None
+
+    def to_schema(self) -> dict[str, Any]:
+        schema: dict[str, Any] = {"type": self.type, "description": self.description}
+        if self.enum:
+            schema["enum"] = self.enum
+        if self.default is not None:
+            schema["default"] = self.default
+        return schema
+
+
+@dataclass
+class ToolSpec:
+    """登録済みのツール
+
+    呼び出し（spec(**arguments)）では、スキーマにない引数を無視し、
+    文字列で渡された数値を変換してからハンドラーを実行する。
+    """
+
+    name: str
+    description: str
+    handler: Callable[..., Any]
+    parameters: tuple[ToolParameter, ...]
+    aliases: dict[str, str] = field(default_factory=dict)
+    input_schema: dict[str, Any] = field(init=False)
+
+    def __post_init__(self):
+        self.input_schema = {
+            "type": "object",
+            "properties": {parameter.name: parameter.to_schema() for parameter in self.parameters},
+            "required": [parameter.name for parameter in self.parameters if parameter.required],
+        }
+
+    def bind(self, arguments: dict[str, Any]) -> dict[str, Any]:
+        """MCP の arguments をハンドラーの引数に変換する"""
+        bound = {}
+        for parameter in self.parameters:
+            value = arguments.get(parameter.name)
+            if value is None:
+                for alias, target in self.aliases.items():
+                    if target == parameter.name and arguments.get(alias) is not None:
+                        value = arguments[alias]
+                        break
+            value = _coerce(value, parameter.type)
+            if value is not None:
+                bound[parameter.name] = value
+            elif parameter.required:
+                # 必須パラメータの未指定は空文字として扱う（各ツールが「該当なし」を返す）
+                bound[parameter.name] = ""
+        return bound
+
+    def __call__(self, **arguments: Any) -> Any:
+        try:
+            return self.handler(**self.bind(arguments))
+        except PagingError as e:
+            return {"error": str(e)}
+
+
+def _coerce(value: Any, json_type: str) -> Any:
+    """JSON Schema の type に合わせて値を変換する（変換できない・空の値は None）"""
+    if value is None or value == "":
+        return None
+    if json_type == "integer":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if json_type == "string" and not isinstance(value, str):
+        return value if isinstance(value, list) else str(value)
+    return value
+
+
+def _json_type(annotation: Any) -> tuple[str, Optional[list[Any]]]:
+    """型注釈から (JSON Schema の type, enum) を求める"""
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        arguments = [argument for argument in typing.get_args(annotation) if argument is not type(None)]
+        if len(arguments) == 1:
+            return _json_type(arguments[0])
+    if typing.get_origin(annotation) is Literal:
+        values = list(typing.get_args(annotation))
+        return _JSON_TYPES[type(values[0])], values
+    if annotation in _JSON_TYPES:
+        return _JSON_TYPES[annotation], None
+    raise TypeError(f"Unsupported parameter type for tool schema: {annotation!r}")
+
+
+def _docstring_args(func: Callable[..., Any]) -> dict[str, str]:
+    """docstring の Args セクションから パラメータ名 -> 説明 を取り出す"""
+    descriptions: dict[str, str] = {}
+    in_args = False
+    current = None
+    for line in inspect.getdoc(func).splitlines() if func.__doc__ else ():
+        stripped = line.strip()
+        if stripped == "Args:":
+            in_args = True
+            continue
+        if not in_args:
+            continue
+        if not stripped or (not line.startswith(" ") and stripped.endswith(":")):
+            if descriptions:
+                break
+            continue
+        name, separator, text = stripped.partition(": ")
+        if separator and line.startswith("    ") and not line.startswith("        ") and name.isidentifier():
+            current = name
+            descriptions[name] = text.strip()
+        elif current is not None:
+            descriptions[current] += stripped
+    return descriptions
+
+
+def _summary(func: Callable[..., Any]) -> str:
+    doc = inspect.getdoc(func) or ""
+    return doc.split("\n\n", 1)[0].replace("\n", "")
+
+
+class ToolRegistry:
+    """ツール名 -> ToolSpec（登録順を保持）"""
+
+    def __init__(self):
+        self._tools: dict[str, ToolSpec] = {}
+
+    def tool(
+        self,
+        description: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        aliases: Optional[dict[str, str]] = None,
+    ):
+        """関数をツールとして登録するデコレータ
+
+        Args:
+            description: ツールの説明（省略時は docstring の1段落目）
+            fields: 一覧を返すツールで fields に指定できる項目
+            aliases: 別名 -> パラメータ名（例: {"query": "name"}）
+        """
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            hints = typing.get_type_hints(func)
+            documented = _docstring_args(func)
+            if fields is not None:
+                documented.setdefault(
+                    "fields", f"出力する項目（カンマ区切り、省略時: 全項目）。指定可能: {','.join(fields)}"
+                )
+            parameters = []
+            for name, parameter in inspect.signature(func).parameters.items():
+                json_type, enum = _json_type(hints[name])
+                required = parameter.default is inspect.Parameter.empty
+                parameters.append(ToolParameter(
+                    name=name,
+                    type=json_type,
+                    description=documented.get(name) or _PAGING_DESCRIPTIONS.get(name, ""),
+                    required=required,
+                    default=None if required else parameter.default,
+                    enum=enum,
+                ))
+            self._tools[func.__name__] = ToolSpec(
+                name=func.__name__,
+                description=description or _summary(func),
+                handler=func,
+                parameters=tuple(parameters),
+                aliases=dict(aliases or {}),
+            )
+            return func
+        return decorator
+
+    def __iter__(self) -> Iterator[ToolSpec]:
+        return iter(self._tools.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __getitem__(self, name: str) -> ToolSpec:
+        return self._tools[name]
+
+
+registry = ToolRegistry()
+
+VehicleType = Literal["SUV", "セダン", "軽自動車", "ミニバン"]
+
+
+@registry.tool(fields=SEARCH_FIELDS, aliases={"query": "name"})
+def search_customer_by_name(
+    name: str, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None, fields: Optional[str] = None
+) -> dict:
+    """顧客名からID候補を検索します（部分一致）。姓のみ/名のみ/フルネーム可。結果は items / total / has_more / next_cursor
+
+    Args:
+        name: 顧客名（部分一致）。姓のみ/名のみ/フルネーム可（例: '田中', '田中 太郎'）
+    """
+    page = page_request({"tool": "search_customer_by_name", "name": name}, SEARCH_FIELDS, limit, cursor, fields)
+    return paginate(page, _search_customer_by_name(name, limit=None))
+
+
+@registry.tool()
+def get_customer_info(customer_id: str) -> dict:
+    """顧客IDから詳細情報を取得します。入力内に含まれるIDも抽出して照合します
+
+    Args:
+        customer_id: 顧客ID（例: 'C001'）。文字列内にIDが含まれていても抽出して照合します（例: 'C001の顧客情報'）
+    """
+    return _get_customer_info(customer_id)
+
+
+@registry.tool(fields=CONTRACT_FIELDS)
+def get_contracts(
+    customer_id: str, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None, fields: Optional[str] = None
+) -> dict:
+    """顧客IDから契約履歴を取得します。入力内に含まれるIDも抽出して照合します。結果は items / total / has_more / next_cursor
+
+    Args:
+        customer_id: 顧客ID（例: 'C001'）。文字列内にIDが含まれていても抽出して照合します
+    """
+    page = page_request({"tool": "get_contracts", "customer_id": customer_id}, CONTRACT_FIELDS, limit, cursor, fields)
+    return paginate(page, _get_contracts(customer_id))
+
+
+@registry.tool(fields=VISIT_FIELDS)
+def get_visit_history(
+    customer_id: str, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None, fields: Optional[str] = None
+) -> dict:
+    """顧客IDから来店履歴を取得します。入力内に含まれるIDも抽出して照合します。結果は items / total / has_more / next_cursor
+
+    Args:
+        customer_id: 顧客ID（例: 'C001'）。文字列内にIDが含まれていても抽出して照合します
+    """
+    page = page_request({"tool": "get_visit_history", "customer_id": customer_id}, VISIT_FIELDS, limit, cursor, fields)
+    return paginate(page, _get_visit_history(customer_id))
+
+
+@registry.tool()
+def get_customer_360(customer_id: str) -> dict:
+    """顧客IDから詳細情報・契約履歴・来店履歴・関連車両をまとめて取得します。顧客の全体像が必要な場合はこれを1回呼び出してください
+
+    Args:
+        customer_id: 顧客ID（例: 'C001'）。文字列内にIDが含まれていても抽出して照合します
+    """
+    return _get_customer_360(customer_id)
+
+
+@registry.tool(fields=UPCOMING_SERVICE_FIELDS)
+def get_upcoming_services(
+    days: int = 30,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> dict:
+    """今後のサービス予定一覧を取得します（指定日数先まで）。結果は items / total / has_more / next_cursor
+
+    Args:
+        days: 何日先まで検索するか（省略時: 30）。例: 60 → 今後60日分
+        offset: 先頭から読み飛ばす件数（cursor を指定しない場合のみ、省略時: 0）
+    """
+    page = page_request(
+        {"tool": "get_upcoming_services", "days": days}, UPCOMING_SERVICE_FIELDS, limit, cursor, fields, offset
+    )
+    # 予定日のインデックスで範囲を絞り、今回のページ分だけ取得する
+    items = _get_upcoming_services(days=days, offset=page.offset, limit=page.limit)
+    return make_page(page, items, _count_upcoming_services(days))
+
+
+@registry.tool(fields=VEHICLE_FIELDS)
+def search_vehicles(
+    type: VehicleType,
+    color: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> dict:
+    """条件に合う車両在庫を検索します（色は部分一致、価格・年式の範囲指定可）。結果は items / total / has_more / next_cursor
+
+    Args:
+        type: 車種（'SUV', 'セダン', '軽自動車', 'ミニバン'）
+        color: 色（部分一致）。例: '赤' → 'ソウルレッド' にマッチ
+        min_price: 最低価格（円、任意）。例: 2000000
+        max_price: 最高価格（円、任意）。例: 4000000
+        min_year: 最も古い年式（任意）。例: 2022
+        max_year: 最も新しい年式（任意）。例: 2024
+    """
+    query = {
+        "type": type,
+        "color": color,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_year": min_year,
+        "max_year": max_year,
+    }
+    page = page_request({"tool": "search_vehicles", **query}, VEHICLE_FIELDS, limit, cursor, fields)
+    return paginate(page, _search_vehicles(**query))
@@ -4,59 +4,95 @@ MCPサーバーツールモジュール
 データ読み込みユーティリティと各ツールをエクスポート
 """
 
-import json
-import logging
+import os
 import re
 from pathlib import Path
-from typing import Any
+from typing import Any, Sequence
 
-# データディレクトリのパス
-DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+from tools.repository import STORAGE_BACKEND, DealerRepository, create_repository
+from tools.snapshot import load_snapshot
+from tools.store import COLUMNAR_ENABLED, DealerDataStore, DatasetSnapshot, group_index, unique_index
 
+# データディレクトリのパス（DEALER_DATA_DIR で別のディレクトリを指定可能）
+DATA_DIR = Path(os.getenv("DEALER_DATA_DIR") or Path(__file__).resolve().parent.parent / "data")
 
-def load_json(filename: str) -> list[dict[str, Any]]:
-    """JSONファイルを読み込んでリストとして返す
+# 件数が多くなるデータセットは列指向で保持する（DEALER_COLUMNAR=false で無効化）
+COLUMNAR_DATASETS = ("contracts.json", "visits.json", "vehicles.json") if COLUMNAR_ENABLED else ()
+
+# プロセス全体で共有するデータストア
+data_store = DealerDataStore(DATA_DIR, columnar=COLUMNAR_DATASETS)
+
+# セカンダリインデックス（データセットの読み込み時に構築。JSON リポジトリが参照する）
+for _filename in ("customers.json", "vehicles.json"):
+    data_store.register_index(_filename, "id", unique_index("id"))
+for _filename in ("contracts.json", "visits.json"):
+    data_store.register_index(_filename, "customer_id", group_index("customer_id"))
+
+# ツールが参照するリポジトリ（DEALER_STORAGE で JSON / SQLite を選択）
+repository: DealerRepository = create_repository(data_store)
+
+# ビルド済みスナップショット（python -m tools.build_snapshot で作成）。
+# 存在すれば起動時に読み込み、元の JSON と一致しないデータセットは JSON から読み込む
+SNAPSHOT_PATH = Path(os.getenv("DEALER_SNAPSHOT_PATH") or DATA_DIR / "snapshot.pickle")
+if STORAGE_BACKEND == "json":
+    load_snapshot(data_store, SNAPSHOT_PATH)
+
+
+def load_json(filename: str) -> Sequence[dict[str, Any]]:
+    """JSONデータを取得する（ワーカー内キャッシュ経由）
+
+    ファイルの読み込みは初回とファイル更新時のみ行われる。
+    返却されるレコードは共有されているため、変更しないこと。
 
     Args:
         filename: JSONファイル名（例: "customers.json"）
 
     Returns:
-        JSONデータのリスト
+        JSONデータの読み取り専用シーケンス（読み込み失敗時は空）
     """
-    file_path = DATA_DIR / filename
-    try:
-        if not file_path.exists():
-            logging.error("Data file not found: %s", file_path)
-            return []
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        logging.info("Loaded data file: %s (count=%d)", file_path, len(data))
-        return data
-    except Exception:
-        logging.exception("Failed to load data file: %s", file_path)
-        return []
-
-
-def get_customers() -> list[dict[str, Any]]:
+    return data_store.get(filename).records
+
+
+def get_customers() -> Sequence[dict[str, Any]]:
     """顧客データを取得"""
     return load_json("customers.json")
 
 
-def get_contracts() -> list[dict[str, Any]]:
+def get_contracts() -> Sequence[dict[str, Any]]:
     """契約データを取得"""
     return load_json("contracts.json")
 
 
-def get_visits() -> list[dict[str, Any]]:
+def get_visits() -> Sequence[dict[str, Any]]:
     """来店履歴データを取得"""
     return load_json("visits.json")
 
 
-def get_vehicles() -> list[dict[str, Any]]:
+def get_vehicles() -> Sequence[dict[str, Any]]:
     """車両データを取得"""
     return load_json("vehicles.json")
 
 
+def get_customer_by_id(customer_id: str) -> dict[str, Any] | None:
+    """顧客IDから顧客レコードを取得"""
+    return repository.get_customer(customer_id)
+
+
+def get_vehicle_by_id(vehicle_id: str) -> dict[str, Any] | None:
+    """車両IDから車両レコードを取得"""
+    return repository.get_vehicle(vehicle_id)
+
+
+def get_contracts_by_customer(customer_id: str) -> Sequence[dict[str, Any]]:
+    """顧客IDから契約レコードを取得"""
+    return repository.contracts_by_customer(customer_id)
+
+
+def get_visits_by_customer(customer_id: str) -> Sequence[dict[str, Any]]:
+    """顧客IDから来店レコードを取得"""
+    return repository.visits_by_customer(customer_id)
+
+
 def normalize_customer_id(value: str) -> str:
     """顧客IDを正規化（例: 'C001の顧客情報' -> 'C001'）"""
     if not value:
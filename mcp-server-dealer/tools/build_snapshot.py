@@ -0,0 +1,32 @@
+"""
+ビルド済みスナップショットの作成コマンド
+
+data/*.json を読み込み、登録済みのインデックスとともに tools/snapshot.py の形式で保存する。
+データディレクトリは DEALER_DATA_DIR で指定する。
+
+使い方（mcp-server-dealer ディレクトリで実行）:
+    python -m tools.build_snapshot --output data/snapshot.pickle
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from tools import SNAPSHOT_PATH, data_store
+from tools.snapshot import build_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="data/*.json からビルド済みスナップショットを作成")
+    parser.add_argument("--output", default=str(SNAPSHOT_PATH), help="作成するスナップショットのパス")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = build_snapshot(data_store, Path(args.output))
+    for name, count in counts.items():
+        print(f"{name}: {count}")
+    print(f"Wrote {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+車両の色の照合
+
+検索条件の色（"赤" など）と車両の色（"ソウルレッド" など）を
+部分一致とエイリアス（色系統）で照合する
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+# 色のマッピング（部分一致検索用）
+COLOR_ALIASES = {
+    "赤": ["ソウルレッド", "レッド", "赤"],
+    "白": ["ホワイト", "ロジウムホワイト", "白"],
+    "黒": ["ブラック", "ジェットブラック", "黒"],
+    "グレー": ["マシングレー", "グレー", "灰"],
+    "青": ["ブルー", "ディープブルー", "青"],
+}
+
+
+@lru_cache(maxsize=1024)
+def color_families(vehicle_color: str) -> frozenset[str]:
+    """車両の色が属する色系統（COLOR_ALIASES のキー）を解決"""
+    return frozenset(
+        alias_key
+        for alias_key, aliases in COLOR_ALIASES.items()
+        if any(alias in vehicle_color for alias in aliases)
+    )
+
+
+@lru_cache(maxsize=1024)
+def query_families(search_color: str) -> frozenset[str]:
+    """検索条件の色が指す色系統を解決"""
+    return frozenset(
+        alias_key
+        for alias_key in COLOR_ALIASES
+        if search_color in alias_key or alias_key in search_color
+    )
+
+
+def matches_color(vehicle_color: str, search_color: Optional[str]) -> bool:
+    """色が検索条件にマッチするかチェック（部分一致）
+
+    Args:
+        vehicle_color: 車両の色
+        search_color: 検索条件の色（None の場合は全てマッチ）
+
+    Returns:
+        マッチする場合 True
+    """
+    if not search_color:
+        return True
+
+    # 完全一致・部分一致
+    if search_color in vehicle_color or vehicle_color in search_color:
+        return True
+
+    # エイリアスチェック
+    return not query_families(search_color).isdisjoint(color_families(vehicle_color))
@@ -0,0 +1,184 @@
+"""
+列指向テーブル
+
+件数の多いデータセット（契約・来店履歴・車両）を、レコードごとの dict ではなく
+列ごとの配列で保持する。
+
+    - 整数の列（価格・年式・走行距離など）は array('q')
+    - "YYYY-MM-DD" 形式の日付の列は日付の序数の array('i')
+    - 文字列はインターン（同じ値を 1 つのオブジェクトで共有）
+    - キーの並び（レコードの形）は形ごとに 1 つだけ保持
+
+レコードは参照時に dict へ変換するため、ツールからは従来どおり dict の列として扱える。
+"""
+
+import sys
+from array import array
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+# 日付の序数で None を表す値（date.toordinal() は 1 以上）
+_NULL_DATE = 0
+
+# キーを持たないレコードの位置に入れる値（取得されることはない）
+_MISSING = object()
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+@lru_cache(maxsize=65536)
+def _date_string(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _date_ordinal(value: Any) -> int | None:
+    """正規の "YYYY-MM-DD" 文字列なら日付の序数、それ以外は None"""
+    if not isinstance(value, str) or len(value) != 10:
+        return None
+    try:
+        parsed = date.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed.toordinal() if parsed.isoformat() == value else None
+
+
+def _intern(value: Any) -> Any:
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [_intern(item) for item in value]
+    if isinstance(value, dict):
+        return {sys.intern(key): _intern(item) for key, item in value.items()}
+    return value
+
+
+def _build_column(values: list[Any]) -> tuple[str, Sequence[Any]]:
+    """列の値から (格納形式, 列) を作る
+
+    格納形式: "int"（array('q')）/ "date"（日付の序数の array('i')）/ "object"（list）
+    """
+    present = [value for value in values if value is not _MISSING]
+
+    if all(type(value) is int and _INT64_MIN <= value <= _INT64_MAX for value in present):
+        return "int", array("q", (0 if value is _MISSING else value for value in values))
+
+    # 最初の値が日付でなければ日付の列として扱わない（全件の解析を避ける）
+    first = next((value for value in present if value is not None), None)
+    ordinals = [None]
+    if _date_ordinal(first) is not None:
+        ordinals = [_NULL_DATE if value is _MISSING or value is None else _date_ordinal(value) for value in values]
+    if None not in ordinals:
+        return "date", array("i", ordinals)
+
+    intern = sys.intern
+    return "object", [
+        intern(value) if type(value) is str else None if value is _MISSING else _intern(value)
+        for value in values
+    ]
+
+
+def _getter(kind: str, column: Sequence[Any]) -> Callable[[int], Any]:
+    """列の位置 -> 値の取得関数"""
+    if kind == "date":
+        def get_date(position: int) -> str | None:
+            ordinal = column[position]
+            return _date_string(ordinal) if ordinal != _NULL_DATE else None
+        return get_date
+    return column.__getitem__
+
+
+class ColumnarTable(Sequence[dict[str, Any]]):
+    """dict のレコード列を列指向で保持する読み取り専用のシーケンス
+
+    table[i] は参照のたびに新しい dict を作る。キーの順序・値は元のレコードと同じ。
+    pickle 可能（取得関数は復元時に作り直す）。
+    """
+
+    def __init__(self, records: Iterable[dict[str, Any]]):
+        shape_ids: dict[tuple[str, ...], int] = {}
+        shapes: list[int] = []
+        raw_columns: dict[str, list[Any]] = {}
+        size = 0
+
+        for record in records:
+            keys = tuple(record)
+            shape_id = shape_ids.get(keys)
+            if shape_id is None:
+                shape_id = shape_ids[keys] = len(shape_ids)
+            shapes.append(shape_id)
+            for key, value in record.items():
+                column = raw_columns.get(key)
+                if column is None:
+                    column = raw_columns[key] = [_MISSING] * size
+                column.append(value)
+            size += 1
+            if len(record) != len(raw_columns):
+                for column in raw_columns.values():
+                    if len(column) < size:
+                        column.append(_MISSING)
+
+        self._size = size
+        self._shapes = array("H" if len(shape_ids) <= 0xFFFF else "I", shapes)
+        self._shape_keys = [tuple(sys.intern(key) for key in keys) for keys in shape_ids]
+        self._columns = {key: _build_column(values) for key, values in raw_columns.items()}
+        self._bind()
+
+    def _bind(self) -> None:
+        getters = {key: _getter(kind, column) for key, (kind, column) in self._columns.items()}
+        self._getters = getters
+        # 形ごとの (キー, 取得関数) の並び
+        self._shape_getters = [tuple((key, getters[key]) for key in keys) for keys in self._shape_keys]
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            "size": self._size,
+            "shapes": self._shapes,
+            "shape_keys": self._shape_keys,
+            "columns": self._columns,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self._size = state["size"]
+        self._shapes = state["shapes"]
+        self._shape_keys = state["shape_keys"]
+        self._columns = state["columns"]
+        self._bind()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[index] for index in range(*position.indices(self._size))]
+        if position < 0:
+            position += self._size
+        if not 0 <= position < self._size:
+            raise IndexError("ColumnarTable index out of range")
+        return {key: get(position) for key, get in self._shape_getters[self._shapes[position]]}
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for position in range(self._size):
+            yield self[position]
+
+    def values(self, key: str) -> Iterator[Any]:
+        """列の値を先頭から順に返す（キーのないレコードは None）
+
+        レコードを dict に変換しないため、インデックスの構築などの走査に使う。
+        """
+        get = self._getters.get(key)
+        if get is None:
+            return iter([None] * self._size)
+        has_key = [key in keys for keys in self._shape_keys]
+        if all(has_key):
+            return map(get, range(self._size))
+        shapes = self._shapes
+        return (get(position) if has_key[shapes[position]] else None for position in range(self._size))
+
+
+def column_values(records: Sequence[dict[str, Any]], key: str) -> Iterator[Any]:
+    """レコード列の key の値を先頭から順に返す（キーがない場合は None）"""
+    if isinstance(records, ColumnarTable):
+        return records.values(key)
+    return (record.get(key) for record in records)
@@ -4,7 +4,12 @@
 顧客の契約履歴を取得
 """
 
-from tools import get_contracts as _get_contracts, normalize_customer_id
+from tools import get_contracts_by_customer, normalize_customer_id
+
+# 契約履歴の項目（ツールの fields に指定できる項目）
+CONTRACT_FIELDS = ("id", "vehicle_id", "contract_date", "type", "amount", "status")
+
+
 def get_contracts(customer_id: str) -> list[dict]:
     """顧客IDから契約履歴を取得します
 
@@ -24,19 +29,17 @@ def get_contracts(customer_id: str) -> list[dict]:
             }
         ]
     """
-    contracts = _get_contracts()
     normalized_id = normalize_customer_id(customer_id)
     results = []
 
-    for contract in contracts:
-        if contract["customer_id"] == normalized_id:
-            results.append({
-                "id": contract["id"],
-                "vehicle_id": contract["vehicle_id"],
-                "contract_date": contract["contract_date"],
-                "type": contract["type"],
-                "amount": contract["amount"],
-                "status": contract["status"]
-            })
+    for contract in get_contracts_by_customer(normalized_id):
+        results.append({
+            "id": contract["id"],
+            "vehicle_id": contract["vehicle_id"],
+            "contract_date": contract["contract_date"],
+            "type": contract["type"],
+            "amount": contract["amount"],
+            "status": contract["status"]
+        })
 
     return results
@@ -4,13 +4,23 @@
 顧客の検索と詳細情報取得を提供
 """
 
+import copy
 from typing import Optional
-from tools import get_customers, normalize_customer_id
-def search_customer_by_name(name: str) -> list[dict]:
+from tools import get_customer_by_id, normalize_customer_id, repository
+
+# 名前検索の結果の項目（ツールの fields に指定できる項目）
+SEARCH_FIELDS = ("id", "name", "phone")
+
+
+def search_customer_by_name(name: str, limit: Optional[int] = None) -> list[dict]:
     """顧客名からIDを検索します（部分一致）
 
+    全角/半角・空白の有無・ひらがな/カタカナの違いは無視して照合します。
+    結果は 完全一致 > 前方一致 > 部分一致 の順に並びます。
+
     Args:
-        name: 顧客名（例: "田中"）
+        name: 顧客名（例: "田中", "田中　太郎"）
+        limit: 最大件数（デフォルト: None = 全件）
 
     Returns:
         マッチした顧客のリスト [{id, name, phone}, ...]
@@ -18,16 +28,14 @@ def search_customer_by_name(name: str) -> list[dict]:
     """
     if not name or not str(name).strip():
         return []
-    customers = get_customers()
     results = []
 
-    for customer in customers:
-        if name in customer["name"]:
-            results.append({
-                "id": customer["id"],
-                "name": customer["name"],
-                "phone": customer["phone"]
-            })
+    for customer in repository.search_customers(str(name), limit=limit):
+        results.append({
+            "id": customer["id"],
+            "name": customer["name"],
+            "phone": customer["phone"]
+        })
 
     return results
 
@@ -42,11 +50,9 @@ def get_customer_info(customer_id: str) -> dict:
         顧客の詳細情報
         該当なしの場合は {"error": "Customer not found"}
     """
-    customers = get_customers()
-    normalized_id = normalize_customer_id(customer_id)
-
-    for customer in customers:
-        if customer["id"] == normalized_id:
-            return customer
+    customer = get_customer_by_id(normalize_customer_id(customer_id))
+    if customer is None:
+        return {"error": "Customer not found"}
 
-    return {"error": "Customer not found"}
+    # キャッシュ上のレコードは共有されているためコピーを返す
+    return copy.deepcopy(customer)
@@ -0,0 +1,75 @@
+"""
+顧客360ツール
+
+顧客情報・契約履歴・来店履歴・関連車両を1回の呼び出しでまとめて取得
+"""
+
+from tools import get_contracts_by_customer, get_vehicle_by_id, normalize_customer_id
+from tools.contract import get_contracts
+from tools.customer import get_customer_info
+from tools.visit import get_visit_history
+
+
+def _vehicle_summary(vehicle_id: str) -> dict | None:
+    vehicle = get_vehicle_by_id(vehicle_id)
+    if vehicle is None:
+        return None
+    return {
+        "id": vehicle["id"],
+        "model": vehicle["model"],
+        "type": vehicle["type"],
+        "color": vehicle["color"],
+        "year": vehicle["year"],
+    }
+
+
+def get_customer_360(customer_id: str) -> dict:
+    """顧客IDから顧客の全体像（詳細・契約・来店・関連車両）を取得します
+
+    契約・来店の vehicle_id は車両在庫から車種名（vehicle_model）に解決します。
+    在庫にない車両は契約レコードの車種名（model）を使います（契約がない場合は None）。
+
+    Args:
+        customer_id: 顧客ID（例: "C001"）
+
+    Returns:
+        {
+            "customer": {...顧客の詳細情報...},
+            "contracts": [{..., "vehicle_model": "CX-5"}],
+            "visits": [{..., "vehicle_model": "CX-5"}],
+            "vehicles": [{"id": "V001", "model": "CX-5", "type": "SUV", "color": "ソウルレッド", "year": 2023}]
+        }
+        該当なしの場合は {"error": "Customer not found"}
+    """
+    normalized_id = normalize_customer_id(customer_id)
+    customer = get_customer_info(normalized_id)
+    if "error" in customer:
+        return customer
+
+    contracts = get_contracts(normalized_id)
+    visits = get_visit_history(normalized_id)
+
+    # 契約・来店に登場する車両を出現順に解決
+    vehicles: dict[str, dict | None] = {}
+    for row in contracts + visits:
+        vehicle_id = row.get("vehicle_id")
+        if vehicle_id and vehicle_id not in vehicles:
+            vehicles[vehicle_id] = _vehicle_summary(vehicle_id)
+
+    # 在庫から外れた車両（売却済みなど）は契約レコードの車種名を使う
+    contract_models = {
+        contract["vehicle_id"]: contract["model"]
+        for contract in get_contracts_by_customer(normalized_id)
+        if contract.get("vehicle_id") and contract.get("model")
+    }
+
+    for row in contracts + visits:
+        vehicle = vehicles.get(row.get("vehicle_id"))
+        row["vehicle_model"] = vehicle["model"] if vehicle else contract_models.get(row.get("vehicle_id"))
+
+    return {
+        "customer": customer,
+        "contracts": contracts,
+        "visits": visits,
+        "vehicles": [vehicle for vehicle in vehicles.values() if vehicle is not None],
+    }
@@ -0,0 +1,224 @@
+"""
+JSON リポジトリ
+
+data/*.json をワーカー内にキャッシュし（tools/store.py）、
+読み込み時に構築するインデックスで検索する既定のバックエンド
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Iterable, Optional, Sequence
+
+from tools.colors import color_families, query_families
+from tools.columnar import column_values
+from tools.repository import NAME_FIELDS, DealerRepository
+from tools.store import DealerDataStore
+from tools.text_index import NgramIndex
+
+
+class ServiceSchedule:
+    """サービス予定のインデックス
+
+    各来店レコードの予定日（next_service_date、なければ visit_date）を
+    読み込み時に一度だけ解析し、(日付の序数, レコード番号) を日付順に保持する。
+    期間検索は bisect 2 回とスライスで済み、結果は既に日付順になっている。
+    """
+
+    def __init__(self, records: Sequence[dict[str, Any]]):
+        self.records = records
+        parsed: dict[str, int | None] = {}
+        entries = []
+        dates = zip(column_values(records, "next_service_date"), column_values(records, "visit_date"))
+        for position, (next_service_date, visit_date) in enumerate(dates):
+            scheduled_date_str = next_service_date or visit_date
+            if not scheduled_date_str:
+                continue
+            # 日付の種類は件数に比べて少ないため、解析結果を使い回す
+            try:
+                ordinal = parsed[scheduled_date_str]
+            except KeyError:
+                try:
+                    ordinal = datetime.strptime(scheduled_date_str, "%Y-%m-%d").date().toordinal()
+                except (TypeError, ValueError):
+                    ordinal = None
+                parsed[scheduled_date_str] = ordinal
+            except TypeError:
+                continue
+            if ordinal is not None:
+                entries.append((ordinal, position, scheduled_date_str))
+
+        # 同じ日付は元の並び順を維持
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        self.ordinals = array("i", (entry[0] for entry in entries))
+        self.positions = array("I", (entry[1] for entry in entries))
+        self.dates = [entry[2] for entry in entries]
+
+    def window(self, start_ordinal: int, end_ordinal: int) -> tuple[int, int]:
+        """start〜end（両端含む）に該当する範囲 [lo, hi) を返す"""
+        return bisect_left(self.ordinals, start_ordinal), bisect_right(self.ordinals, end_ordinal)
+
+    def visit(self, index: int) -> dict[str, Any]:
+        """予定日順で index 番目の来店レコード"""
+        return self.records[self.positions[index]]
+
+
+def _bitmap(positions: Iterable[int], size: int) -> int:
+    """レコード番号の集合をビットマップ（int）に変換"""
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _positions(bitmap: int) -> list[int]:
+    """ビットマップから立っているビットの位置を昇順で取得"""
+    bits = format(bitmap, "b")[::-1]
+    positions = []
+    position = bits.find("1")
+    while position != -1:
+        positions.append(position)
+        position = bits.find("1", position + 1)
+    return positions
+
+
+class VehicleIndex:
+    """車両在庫のファセットインデックス
+
+    車種・色・色系統ごとにレコード番号のビットマップを持ち、
+    価格・年式は昇順配列 + bisect で範囲検索する。
+    検索はビットマップの AND（積集合）で行う。
+    """
+
+    def __init__(self, records: Sequence[dict[str, Any]]):
+        self.records = records
+        size = len(records)
+
+        by_type: dict[str, list[int]] = {}
+        by_color: dict[str, list[int]] = {}
+        prices: list[tuple[int, int]] = []
+        years: list[tuple[int, int]] = []
+        columns = zip(
+            column_values(records, "type"),
+            column_values(records, "color"),
+            column_values(records, "price"),
+            column_values(records, "year"),
+        )
+        for position, (vehicle_type, color, price, year) in enumerate(columns):
+            by_type.setdefault(vehicle_type, []).append(position)
+            by_color.setdefault(color or "", []).append(position)
+            if isinstance(price, (int, float)):
+                prices.append((price, position))
+            if isinstance(year, int):
+                years.append((year, position))
+
+        self.size = size
+        self.type_bitmaps = {key: _bitmap(items, size) for key, items in by_type.items()}
+        self.color_bitmaps = {key: _bitmap(items, size) for key, items in by_color.items()}
+
+        # 色系統ビットマップ: 各色をエイリアスで一度だけ解決しておく
+        self.family_bitmaps: dict[str, int] = {}
+        for color, bitmap in self.color_bitmaps.items():
+            for family in color_families(color):
+                self.family_bitmaps[family] = self.family_bitmaps.get(family, 0) | bitmap
+
+        prices.sort()
+        years.sort()
+        self.price_values = [value for value, _ in prices]
+        self.price_positions = [position for _, position in prices]
+        self.year_values = [value for value, _ in years]
+        self.year_positions = [position for _, position in years]
+
+    def _color_bitmap(self, color: str) -> int:
+        bitmap = 0
+        for vehicle_color, color_bitmap in self.color_bitmaps.items():
+            if color in vehicle_color or vehicle_color in color:
+                bitmap |= color_bitmap
+        for family in query_families(color):
+            bitmap |= self.family_bitmaps.get(family, 0)
+        return bitmap
+
+    def _range_bitmap(
+        self, values: list[int], positions: list[int], low: Optional[int], high: Optional[int]
+    ) -> int:
+        start = bisect_left(values, low) if low is not None else 0
+        end = bisect_right(values, high) if high is not None else len(values)
+        return _bitmap(positions[start:end], self.size)
+
+    def query(
+        self,
+        type: str,
+        color: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """条件に合う車両レコードを元の並び順で返す"""
+        bitmap = self.type_bitmaps.get(type, 0)
+        if bitmap and color:
+            bitmap &= self._color_bitmap(color)
+        if bitmap and (min_price is not None or max_price is not None):
+            bitmap &= self._range_bitmap(self.price_values, self.price_positions, min_price, max_price)
+        if bitmap and (min_year is not None or max_year is not None):
+            bitmap &= self._range_bitmap(self.year_values, self.year_positions, min_year, max_year)
+        return [self.records[position] for position in _positions(bitmap)]
+
+
+class JsonRepository(DealerRepository):
+    """data/*.json を参照するリポジトリ
+
+    id・顧客IDのインデックスは tools/__init__.py で、
+    名前検索・サービス予定・車両ファセットのインデックスはここで登録する。
+    """
+
+    def __init__(self, data_store: DealerDataStore):
+        self.data_store = data_store
+        data_store.register_index(
+            "customers.json", "name_ngram", lambda records: NgramIndex(records, NAME_FIELDS)
+        )
+        data_store.register_index("visits.json", "schedule", ServiceSchedule)
+        data_store.register_index("vehicles.json", "facets", VehicleIndex)
+
+    def get_customer(self, customer_id: str) -> dict[str, Any] | None:
+        return self.data_store.index("customers.json", "id").get(customer_id)
+
+    def search_customers(self, name: str, limit: Optional[int] = None) -> list[dict[str, Any]]:
+        index: NgramIndex = self.data_store.index("customers.json", "name_ngram")
+        return index.search(name, limit=limit)
+
+    def get_vehicle(self, vehicle_id: str) -> dict[str, Any] | None:
+        return self.data_store.index("vehicles.json", "id").get(vehicle_id)
+
+    def contracts_by_customer(self, customer_id: str) -> Sequence[dict[str, Any]]:
+        return self.data_store.index("contracts.json", "customer_id").get(customer_id, ())
+
+    def visits_by_customer(self, customer_id: str) -> Sequence[dict[str, Any]]:
+        return self.data_store.index("visits.json", "customer_id").get(customer_id, ())
+
+    def upcoming_services(
+        self, start: date, end: date, offset: int = 0, limit: Optional[int] = None
+    ) -> list[tuple[str, dict[str, Any]]]:
+        schedule: ServiceSchedule = self.data_store.index("visits.json", "schedule")
+        lo, hi = schedule.window(start.toordinal(), end.toordinal())
+        lo += max(offset, 0)
+        if limit is not None:
+            hi = min(hi, lo + max(limit, 0))
+        return [(schedule.dates[position], schedule.visit(position)) for position in range(lo, hi)]
+
+    def count_upcoming_services(self, start: date, end: date) -> int:
+        schedule: ServiceSchedule = self.data_store.index("visits.json", "schedule")
+        lo, hi = schedule.window(start.toordinal(), end.toordinal())
+        return hi - lo
+
+    def search_vehicles(
+        self,
+        type: str,
+        color: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        index: VehicleIndex = self.data_store.index("vehicles.json", "facets")
+        return index.query(type, color, min_price, max_price, min_year, max_year)
@@ -0,0 +1,127 @@
+"""
+ページング・フィールド選択
+
+一覧を返すツールの結果を次の形にそろえる。
+
+    {
+        "items": [...],          # 今回のページ（fields 指定時は指定した項目のみ）
+        "total": 120,            # 条件に合う全件数
+        "has_more": true,        # 続きがあるか
+        "next_cursor": "eyJx..." # 続きを取得するときに cursor に指定する値（続きがなければ null）
+    }
+
+カーソルは検索条件のダイジェストと次の開始位置を base64url で包んだ不透明な文字列で、
+同じ条件・同じデータに対しては常に同じ値になる。別の条件で発行したカーソルは受け付けない。
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Sequence
+
+# limit 省略時の件数
+DEFAULT_PAGE_LIMIT = int(os.getenv("DEALER_PAGE_LIMIT", "20"))
+
+# limit の上限
+MAX_PAGE_LIMIT = int(os.getenv("DEALER_MAX_PAGE_LIMIT", "100"))
+
+
+class PagingError(ValueError):
+    """limit / cursor / fields の指定が不正"""
+
+
+@dataclass(frozen=True)
+class PageRequest:
+    """ページの取得範囲と出力する項目"""
+
+    query_key: str
+    offset: int
+    limit: int
+    fields: Optional[tuple[str, ...]]
+
+
+def _query_key(query: dict[str, Any]) -> str:
+    encoded = json.dumps(query, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(query_key: str, offset: int) -> str:
+    payload = json.dumps({"q": query_key, "o": offset}, separators=(",", ":")).encode("ascii")
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, query_key: str) -> int:
+    """カーソルから開始位置を取り出す（形式不正・条件の不一致は PagingError）"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset = payload["o"]
+        issued_for = payload["q"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise PagingError("Invalid cursor") from None
+    if issued_for != query_key:
+        raise PagingError("Cursor does not match the query")
+    if not isinstance(offset, int) or offset < 0:
+        raise PagingError("Invalid cursor")
+    return offset
+
+
+def parse_fields(fields: Any, available: Sequence[str]) -> Optional[tuple[str, ...]]:
+    """fields（カンマ区切りの文字列またはリスト）を検証して重複を除いた並びを返す"""
+    if fields is None or fields == "" or fields == []:
+        return None
+    names = fields.split(",") if isinstance(fields, str) else fields
+    if not isinstance(names, (list, tuple)):
+        raise PagingError("fields must be a comma-separated string")
+    selected = tuple(dict.fromkeys(str(name).strip() for name in names if str(name).strip()))
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        raise PagingError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(available)})")
+    return selected or None
+
+
+def page_request(
+    query: dict[str, Any],
+    available_fields: Sequence[str],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Any = None,
+    offset: int = 0,
+) -> PageRequest:
+    """ツールの引数からページの取得範囲を決める
+
+    Args:
+        query: 検索条件（ツール名を含め、limit / cursor / fields 以外の引数）
+        available_fields: fields に指定できる項目
+        limit: 件数（省略時は DEFAULT_PAGE_LIMIT、上限は MAX_PAGE_LIMIT）
+        cursor: 前のページの next_cursor
+        fields: 出力する項目
+        offset: cursor がない場合の開始位置
+    """
+    query_key = _query_key(query)
+    start = decode_cursor(cursor, query_key) if cursor else max(offset, 0)
+    size = DEFAULT_PAGE_LIMIT if limit is None else min(max(limit, 1), MAX_PAGE_LIMIT)
+    return PageRequest(query_key, start, size, parse_fields(fields, available_fields))
+
+
+def make_page(request: PageRequest, items: Iterable[dict[str, Any]], total: int) -> dict[str, Any]:
+    """取得済みのページ（request.offset から最大 request.limit 件）を結果の形にする"""
+    if request.fields is not None:
+        items = [{key: item[key] for key in request.fields if key in item} for item in items]
+    else:
+        items = list(items)
+    next_offset = request.offset + len(items)
+    has_more = bool(items) and next_offset < total
+    return {
+        "items": items,
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": encode_cursor(request.query_key, next_offset) if has_more else None,
+    }
+
+
+def paginate(request: PageRequest, rows: Sequence[dict[str, Any]]) -> dict[str, Any]:
+    """全件の結果からページを切り出す"""
+    return make_page(request, rows[request.offset:request.offset + request.limit], len(rows))
@@ -0,0 +1,96 @@
+"""
+データリポジトリ
+
+ツールが参照するデータアクセスのインターフェースと、
+環境変数 DEALER_STORAGE によるバックエンドの選択を提供する
+
+    json   : data/*.json をワーカー内にキャッシュ（既定）
+    sqlite : インデックス・FTS5 付きの SQLite データベース（tools/sqlite_repository.py）
+"""
+
+import os
+from abc import ABC, abstractmethod
+from datetime import date
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from tools.store import DealerDataStore
+
+# ストレージバックエンド（"json" / "sqlite"）
+STORAGE_BACKEND = os.getenv("DEALER_STORAGE", "json").lower()
+
+# SQLite データベースのパス（未設定時はデータディレクトリの dealer.db）
+SQLITE_PATH = os.getenv("DEALER_SQLITE_PATH", "")
+
+# 顧客名検索の対象フィールド（読み仮名があれば併せて索引する）
+NAME_FIELDS = ("name", "name_kana", "kana")
+
+
+class DealerRepository(ABC):
+    """ディーラーデータへの読み取り専用アクセス
+
+    返却するレコードはバックエンドのキャッシュと共有される場合があるため、
+    呼び出し側で変更しないこと。
+    """
+
+    @abstractmethod
+    def get_customer(self, customer_id: str) -> dict[str, Any] | None:
+        """顧客IDから顧客レコードを取得（該当なしは None）"""
+
+    @abstractmethod
+    def search_customers(self, name: str, limit: Optional[int] = None) -> list[dict[str, Any]]:
+        """顧客名の部分一致検索（完全一致 > 前方一致 > 部分一致の順）"""
+
+    @abstractmethod
+    def get_vehicle(self, vehicle_id: str) -> dict[str, Any] | None:
+        """車両IDから車両レコードを取得（該当なしは None）"""
+
+    @abstractmethod
+    def contracts_by_customer(self, customer_id: str) -> Sequence[dict[str, Any]]:
+        """顧客の契約レコード（元の並び順）"""
+
+    @abstractmethod
+    def visits_by_customer(self, customer_id: str) -> Sequence[dict[str, Any]]:
+        """顧客の来店レコード（元の並び順）"""
+
+    @abstractmethod
+    def upcoming_services(
+        self, start: date, end: date, offset: int = 0, limit: Optional[int] = None
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """予定日（next_service_date、なければ visit_date）が start〜end の来店レコード
+
+        Returns:
+            (予定日, 来店レコード) のリスト（予定日順、同日は元の並び順）
+        """
+
+    @abstractmethod
+    def count_upcoming_services(self, start: date, end: date) -> int:
+        """予定日が start〜end の来店レコードの件数（ページングの total 用）"""
+
+    @abstractmethod
+    def search_vehicles(
+        self,
+        type: str,
+        color: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """条件に合う車両レコード（元の並び順）"""
+
+
+def create_repository(data_store: DealerDataStore) -> DealerRepository:
+    """DEALER_STORAGE に応じたリポジトリを作成
+
+    Args:
+        data_store: JSON バックエンドが使用するデータストア
+    """
+    if STORAGE_BACKEND == "sqlite":
+        from tools.sqlite_repository import SqliteRepository
+        return SqliteRepository(Path(SQLITE_PATH) if SQLITE_PATH else data_store.data_dir / "dealer.db")
+    if STORAGE_BACKEND != "json":
+        raise ValueError(f"Unknown DEALER_STORAGE: {STORAGE_BACKEND}")
+
+    from tools.json_repository import JsonRepository
+    return JsonRepository(data_store)
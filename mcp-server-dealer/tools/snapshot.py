@@ -0,0 +1,136 @@
+"""
+ビルド済みスナップショット
+
+data/*.json を読み込み・インデックス構築まで済ませた状態で 1 つのファイルに保存し、
+起動時にそのまま復元する。JSON の解析とインデックス構築を起動時に行わないため、
+コールドスタートがデータ量に左右されにくくなる。
+
+ファイル形式: ヘッダー（マジック + 形式バージョン）の後に pickle（protocol 5）で
+    1. マニフェスト（データセットごとの元ファイルのサイズ・mtime・SHA-256）
+    2. データセットごとの (レコード, インデックス)
+を順に格納する。元の JSON ファイルと一致しないデータセットは読み込まず、
+従来どおり JSON から読み込む（ファイルは信頼できるビルド成果物のみを使用すること）。
+
+作成（mcp-server-dealer ディレクトリで実行）:
+    python -m tools.build_snapshot --output data/snapshot.pickle
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import struct
+import time
+from pathlib import Path
+from typing import Any
+
+from tools.columnar import ColumnarTable
+from tools.store import DealerDataStore
+
+# 対象のデータセット
+DATASETS = ("customers.json", "contracts.json", "visits.json", "vehicles.json")
+
+# ファイル形式のバージョン（レコードの格納形式・インデックスのクラスを変更したら更新する）
+SNAPSHOT_VERSION = 1
+
+_MAGIC = b"DLRSNAP\x00"
+_HEADER = struct.Struct("<8sI")
+
+
+def _file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def build_snapshot(data_store: DealerDataStore, output: Path) -> dict[str, int]:
+    """data_store のデータセットを JSON から読み込み、スナップショットを作成する
+
+    登録済みのインデックス（tools パッケージの読み込み時に登録される）も含めて保存する。
+
+    Args:
+        data_store: インデックスを登録済みのデータストア
+        output: 作成するファイルのパス
+
+    Returns:
+        データセットごとの件数
+    """
+    manifest: dict[str, dict[str, Any]] = {}
+    payloads: list[tuple[Any, dict[str, Any]]] = []
+    for name in DATASETS:
+        data_store.invalidate(name)
+        snapshot = data_store.get(name)
+        if snapshot.version == 0:
+            raise RuntimeError(f"Failed to load data file: {data_store.data_dir / name}")
+        manifest[name] = {
+            "size": snapshot.size,
+            "mtime_ns": snapshot.mtime_ns,
+            "sha256": _file_digest(data_store.data_dir / name),
+            "columnar": isinstance(snapshot.records, ColumnarTable),
+            "count": len(snapshot.records),
+        }
+        payloads.append((snapshot.records, snapshot.indexes))
+
+    tmp_path = output.with_name(output.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, SNAPSHOT_VERSION))
+        pickle.dump(manifest, f, protocol=5)
+        for payload in payloads:
+            pickle.dump(payload, f, protocol=5)
+    os.replace(tmp_path, output)
+    return {name: entry["count"] for name, entry in manifest.items()}
+
+
+def _is_fresh(data_store: DealerDataStore, name: str, entry: dict[str, Any]) -> os.stat_result | None:
+    """スナップショットが元の JSON ファイルと一致すれば、その stat を返す"""
+    file_path = data_store.data_dir / name
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+    if entry["columnar"] != (name in data_store.columnar) or stat.st_size != entry["size"]:
+        return None
+    # デプロイで mtime が変わる場合があるため、mtime が異なるときは内容で比較する
+    if stat.st_mtime_ns != entry["mtime_ns"] and _file_digest(file_path) != entry["sha256"]:
+        return None
+    return stat
+
+
+def load_snapshot(data_store: DealerDataStore, path: Path) -> list[str]:
+    """スナップショットを読み込み、元の JSON と一致するデータセットを data_store に登録する
+
+    ファイルがない・形式が異なる・読み込みに失敗した場合は何もしない（JSON から読み込む）。
+
+    Returns:
+        スナップショットから登録したデータセット名
+    """
+    if not path.exists():
+        return []
+
+    start = time.perf_counter()
+    loaded = []
+    try:
+        with open(path, "rb") as f:
+            magic, version = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != SNAPSHOT_VERSION:
+                logging.warning("Ignoring snapshot with unsupported format: %s (version=%s)", path, version)
+                return []
+            manifest: dict[str, dict[str, Any]] = pickle.load(f)
+            for name, entry in manifest.items():
+                dataset_start = time.perf_counter()
+                records, indexes = pickle.load(f)
+                stat = _is_fresh(data_store, name, entry)
+                if stat is None:
+                    logging.warning("Snapshot is stale for %s; loading from JSON instead", name)
+                    continue
+                data_store.install(
+                    name, records, indexes, stat.st_mtime_ns, stat.st_size, time.perf_counter() - dataset_start
+                )
+                loaded.append(name)
+    except Exception:
+        logging.exception("Failed to load snapshot: %s", path)
+        return loaded
+
+    logging.info(
+        "Loaded snapshot: %s (datasets=%s, elapsed=%.3fs)", path, ",".join(loaded), time.perf_counter() - start
+    )
+    return loaded
@@ -0,0 +1,353 @@
+"""
+SQLite リポジトリ
+
+data/*.json を変換した SQLite データベースを参照するバックエンド。
+全件をメモリに保持せず、顧客ID・予定日・車種のインデックスと
+FTS5（顧客名の N-gram）で検索する。
+
+データベースの作成（mcp-server-dealer ディレクトリで実行）:
+    python -m tools.sqlite_repository --data-dir data --db data/dealer.db
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+from tools.colors import matches_color
+from tools.repository import NAME_FIELDS, DealerRepository
+from tools.store import DEFAULT_CHECK_INTERVAL, _read_json_file
+from tools.text_index import key_grams, match_score, normalize_text, query_grams, record_keys
+
+# スキーマのバージョン（互換性のない変更時に更新し、再インポートを促す）
+SCHEMA_VERSION = 2
+
+# 検索キーの区切り文字
+_KEY_SEPARATOR = "\x1f"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+
+CREATE TABLE customers (seq INTEGER PRIMARY KEY, id TEXT, name_keys TEXT, data TEXT NOT NULL);
+CREATE UNIQUE INDEX customers_id ON customers(id);
+CREATE VIRTUAL TABLE customers_fts USING fts5(grams, tokenize = 'unicode61 remove_diacritics 0');
+
+CREATE TABLE vehicles (
+    seq INTEGER PRIMARY KEY, id TEXT, type TEXT, color TEXT, price REAL, year INTEGER, data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX vehicles_id ON vehicles(id);
+CREATE INDEX vehicles_type_price ON vehicles(type, price);
+CREATE INDEX vehicles_type_year ON vehicles(type, year);
+
+CREATE TABLE contracts (seq INTEGER PRIMARY KEY, id TEXT, customer_id TEXT, vehicle_id TEXT, data TEXT NOT NULL);
+CREATE INDEX contracts_customer_id ON contracts(customer_id, seq);
+
+CREATE TABLE visits (
+    seq INTEGER PRIMARY KEY, id TEXT, customer_id TEXT, vehicle_id TEXT,
+    visit_date TEXT, scheduled_on TEXT, scheduled_date TEXT, data TEXT NOT NULL
+);
+CREATE INDEX visits_customer_id ON visits(customer_id, seq);
+CREATE INDEX visits_visit_date ON visits(visit_date);
+CREATE INDEX visits_scheduled_on ON visits(scheduled_on, seq);
+"""
+
+
+def _dumps(record: dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def _fts_document(keys: Iterable[str]) -> str:
+    """検索キーを FTS5 に格納する文書（1-gram / 2-gram を空白区切り）に変換"""
+    return " ".join(sorted(key_grams(keys)))
+
+
+def _fts_query(query: str) -> str | None:
+    """正規化済みのクエリを FTS5 の MATCH 式（全 gram の AND）に変換
+
+    区切り文字のみの gram は FTS5 のトークンにならないため除外する。
+    有効な gram がない場合は None（全件を候補にする）。
+    """
+    grams = [gram for gram in query_grams(query) if any(ch.isalnum() for ch in gram)]
+    if not grams:
+        return None
+    return " AND ".join('"' + gram.replace('"', '""') + '"' for gram in sorted(grams))
+
+
+def _scheduled(visit: dict[str, Any]) -> tuple[str | None, str | None]:
+    """来店レコードの予定日（ISO 形式, 元の文字列）。解析できない場合は (None, None)"""
+    scheduled_date_str = visit.get("next_service_date") or visit.get("visit_date")
+    if not scheduled_date_str:
+        return None, None
+    try:
+        scheduled_date = datetime.strptime(scheduled_date_str, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None, None
+    return scheduled_date.isoformat(), scheduled_date_str
+
+
+def _text(value: Any) -> str | None:
+    return value if isinstance(value, str) else None
+
+
+def _customer_rows(records: Sequence[dict[str, Any]]) -> Iterator[tuple]:
+    for seq, record in enumerate(records, start=1):
+        keys = record_keys(record, NAME_FIELDS)
+        yield seq, _text(record.get("id")), _KEY_SEPARATOR.join(keys) if keys else None, _dumps(record)
+
+
+def _vehicle_rows(records: Sequence[dict[str, Any]]) -> Iterator[tuple]:
+    for seq, record in enumerate(records, start=1):
+        price = record.get("price")
+        year = record.get("year")
+        yield (
+            seq,
+            _text(record.get("id")),
+            _text(record.get("type")),
+            _text(record.get("color")),
+            price if isinstance(price, (int, float)) else None,
+            year if isinstance(year, int) else None,
+            _dumps(record),
+        )
+
+
+def _contract_rows(records: Sequence[dict[str, Any]]) -> Iterator[tuple]:
+    for seq, record in enumerate(records, start=1):
+        yield seq, record.get("id"), _text(record.get("customer_id")), _text(record.get("vehicle_id")), _dumps(record)
+
+
+def _visit_rows(records: Sequence[dict[str, Any]]) -> Iterator[tuple]:
+    for seq, record in enumerate(records, start=1):
+        scheduled_on, scheduled_date = _scheduled(record)
+        yield (
+            seq,
+            record.get("id"),
+            _text(record.get("customer_id")),
+            _text(record.get("vehicle_id")),
+            _text(record.get("visit_date")),
+            scheduled_on,
+            scheduled_date,
+            _dumps(record),
+        )
+
+
+def import_json(data_dir: Path, db_path: Path) -> dict[str, int]:
+    """data/*.json から SQLite データベースを作成する
+
+    一時ファイルに作成してから置き換えるため、稼働中のサーバーは
+    作成中のデータベースを参照しない。
+
+    Args:
+        data_dir: JSON ファイルのディレクトリ
+        db_path: 作成するデータベースのパス
+
+    Returns:
+        データセットごとの件数
+    """
+    customers = _read_json_file(data_dir / "customers.json")
+    vehicles = _read_json_file(data_dir / "vehicles.json")
+    contracts = _read_json_file(data_dir / "contracts.json")
+    visits = _read_json_file(data_dir / "visits.json")
+
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(SCHEMA)
+        with connection:
+            # id の重複は先勝ち（JSON バックエンドと同じ）
+            connection.executemany("INSERT OR IGNORE INTO customers VALUES (?, ?, ?, ?)", _customer_rows(customers))
+            connection.executemany(
+                "INSERT INTO customers_fts (rowid, grams) VALUES (?, ?)",
+                (
+                    (seq, _fts_document(keys.split(_KEY_SEPARATOR)))
+                    for seq, keys in connection.execute(
+                        "SELECT seq, name_keys FROM customers WHERE name_keys IS NOT NULL"
+                    ).fetchall()
+                ),
+            )
+            connection.executemany("INSERT OR IGNORE INTO vehicles VALUES (?, ?, ?, ?, ?, ?, ?)", _vehicle_rows(vehicles))
+            connection.executemany("INSERT INTO contracts VALUES (?, ?, ?, ?, ?)", _contract_rows(contracts))
+            connection.executemany("INSERT INTO visits VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _visit_rows(visits))
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("schema_version", str(SCHEMA_VERSION)),
+                ("imported_at", datetime.now().isoformat(timespec="seconds")),
+            ])
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    os.replace(tmp_path, db_path)
+
+    return {
+        "customers.json": len(customers),
+        "vehicles.json": len(vehicles),
+        "contracts.json": len(contracts),
+        "visits.json": len(visits),
+    }
+
+
+class SqliteRepository(DealerRepository):
+    """SQLite データベースを参照するリポジトリ
+
+    接続はスレッドごとに読み取り専用で開く。データベースファイルが
+    置き換えられた場合（再インポート）は、更新チェックの間隔ごとに検知して開き直す。
+    """
+
+    def __init__(self, db_path: Path, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.db_path = Path(db_path)
+        self.check_interval = check_interval
+        self._local = threading.local()
+
+    def _file_id(self) -> tuple[int, int]:
+        try:
+            stat = self.db_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"SQLite database not found: {self.db_path} "
+                "(create it with: python -m tools.sqlite_repository --data-dir data --db <path>)"
+            ) from None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        connection.execute("PRAGMA query_only = ON")
+        row = connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row is None or int(row[0]) != SCHEMA_VERSION:
+            connection.close()
+            raise RuntimeError(f"SQLite database schema is outdated, re-import it: {self.db_path}")
+        logging.info("Opened SQLite database: %s", self.db_path)
+        return connection
+
+    def _connection(self) -> sqlite3.Connection:
+        local = self._local
+        connection = getattr(local, "connection", None)
+        now = time.monotonic()
+        if connection is not None and now - local.checked_at < self.check_interval:
+            return connection
+
+        file_id = self._file_id()
+        if connection is None or file_id != local.file_id:
+            if connection is not None:
+                connection.close()
+            connection = local.connection = self._connect()
+            local.file_id = file_id
+        local.checked_at = now
+        return connection
+
+    def _one(self, sql: str, parameters: Sequence[Any]) -> dict[str, Any] | None:
+        row = self._connection().execute(sql, parameters).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _all(self, sql: str, parameters: Sequence[Any]) -> list[dict[str, Any]]:
+        return [json.loads(data) for (data,) in self._connection().execute(sql, parameters)]
+
+    def get_customer(self, customer_id: str) -> dict[str, Any] | None:
+        return self._one("SELECT data FROM customers WHERE id = ?", (customer_id,))
+
+    def search_customers(self, name: str, limit: Optional[int] = None) -> list[dict[str, Any]]:
+        query = normalize_text(name)
+        if not query:
+            return []
+
+        connection = self._connection()
+        match = _fts_query(query)
+        if match is None:
+            rows = connection.execute(
+                "SELECT seq, name_keys, data FROM customers WHERE name_keys IS NOT NULL ORDER BY seq"
+            )
+        else:
+            # FTS5 で全 gram を含む候補に絞り込み、検索キーで部分一致を検証する
+            rows = connection.execute(
+                "SELECT c.seq, c.name_keys, c.data FROM customers_fts f JOIN customers c ON c.seq = f.rowid "
+                "WHERE customers_fts MATCH ? ORDER BY c.seq",
+                (match,),
+            )
+
+        scored = []
+        for seq, keys, data in rows:
+            score = match_score(keys.split(_KEY_SEPARATOR), query)
+            if score is not None:
+                scored.append((score, seq, data))
+        scored.sort()
+        if limit is not None:
+            scored = scored[:max(limit, 0)]
+        return [json.loads(data) for _, _, data in scored]
+
+    def get_vehicle(self, vehicle_id: str) -> dict[str, Any] | None:
+        return self._one("SELECT data FROM vehicles WHERE id = ?", (vehicle_id,))
+
+    def contracts_by_customer(self, customer_id: str) -> Sequence[dict[str, Any]]:
+        return self._all("SELECT data FROM contracts WHERE customer_id = ? ORDER BY seq", (customer_id,))
+
+    def visits_by_customer(self, customer_id: str) -> Sequence[dict[str, Any]]:
+        return self._all("SELECT data FROM visits WHERE customer_id = ? ORDER BY seq", (customer_id,))
+
+    def upcoming_services(
+        self, start: date, end: date, offset: int = 0, limit: Optional[int] = None
+    ) -> list[tuple[str, dict[str, Any]]]:
+        rows = self._connection().execute(
+            "SELECT scheduled_date, data FROM visits WHERE scheduled_on BETWEEN ? AND ? "
+            "ORDER BY scheduled_on, seq LIMIT ? OFFSET ?",
+            (start.isoformat(), end.isoformat(), -1 if limit is None else max(limit, 0), max(offset, 0)),
+        )
+        return [(scheduled_date, json.loads(data)) for scheduled_date, data in rows]
+
+    def count_upcoming_services(self, start: date, end: date) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM visits WHERE scheduled_on BETWEEN ? AND ?",
+            (start.isoformat(), end.isoformat()),
+        ).fetchone()
+        return row[0]
+
+    def search_vehicles(
+        self,
+        type: str,
+        color: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        conditions = ["type = ?"]
+        parameters: list[Any] = [type]
+        for column, operator, value in (
+            ("price", ">=", min_price),
+            ("price", "<=", max_price),
+            ("year", ">=", min_year),
+            ("year", "<=", max_year),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                parameters.append(value)
+
+        rows = self._connection().execute(
+            f"SELECT color, data FROM vehicles WHERE {' AND '.join(conditions)} ORDER BY seq", parameters
+        )
+        # 色はエイリアス（色系統）を含めて照合するため SQL ではなくここで絞り込む
+        return [json.loads(data) for vehicle_color, data in rows if matches_color(vehicle_color or "", color)]
+
+
+def main():
+    from tools import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="data/*.json から SQLite データベースを作成")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="JSON ファイルのディレクトリ")
+    parser.add_argument("--db", default=str(DATA_DIR / "dealer.db"), help="作成するデータベースのパス")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = import_json(Path(args.data_dir), Path(args.db))
+    for name, count in counts.items():
+        print(f"{name}: {count}")
+    print(f"Imported into {args.db} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
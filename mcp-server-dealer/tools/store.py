@@ -0,0 +1,356 @@
+"""
+データストア
+
+data/*.json をワーカープロセス内にキャッシュし、
+ファイルの更新（mtime/サイズの変化）を検知した場合のみ再読み込みする
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Sequence
+
+from tools.columnar import ColumnarTable, column_values
+
+# ファイル更新チェックの最小間隔（秒）。0 の場合は毎回 stat する
+DEFAULT_CHECK_INTERVAL = float(os.getenv("DEALER_DATA_CHECK_INTERVAL", "2.0"))
+
+# 列指向（tools/columnar.py）で保持するかどうか
+COLUMNAR_ENABLED = os.getenv("DEALER_COLUMNAR", "true").lower() == "true"
+
+# レコード列からインデックスを構築する関数
+IndexBuilder = Callable[[Sequence[dict[str, Any]]], Any]
+
+
+@dataclass(frozen=True)
+class LoadEvent:
+    """データセットの読み込み結果（DealerDataStore.add_listener で通知する）"""
+
+    name: str
+    source: str  # "json" / "snapshot"
+    ok: bool
+    reload: bool  # 読み込み済みのスナップショットを置き換えたか
+    records: int = 0
+    parse_seconds: float = 0.0  # JSON の解析・テーブル構築（スナップショットでは復元）
+    index_seconds: float = 0.0
+
+
+LoadListener = Callable[[LoadEvent], None]
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """読み込み済みデータセットの読み取り専用スナップショット
+
+    records はワーカー内で共有されるため、呼び出し側で変更しないこと。
+    列指向で保持するデータセットでは ColumnarTable（参照時に dict を作る）になる。
+    """
+
+    name: str
+    records: Sequence[dict[str, Any]]
+    mtime_ns: int
+    size: int
+    version: int
+    indexes: dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+
+class UniqueIndex:
+    """key の値 -> レコード のインデックス（重複時は先勝ち）
+
+    レコードそのものではなくレコード番号を保持し、取得時に records から引く。
+    """
+
+    def __init__(self, records: Sequence[dict[str, Any]], key: str):
+        positions: dict[Any, int] = {}
+        for position, value in enumerate(column_values(records, key)):
+            if value is not None:
+                positions.setdefault(value, position)
+        self.records = records
+        self.positions = positions
+
+    def get(self, value: Any, default: Any = None) -> Any:
+        position = self.positions.get(value)
+        return default if position is None else self.records[position]
+
+
+class GroupIndex:
+    """key の値 -> レコードのタプル（元の順序を維持）のインデックス
+
+    レコード番号を値ごとに連続させた 1 本の配列と、値 -> (開始位置, 件数) で保持する。
+    """
+
+    def __init__(self, records: Sequence[dict[str, Any]], key: str):
+        groups: dict[Any, list[int]] = {}
+        for position, value in enumerate(column_values(records, key)):
+            if value is not None:
+                groups.setdefault(value, []).append(position)
+
+        order = array("I")
+        spans: dict[Any, tuple[int, int]] = {}
+        for value, positions in groups.items():
+            spans[value] = (len(order), len(positions))
+            order.extend(positions)
+        self.records = records
+        self.order = order
+        self.spans = spans
+
+    def get(self, value: Any, default: Any = ()) -> Any:
+        span = self.spans.get(value)
+        if span is None:
+            return default
+        start, count = span
+        return tuple(self.records[position] for position in self.order[start:start + count])
+
+
+def unique_index(key: str) -> IndexBuilder:
+    """key の値 -> レコード のインデックスを構築する関数を返す（重複時は先勝ち）"""
+    return lambda records: UniqueIndex(records, key)
+
+
+def group_index(key: str) -> IndexBuilder:
+    """key の値 -> レコードのタプル（元の順序を維持）のインデックスを構築する関数を返す"""
+    return lambda records: GroupIndex(records, key)
+
+
+def _read_json_file(file_path: Path) -> list[dict[str, Any]]:
+    """JSONファイルを読み込んでリストとして返す"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"Data file must contain a JSON array: {file_path}")
+    return data
+
+
+class DealerDataStore:
+    """data/*.json のプロセス内キャッシュ
+
+    各データセットはワーカーごとに一度だけ読み込み、以降は
+    ファイルの mtime/サイズが変わった場合にのみ再読み込みする。
+    再読み込みは新しいスナップショットを作成してから差し替えるため、
+    読み込み中のリクエストは常に一貫したデータを参照する。
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        columnar: Iterable[str] = (),
+    ):
+        """
+        Args:
+            data_dir: JSON ファイルのディレクトリ
+            check_interval: ファイル更新チェックの最小間隔（秒）
+            columnar: 列指向で保持するデータセットのファイル名
+        """
+        self.data_dir = Path(data_dir)
+        self.check_interval = check_interval
+        self.columnar = frozenset(columnar)
+        self._snapshots: dict[str, DatasetSnapshot] = {}
+        self._checked_at: dict[str, float] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._builders: dict[str, dict[str, IndexBuilder]] = {}
+        self._version = 0
+        self._listeners: list[LoadListener] = []
+        self._last_loads: dict[str, LoadEvent] = {}
+
+    def add_listener(self, listener: LoadListener) -> None:
+        """データセットの読み込み（再読み込み・失敗を含む）の通知先を登録する
+
+        登録前に読み込まれたデータセットについては、直近の読み込み結果をすぐに通知する。
+        """
+        self._listeners.append(listener)
+        for event in list(self._last_loads.values()):
+            self._call_listener(listener, event)
+
+    def _notify(self, event: LoadEvent) -> None:
+        self._last_loads[event.name] = event
+        for listener in self._listeners:
+            self._call_listener(listener, event)
+
+    @staticmethod
+    def _call_listener(listener: LoadListener, event: LoadEvent) -> None:
+        try:
+            listener(event)
+        except Exception:
+            logging.exception("Data load listener failed: %s", event.name)
+
+    def register_index(self, name: str, index_name: str, builder: IndexBuilder) -> None:
+        """データセットにインデックスを登録する
+
+        インデックスはデータセットの読み込み（再読み込み）時に構築される。
+        登録前に読み込まれていたスナップショットには初回参照時に構築する。
+
+        Args:
+            name: JSONファイル名（例: "contracts.json"）
+            index_name: インデックス名（例: "customer_id"）
+            builder: レコード列からインデックスを構築する関数
+        """
+        self._builders.setdefault(name, {})[index_name] = builder
+
+    def index(self, name: str, index_name: str) -> Any:
+        """現在のスナップショットのインデックスを取得する
+
+        Args:
+            name: JSONファイル名
+            index_name: register_index で登録したインデックス名
+
+        Returns:
+            構築済みのインデックス
+        """
+        snapshot = self.get(name)
+        index = snapshot.indexes.get(index_name)
+        if index is not None:
+            return index
+        builder = self._builders.get(name, {}).get(index_name)
+        if builder is None:
+            raise KeyError(f"Index '{index_name}' is not registered for {name}")
+        with self._lock_for(name):
+            index = snapshot.indexes.get(index_name)
+            if index is None:
+                index = snapshot.indexes[index_name] = builder(snapshot.records)
+            return index
+
+    def _build_indexes(self, name: str, records: Sequence[dict[str, Any]]) -> dict[str, Any]:
+        indexes = {}
+        for index_name, builder in self._builders.get(name, {}).items():
+            indexes[index_name] = builder(records)
+        return indexes
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(name)
+            if lock is None:
+                lock = self._locks[name] = threading.Lock()
+            return lock
+
+    def get(self, name: str) -> DatasetSnapshot:
+        """データセットのスナップショットを取得（必要に応じて再読み込み）
+
+        Args:
+            name: JSONファイル名（例: "customers.json"）
+
+        Returns:
+            現在のスナップショット
+        """
+        snapshot = self._snapshots.get(name)
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at.get(name, 0.0) < self.check_interval:
+            return snapshot
+
+        with self._lock_for(name):
+            # 他スレッドが先に再読み込みしていればそれを使う
+            snapshot = self._snapshots.get(name)
+            if snapshot is not None and now - self._checked_at.get(name, 0.0) < self.check_interval:
+                return snapshot
+            snapshot = self._refresh(name, snapshot)
+            self._checked_at[name] = time.monotonic()
+            return snapshot
+
+    def _refresh(self, name: str, current: DatasetSnapshot | None) -> DatasetSnapshot:
+        file_path = self.data_dir / name
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            logging.error("Data file not found: %s", file_path)
+            return current if current is not None else self._empty(name)
+
+        if current is not None and (current.mtime_ns, current.size) == (stat.st_mtime_ns, stat.st_size):
+            return current
+
+        reload = current is not None and current.version > 0
+        started = time.perf_counter()
+        try:
+            records = _read_json_file(file_path)
+        except Exception:
+            logging.exception("Failed to load data file: %s", file_path)
+            self._notify(LoadEvent(name, "json", ok=False, reload=reload, parse_seconds=time.perf_counter() - started))
+            # 読み込みに失敗した場合は直前のスナップショットを使い続ける
+            return current if current is not None else self._empty(name)
+
+        frozen = ColumnarTable(records) if name in self.columnar else tuple(records)
+        del records
+        parsed = time.perf_counter()
+        try:
+            indexes = self._build_indexes(name, frozen)
+        except Exception:
+            logging.exception("Failed to build indexes for data file: %s", file_path)
+            self._notify(LoadEvent(
+                name, "json", ok=False, reload=reload, records=len(frozen), parse_seconds=parsed - started,
+                index_seconds=time.perf_counter() - parsed,
+            ))
+            return current if current is not None else self._empty(name)
+
+        self._version += 1
+        snapshot = DatasetSnapshot(
+            name=name,
+            records=frozen,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            version=self._version,
+            indexes=indexes,
+        )
+        self._snapshots[name] = snapshot
+        logging.info(
+            "Loaded data file: %s (count=%d, version=%d)", file_path, len(frozen), snapshot.version
+        )
+        self._notify(LoadEvent(
+            name, "json", ok=True, reload=reload, records=len(frozen), parse_seconds=parsed - started,
+            index_seconds=time.perf_counter() - parsed,
+        ))
+        return snapshot
+
+    def _empty(self, name: str) -> DatasetSnapshot:
+        # 空のスナップショットはキャッシュせず、次回アクセス時に再試行する
+        return DatasetSnapshot(name=name, records=(), mtime_ns=-1, size=-1, version=0)
+
+    def invalidate(self, name: str | None = None) -> None:
+        """キャッシュを破棄し、次回アクセス時に強制的に再読み込みさせる
+
+        Args:
+            name: 対象のファイル名（None の場合は全データセット）
+        """
+        names = [name] if name else list(self._snapshots)
+        for target in names:
+            with self._lock_for(target):
+                self._snapshots.pop(target, None)
+                self._checked_at.pop(target, None)
+
+    def install(
+        self,
+        name: str,
+        records: Sequence[dict[str, Any]],
+        indexes: dict[str, Any],
+        mtime_ns: int,
+        size: int,
+        load_seconds: float = 0.0,
+    ) -> DatasetSnapshot:
+        """読み込み済みのレコードとインデックスをスナップショットとして登録する
+
+        ビルド済みスナップショット（tools/snapshot.py）からの起動時に使う。
+        mtime_ns / size は元の JSON ファイルの現在の値を渡すこと（以降の更新検知に使う）。
+        未登録のインデックスは初回参照時に構築される。
+        load_seconds は読み込みにかかった時間（通知にのみ使う）。
+        """
+        with self._lock_for(name):
+            current = self._snapshots.get(name)
+            self._version += 1
+            snapshot = DatasetSnapshot(
+                name=name,
+                records=records,
+                mtime_ns=mtime_ns,
+                size=size,
+                version=self._version,
+                indexes=dict(indexes),
+            )
+            self._snapshots[name] = snapshot
+            self._checked_at[name] = time.monotonic()
+        self._notify(LoadEvent(
+            name, "snapshot", ok=True, reload=current is not None, records=len(records), parse_seconds=load_seconds,
+        ))
+        return snapshot
@@ -0,0 +1,153 @@
+"""
+文字 N-gram 転置インデックス
+
+顧客名などの部分一致検索を、全件走査ではなく
+ポスティングリストの積集合 + 候補の検証で行う
+"""
+
+import re
+import unicodedata
+from typing import Any, Iterable
+
+# ひらがな -> カタカナ（読み仮名の表記ゆれ吸収用）
+_HIRAGANA_TO_KATAKANA = {code: code + 0x60 for code in range(ord("ぁ"), ord("ゖ") + 1)}
+_WHITESPACE = re.compile(r"\s+")
+
+# インデックスに使用する N-gram の長さ
+GRAM_SIZE = 2
+
+
+def normalize_text(value: str) -> str:
+    """検索用に文字列を正規化する
+
+    全角/半角の統一（全角スペース \\u3000 を含む）、空白の除去、
+    英字の小文字化、ひらがなのカタカナ化を行う。
+    例: '田中\\u3000太郎' -> '田中太郎', 'たなか' -> 'タナカ'
+    """
+    if not value:
+        return ""
+    text = unicodedata.normalize("NFKC", str(value))
+    text = _WHITESPACE.sub("", text).lower()
+    return text.translate(_HIRAGANA_TO_KATAKANA)
+
+
+def _grams(text: str, size: int) -> set[str]:
+    if len(text) < size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def record_keys(record: dict[str, Any], fields: Iterable[str]) -> tuple[str, ...]:
+    """レコードの検索キー（fields の正規化済みの値）を取得"""
+    return tuple(
+        normalize_text(record[field])
+        for field in fields
+        if isinstance(record.get(field), str) and record[field]
+    )
+
+
+def key_grams(keys: Iterable[str]) -> set[str]:
+    """検索キーを索引する gram（1-gram と 2-gram）"""
+    grams: set[str] = set()
+    for key in keys:
+        grams.update(key)
+        grams.update(_grams(key, GRAM_SIZE))
+    return grams
+
+
+def query_grams(query: str) -> set[str]:
+    """正規化済みのクエリが含むべき gram（候補の絞り込み用）"""
+    return _grams(query, GRAM_SIZE) if len(query) >= GRAM_SIZE else {query}
+
+
+def match_score(keys: Iterable[str], query: str) -> tuple[int, int] | None:
+    """正規化済みのクエリに対するスコア（小さいほど上位、マッチしない場合は None）
+
+    順位: 完全一致 (0) > 前方一致 (1) > 部分一致 (2)。同順位はキーが短い順。
+    """
+    best = None
+    for key in keys:
+        if key == query:
+            rank = 0
+        elif key.startswith(query):
+            rank = 1
+        elif query in key:
+            rank = 2
+        else:
+            continue
+        score = (rank, len(key))
+        if best is None or score < best:
+            best = score
+    return best
+
+
+class NgramIndex:
+    """文字 N-gram 転置インデックス
+
+    各レコードの検索キー（正規化済み）を 1-gram / 2-gram に分解し、
+    gram -> レコード番号の昇順リスト を保持する。
+    検索時はクエリの gram のポスティングリストを短い順に積集合し、
+    残った候補のみ部分一致を検証する。
+    """
+
+    def __init__(self, records: Iterable[dict[str, Any]], fields: Iterable[str]):
+        self.fields = tuple(fields)
+        self.records: list[dict[str, Any]] = []
+        self.keys: list[tuple[str, ...]] = []
+        postings: dict[str, list[int]] = {}
+
+        for record in records:
+            keys = record_keys(record, self.fields)
+            if not keys:
+                continue
+            position = len(self.records)
+            self.records.append(record)
+            self.keys.append(keys)
+
+            for gram in key_grams(keys):
+                postings.setdefault(gram, []).append(position)
+
+        self.postings = postings
+
+    def _candidates(self, query: str) -> list[int]:
+        lists = []
+        for gram in query_grams(query):
+            posting = self.postings.get(gram)
+            if not posting:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return sorted(candidates)
+
+    def search(self, query: str, limit: int | None = None) -> list[dict[str, Any]]:
+        """部分一致するレコードをランキング順に返す
+
+        ランキング: 完全一致 > 前方一致 > 部分一致。同順位はキーが短い順、元の並び順。
+
+        Args:
+            query: 検索文字列（正規化前）
+            limit: 最大件数（None の場合は全件）
+
+        Returns:
+            マッチしたレコードのリスト
+        """
+        normalized = normalize_text(query)
+        if not normalized:
+            return []
+
+        scored = []
+        for position in self._candidates(normalized):
+            score = match_score(self.keys[position], normalized)
+            if score is not None:
+                scored.append((score, position))
+
+        scored.sort()
+        if limit is not None:
+            scored = scored[:max(limit, 0)]
+        return [self.records[position] for _, position in scored]
@@ -4,8 +4,15 @@
 来店履歴とサービス予定の取得
 """
 
-from datetime import datetime, timedelta
-from tools import get_visits, get_customers, normalize_customer_id
+from datetime import date, datetime, timedelta
+from typing import Optional
+from tools import get_customer_by_id, get_visits_by_customer, normalize_customer_id, repository
+
+# 来店履歴・サービス予定の項目（ツールの fields に指定できる項目）
+VISIT_FIELDS = ("id", "visit_date", "type", "vehicle_id", "notes")
+UPCOMING_SERVICE_FIELDS = ("customer_id", "customer_name", "scheduled_date", "type", "vehicle_id")
+
+
 def get_visit_history(customer_id: str) -> list[dict]:
     """顧客IDから来店履歴を取得します
 
@@ -24,28 +31,33 @@ def get_visit_history(customer_id: str) -> list[dict]:
             }
         ]
     """
-    visits = get_visits()
     normalized_id = normalize_customer_id(customer_id)
     results = []
 
-    for visit in visits:
-        if visit["customer_id"] == normalized_id:
-            results.append({
-                "id": visit["id"],
-                "visit_date": visit["visit_date"],
-                "type": visit["type"],
-                "vehicle_id": visit["vehicle_id"],
-                "notes": visit.get("notes", "")
-            })
+    for visit in get_visits_by_customer(normalized_id):
+        results.append({
+            "id": visit["id"],
+            "visit_date": visit["visit_date"],
+            "type": visit["type"],
+            "vehicle_id": visit["vehicle_id"],
+            "notes": visit.get("notes", "")
+        })
 
     return results
 
 
-def get_upcoming_services(days: int = 30) -> list[dict]:
+def _service_window(days: int) -> tuple[date, date]:
+    today = datetime.now().date()
+    return today, today + timedelta(days=days)
+
+
+def get_upcoming_services(days: int = 30, offset: int = 0, limit: Optional[int] = None) -> list[dict]:
     """今後のサービス予定一覧を取得します
 
     Args:
         days: 何日先まで検索するか（デフォルト: 30）
+        offset: 先頭から読み飛ばす件数（デフォルト: 0）
+        limit: 最大件数（None の場合は全件）
 
     Returns:
         サービス予定のリスト
@@ -59,37 +71,22 @@ def get_upcoming_services(days: int = 30) -> list[dict]:
             }
         ]
     """
-    visits = get_visits()
-    customers = get_customers()
+    today, end_date = _service_window(days)
 
-    # 顧客IDから名前へのマッピング
-    customer_names = {c["id"]: c["name"] for c in customers}
-
-    today = datetime.now().date()
-    end_date = today + timedelta(days=days)
     results = []
-
-    for visit in visits:
-        # next_service_date がある場合はそれを使用、なければ visit_date を確認
-        scheduled_date_str = visit.get("next_service_date") or visit.get("visit_date")
-        if not scheduled_date_str:
-            continue
-
-        try:
-            scheduled_date = datetime.strptime(scheduled_date_str, "%Y-%m-%d").date()
-        except ValueError:
-            continue
-
-        if today <= scheduled_date <= end_date:
-            results.append({
-                "customer_id": visit["customer_id"],
-                "customer_name": customer_names.get(visit["customer_id"], "不明"),
-                "scheduled_date": scheduled_date_str,
-                "type": visit["type"],
-                "vehicle_id": visit["vehicle_id"]
-            })
-
-    # 日付でソート
-    results.sort(key=lambda x: x["scheduled_date"])
+    for scheduled_date, visit in repository.upcoming_services(today, end_date, offset, limit):
+        customer = get_customer_by_id(visit["customer_id"])
+        results.append({
+            "customer_id": visit["customer_id"],
+            "customer_name": customer["name"] if customer else "不明",
+            "scheduled_date": scheduled_date,
+            "type": visit["type"],
+            "vehicle_id": visit["vehicle_id"]
+        })
 
     return results
+
+
+def count_upcoming_services(days: int = 30) -> int:
+    """get_upcoming_services の全件数（offset / limit を指定しない場合の件数）"""
+    return repository.count_upcoming_services(*_service_window(days))
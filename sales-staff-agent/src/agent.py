@@ -7,16 +7,30 @@ MCPツールと連携して顧客情報・契約履歴・来店履歴・車両
 import os
 from agent_framework import ChatAgent, MCPStreamableHTTPTool
 from agent_framework.azure import AzureOpenAIResponsesClient
+from azure.core.credentials import TokenCredential
 from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 
+from tool_cache import ToolResultCache
+from tracing import LatencyMiddleware, TracedMCPStreamableHTTPTool, create_http_client
+
 # 環境変数の読み込み
 load_dotenv()
 
 # 環境変数から設定を取得
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "")
 MODEL_DEPLOYMENT_NAME = os.getenv("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-4o")
+# APIキー（ベンチマーク用のモックLLMなど。未設定時は DefaultAzureCredential を使用）
+AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY", "")
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:7071/runtime/webhooks/mcp")
+# Azure OpenAI のトークンのスコープ（AzureOpenAIResponsesClient の既定値と同じ）
+AZURE_OPENAI_TOKEN_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# ツール結果キャッシュ（再接続やセッションをまたいで共有）
+tool_result_cache = ToolResultCache()
+
+# MCP の HTTP クライアント（再接続をまたいで共有し、tools/call にトレースヘッダーを付ける）
+mcp_http_client = create_http_client()
 
 # システムプロンプト
 SYSTEM_INSTRUCTIONS = """
@@ -35,6 +49,7 @@ SYSTEM_INSTRUCTIONS = """
 - `get_customer_info`: 顧客IDから詳細情報を取得
 - `get_contracts`: 顧客の契約履歴を取得
 - `get_visit_history`: 顧客の来店履歴を取得
+- `get_customer_360`: 顧客の詳細・契約履歴・来店履歴・関連車両をまとめて取得
 - `search_vehicles`: 車種・色で車両在庫を検索（色は部分一致対応）
 - `get_upcoming_services`: 今後のサービス予定を取得
 
@@ -42,9 +57,11 @@ SYSTEM_INSTRUCTIONS = """
 
 - 顧客名の問い合わせは **必ず** `search_customer_by_name` で候補を取得してから対応する。
 - `search_customer_by_name` の結果に含まれる `id` を **文字列のまま正確に使用**する（改変しない）。
-- 候補が複数ある場合は **一覧を提示して選択を求め**、不確実な状態で `get_customer_info` / `get_contracts` / `get_visit_history` を呼び出さない。
+- 候補が複数ある場合は **一覧を提示して選択を求め**、不確実な状態で `get_customer_info` / `get_contracts` / `get_visit_history` / `get_customer_360` を呼び出さない。
 - 候補が 0 件なら「該当なし」と回答し、憶測で情報を作らない。
 - ユーザー入力に `C001` のようなIDが含まれている場合は、そのIDを使って該当ツールを呼ぶ。
+- 顧客の詳細・契約・来店のうち複数が必要な場合は、個別のツールを順に呼ばず `get_customer_360` を1回だけ呼ぶ。
+- 一覧を返すツール（`search_customer_by_name` / `get_contracts` / `get_visit_history` / `get_upcoming_services` / `search_vehicles`）の結果は `items`（今回取得した行）・`total`（全件数）・`has_more`・`next_cursor` の形式。件数は `total` で伝え、続きが必要な場合のみ `next_cursor` を `cursor` に指定して再度呼ぶ。必要な項目が限られる場合は `fields` を指定する。
 - ツールから `error` が返っている場合は、その内容をそのまま伝え、再確認を依頼する。
 - ツールを呼び出さずに推測で回答しない。必ずツール結果に基づいて回答する。
 
@@ -52,29 +69,43 @@ SYSTEM_INSTRUCTIONS = """
 """
 
 
-def create_agent() -> ChatAgent:
-    """エージェントを作成"""
-    credential = DefaultAzureCredential()
+def create_agent(credential: TokenCredential | None = None) -> ChatAgent:
+    """エージェントを作成
+
+    Entra ID 認証ではクライアントの作成時にトークンを取得するため、同期的に待機する
+    （イベントループ上では asyncio.to_thread などで呼び出すこと）。
+
+    Args:
+        credential: Azure OpenAI の認証に使う資格情報（省略時は DefaultAzureCredential を作成）
+    """
+    if AZURE_OPENAI_API_KEY:
+        auth = {"api_key": AZURE_OPENAI_API_KEY}
+    else:
+        auth = {"credential": credential or DefaultAzureCredential()}
 
     # Azure OpenAI Responses Clientでエージェント作成
     agent = AzureOpenAIResponsesClient(
         endpoint=AZURE_OPENAI_ENDPOINT,
         deployment_name=MODEL_DEPLOYMENT_NAME,
-        credential=credential,
+        **auth,
     ).as_agent(
         name="SalesStaffAgent",
         instructions=SYSTEM_INSTRUCTIONS,
+        # LLM 呼び出しの時間をターンのレイテンシ内訳（モデル時間）に記録
+        middleware=[LatencyMiddleware()],
     )
 
     return agent
 
 
 def create_mcp_tool() -> MCPStreamableHTTPTool:
-    """MCPツールを作成"""
-    return MCPStreamableHTTPTool(
+    """MCPツールを作成（読み取り系ツールの結果はキャッシュし、呼び出しにはトレースコンテキストを付ける）"""
+    return TracedMCPStreamableHTTPTool(
         name="dealer-backend",
         url=MCP_SERVER_URL,
+        http_client=mcp_http_client,
         # Azure Functions MCPサーバーはツールのみサポート
         load_prompts=False,
         load_resources=False,
+        cache=tool_result_cache,
     )
@@ -5,8 +5,9 @@ azure-ai-agentserver-core の FoundryCBAgent を継承して
 localhost:8088 で Foundry Responses API 互換の HTTP サーバーを起動
 """
 
+import asyncio
 import os
-from typing import AsyncGenerator, Union
+from typing import AsyncGenerator, Callable, Union
 from dotenv import load_dotenv
 
 # 環境変数の読み込み
@@ -22,28 +23,122 @@ enable_instrumentation(
 from azure.ai.agentserver.core import FoundryCBAgent, AgentRunContext
 from azure.ai.agentserver.core.models.projects import Response, ResponseStreamEvent
 from azure.identity import DefaultAzureCredential
+from starlette.responses import JSONResponse
 
 # srcディレクトリをパスに追加
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from agent import create_agent, create_mcp_tool
+from agent import AZURE_OPENAI_API_KEY, AZURE_OPENAI_TOKEN_SCOPE, create_agent, create_mcp_tool, mcp_http_client
+from agent_framework import ChatMessage
+from conversation import (
+    ConversationState,
+    ConversationStore,
+    conversation_key,
+    input_messages,
+    message_role,
+    message_text,
+    save_key,
+)
+from mcp_session import MCPSessionManager
+from router import match_route, run_route
+from streaming import stream_response, stream_text, wants_stream
+from tracing import TurnTimer, finish_turn, resume_turn, start_turn
+from warmup import WARMUP_ENABLED, WarmUp
 
 
 class SalesStaffAgent(FoundryCBAgent):
     """販売店スタッフエージェント - Hosted Agent実装"""
 
     def __init__(self):
-        super().__init__(credentials=DefaultAzureCredential())
+        # 資格情報はエージェント（Azure OpenAI）と共有し、探索・トークン取得を1回で済ませる
+        self.credential = DefaultAzureCredential()
+        super().__init__(credentials=self.credential)
         self.agent = None
-        self.mcp_tool = None
+        self._init_lock = asyncio.Lock()
+        # MCP接続はリクエストをまたいで再利用する
+        self.mcp_session = MCPSessionManager(create_mcp_tool)
+        # 会話ごとの履歴（フォローアップ質問で顧客検索をやり直さないため）
+        self.conversations = ConversationStore()
+        # 起動時の初期化（完了するまで /readiness は 503）
+        self.warmup = WarmUp([
+            ("credential", self._prefetch_token),
+            ("agent", self._ensure_initialized),
+            ("mcp", self._open_mcp_session),
+        ])
+
+        # サーバー起動時にウォームアップを開始し、終了時にMCP接続を閉じる
+        app = getattr(self, "app", None)
+        router = getattr(app, "router", None)
+        if router is not None and hasattr(router, "on_startup"):
+            router.on_startup.append(self._start_warmup)
+        if router is not None and hasattr(router, "on_shutdown"):
+            router.on_shutdown.append(self.aclose)
+
+    async def _start_warmup(self):
+        if WARMUP_ENABLED:
+            self.warmup.start()
+        else:
+            self.warmup.skip()
+
+    async def _prefetch_token(self) -> bool:
+        """資格情報の探索と Azure OpenAI のトークン取得（APIキー使用時は省略）"""
+        if AZURE_OPENAI_API_KEY:
+            return False
+        await asyncio.to_thread(self.credential.get_token, AZURE_OPENAI_TOKEN_SCOPE)
+        return True
+
+    async def _open_mcp_session(self):
+        """MCPセッションの確立と tools/list"""
+        tool = await self.mcp_session.acquire()
+        if not getattr(tool, "functions", None):
+            raise RuntimeError("MCP server returned no tools")
 
     async def _ensure_initialized(self):
-        """エージェントとMCPツールの遅延初期化"""
-        if self.agent is None:
-            self.agent = create_agent()
-            self.mcp_tool = create_mcp_tool()
+        """エージェントの初期化（ウォームアップ前のリクエストではリクエスト内で行う）"""
+        if self.agent is not None:
+            return
+        async with self._init_lock:
+            if self.agent is None:
+                # クライアントの作成時にトークンを取得するため、イベントループを止めないようスレッドで実行
+                self.agent = await asyncio.to_thread(create_agent, self.credential)
+
+    async def agent_readiness(self, request):
+        """ウォームアップが完了するまで 503 を返す"""
+        return JSONResponse(self.warmup.status(), status_code=200 if self.warmup.ready else 503)
+
+    async def aclose(self):
+        """ウォームアップを止め、MCP接続を閉じる"""
+        await self.warmup.stop()
+        await self.mcp_session.close()
+        await mcp_http_client.aclose()
+
+    async def _stream_run(
+        self,
+        context: AgentRunContext,
+        messages: list[ChatMessage],
+        on_complete: Callable[[str], None],
+        turn: TurnTimer,
+    ) -> AsyncGenerator[ResponseStreamEvent, None]:
+        """エージェントをストリーミング実行し、テキスト差分とツール呼び出しを逐次送出"""
+        # ストリームは agent_run から戻った後に応答側で読み出されるため、計測先を引き継ぐ
+        resume_turn(turn)
+
+        async def updates():
+            # 接続エラーも failed イベントとして返せるよう、ストリーム内で接続を取得する
+            tool = await self.mcp_session.acquire()
+            async for update in self.agent.run_stream(messages, tools=[tool]):
+                yield update
+
+        try:
+            async for event in stream_response(
+                context, updates(), on_complete=on_complete, metadata=lambda: finish_turn(turn)
+            ):
+                yield event
+        except Exception:
+            # エラーは failed の完了イベントとして送出済み。次回取得時に死活確認する
+            self.mcp_session.mark_suspect()
 
     async def agent_run(
         self, context: AgentRunContext
@@ -56,28 +151,21 @@ class SalesStaffAgent(FoundryCBAgent):
 
         Returns:
             Response または ResponseStreamEvent のストリーム
+            （metadata にレイテンシの内訳 latency_*_ms・呼び出し回数・trace_id を付ける）
         """
+        turn = start_turn()
         await self._ensure_initialized()
 
         # 入力メッセージを取得
-        messages = context.input_messages or []
+        messages = input_messages(context)
 
         # 最後のユーザーメッセージを取得
-        user_message = ""
-        for msg in reversed(messages):
-            if hasattr(msg, 'role') and msg.role == "user":
-                if hasattr(msg, 'content'):
-                    content = msg.content
-                    if isinstance(content, str):
-                        user_message = content
-                    elif isinstance(content, list) and len(content) > 0:
-                        # content が TextContent のリストの場合
-                        first_content = content[0]
-                        if hasattr(first_content, 'text'):
-                            user_message = first_content.text
-                        elif isinstance(first_content, dict) and 'text' in first_content:
-                            user_message = first_content['text']
+        user_index = -1
+        for index in range(len(messages) - 1, -1, -1):
+            if message_role(messages[index]) == "user":
+                user_index = index
                 break
+        user_message = message_text(messages[user_index]) if user_index >= 0 else ""
 
         if not user_message:
             return Response(
@@ -87,23 +175,72 @@ class SalesStaffAgent(FoundryCBAgent):
                 status="completed"
             )
 
-        try:
-            # MCPツールをコンテキストマネージャーとして使用
-            async with self.mcp_tool as tool:
-                result = await self.agent.run(user_message, tools=[tool])
+        # 会話履歴を復元（なければクライアントが送ってきた過去メッセージから作る）
+        stored = self.conversations.get(conversation_key(context))
+        if stored is not None:
+            state = stored.copy()
+        else:
+            state = ConversationState()
+            for msg in messages[:user_index]:
+                role = message_role(msg)
+                if role in ("user", "assistant"):
+                    state.add_turn(role, message_text(msg))
+            state.trim()
+        agent_messages = state.to_messages(user_message)
+
+        def remember(reply: str) -> None:
+            state.add_turn("user", user_message)
+            state.add_turn("assistant", reply)
+            self.conversations.put(save_key(context), state)
 
+        # 定型的な問い合わせは LLM を介さずにツールを直接呼び出して回答
+        route = match_route(user_message)
+        if route is not None:
+            try:
+                text = await run_route(route, await self.mcp_session.acquire())
+            except Exception:
+                text = None
+            if text is not None:
+                remember(text)
+                if wants_stream(context):
+                    return stream_text(context, text, metadata=finish_turn(turn))
                 return Response(
                     id=context.response_id or "response",
                     output=[],
-                    output_text=result.text,
-                    status="completed"
+                    output_text=text,
+                    status="completed",
+                    metadata=finish_turn(turn),
                 )
+
+        # ストリーミング要求時はトークン単位で返す
+        if wants_stream(context):
+            return self._stream_run(context, agent_messages, remember, turn)
+
+        try:
+            # 接続済みのMCPツールを再利用（接続・tools/list はリクエストごとに行わない）
+            tool = await self.mcp_session.acquire()
+            try:
+                result = await self.agent.run(agent_messages, tools=[tool])
+            except Exception:
+                # 接続が壊れている可能性があるため次回取得時に死活確認する
+                self.mcp_session.mark_suspect()
+                raise
+
+            remember(result.text)
+            return Response(
+                id=context.response_id or "response",
+                output=[],
+                output_text=result.text,
+                status="completed",
+                metadata=finish_turn(turn),
+            )
         except Exception as e:
             return Response(
                 id=context.response_id or "error",
                 output=[],
                 output_text=f"エラーが発生しました: {str(e)}",
-                status="failed"
+                status="failed",
+                metadata=finish_turn(turn),
             )
 
 
@@ -116,6 +253,7 @@ def main():
     print("\nEndpoints:")
     print("  POST http://localhost:8088/responses - Send messages")
     print("  GET  http://localhost:8088/liveness  - Health check")
+    print("  GET  http://localhost:8088/readiness - Readiness (503 until warm-up completes)")
     print("\nPress Ctrl+C to stop\n")
 
     agent = SalesStaffAgent()
@@ -0,0 +1,171 @@
+"""
+会話状態管理
+
+会話（conversation_id / previous_response_id）ごとの履歴をメモリに保持し、
+フォローアップ質問（「その人の契約は？」など）で顧客検索をやり直さずに済むようにする。
+履歴は LRU + TTL で保持し、トークン予算を超えた古いターンから切り詰める。
+"""
+
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from agent_framework import ChatMessage
+
+# 保持する会話数の上限
+MAX_CONVERSATIONS = int(os.getenv("CONVERSATION_MAX_ENTRIES", "1000"))
+
+# 会話状態の有効期限（秒）
+CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL_SECONDS", "1800"))
+
+# 履歴として渡すトークン数の上限（概算）
+HISTORY_TOKEN_BUDGET = int(os.getenv("CONVERSATION_HISTORY_TOKENS", "2000"))
+
+# 顧客IDのパターン（mcp-server-dealer の normalize_customer_id と同じ形式）
+CUSTOMER_ID_PATTERN = re.compile(r"C\d{3,}", re.IGNORECASE)
+
+
+def input_messages(context: Any) -> list[Any]:
+    """リクエストの入力メッセージ
+
+    context.input_messages がない agentserver では、リクエストの input（文字列・メッセージの配列・
+    {"messages": [...]}）から {"role", "content"} のリストを作る。
+    """
+    messages = getattr(context, "input_messages", None)
+    if messages is not None:
+        return list(messages)
+    request = getattr(context, "request", None) or {}
+    value = request.get("input") if isinstance(request, dict) else None
+    if isinstance(value, dict):
+        value = value.get("messages")
+    if isinstance(value, str):
+        return [{"role": "user", "content": value}]
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, dict) and "role" in item]
+    return []
+
+
+def message_text(msg: Any) -> str:
+    """入力メッセージからテキストを取り出す"""
+    content = getattr(msg, "content", None)
+    if content is None and isinstance(msg, dict):
+        content = msg.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list) and len(content) > 0:
+        # content が TextContent のリストの場合
+        first_content = content[0]
+        if hasattr(first_content, "text"):
+            return first_content.text
+        if isinstance(first_content, dict) and "text" in first_content:
+            return first_content["text"]
+    return ""
+
+
+def message_role(msg: Any) -> str:
+    """入力メッセージのロール（"user" / "assistant" など）を取り出す"""
+    role = getattr(msg, "role", None)
+    if role is None and isinstance(msg, dict):
+        role = msg.get("role")
+    # Enum の場合は値を使う
+    return str(getattr(role, "value", role) or "")
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（日本語は概ね1文字1トークン）"""
+    return len(text)
+
+
+@dataclass
+class ConversationState:
+    """1会話分の状態"""
+
+    turns: list[tuple[str, str]] = field(default_factory=list)
+    customer_ids: list[str] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def copy(self) -> "ConversationState":
+        return ConversationState(turns=list(self.turns), customer_ids=list(self.customer_ids))
+
+    def add_turn(self, role: str, text: str) -> None:
+        if not text:
+            return
+        self.turns.append((role, text))
+        for match in CUSTOMER_ID_PATTERN.findall(text):
+            customer_id = match.upper()
+            if customer_id in self.customer_ids:
+                self.customer_ids.remove(customer_id)
+            self.customer_ids.append(customer_id)
+        self.updated_at = time.monotonic()
+
+    def trim(self, budget: int = HISTORY_TOKEN_BUDGET) -> None:
+        """トークン予算に収まるよう古いターンから削除"""
+        total = sum(estimate_tokens(text) for _, text in self.turns)
+        while self.turns and total > budget:
+            _, text = self.turns.pop(0)
+            total -= estimate_tokens(text)
+
+    def to_messages(self, user_message: str) -> list[ChatMessage]:
+        """エージェントに渡すメッセージ列（確認済みID + 履歴 + 今回の入力）を作成"""
+        messages = []
+        if self.customer_ids:
+            messages.append(ChatMessage(
+                role="system",
+                text=(
+                    "この会話で既に確認済みの顧客ID: "
+                    + ", ".join(self.customer_ids[-5:])
+                    + "。ユーザーが同じ顧客を指している場合は検索をやり直さずにこのIDを使うこと。"
+                ),
+            ))
+        messages.extend(ChatMessage(role=role, text=text) for role, text in self.turns)
+        messages.append(ChatMessage(role="user", text=user_message))
+        return messages
+
+
+class ConversationStore:
+    """会話状態の LRU + TTL ストア"""
+
+    def __init__(self, max_entries: int = MAX_CONVERSATIONS, ttl: float = CONVERSATION_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._states: OrderedDict[str, ConversationState] = OrderedDict()
+
+    def get(self, key: str | None) -> ConversationState | None:
+        if not key:
+            return None
+        state = self._states.get(key)
+        if state is None:
+            return None
+        if time.monotonic() - state.updated_at > self.ttl:
+            del self._states[key]
+            return None
+        self._states.move_to_end(key)
+        return state
+
+    def put(self, key: str | None, state: ConversationState) -> None:
+        if not key:
+            return
+        state.trim()
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+
+
+def conversation_key(context: Any) -> str | None:
+    """リクエストの継続元となる会話のキー（conversation_id または previous_response_id）"""
+    conversation_id = getattr(context, "conversation_id", None)
+    if conversation_id:
+        return conversation_id
+    request = getattr(context, "request", None) or {}
+    if isinstance(request, dict):
+        return request.get("previous_response_id") or None
+    return None
+
+
+def save_key(context: Any) -> str | None:
+    """今回のターンを保存するキー（conversation_id がなければ response_id で連鎖させる）"""
+    return getattr(context, "conversation_id", None) or getattr(context, "response_id", None)
@@ -17,6 +17,7 @@ from agent_framework.observability import enable_instrumentation
 enable_instrumentation(enable_sensitive_data=True)
 
 from agent import create_agent, create_mcp_tool
+from tracing import finish_turn, start_turn
 
 
 async def main():
@@ -49,8 +50,14 @@ async def main():
 
             try:
                 print("Agent: ", end="", flush=True)
+                turn = start_turn()
                 result = await agent.run(user_input, tools=[mcp_tool])
                 print(result.text)
+                latency = finish_turn(turn)
+                print(
+                    f"  ({latency['latency_total_ms']}ms: モデル {latency['latency_model_ms']}ms"
+                    f" / ツール {latency['latency_tool_ms']}ms / その他 {latency['latency_overhead_ms']}ms)"
+                )
                 print()
             except Exception as e:
                 print(f"\nエラーが発生しました: {e}\n")
@@ -0,0 +1,146 @@
+"""
+MCPセッション管理
+
+MCPStreamableHTTPTool の接続をエージェントの寿命にわたって保持し、
+リクエストごとの接続確立・tools/list を省く。
+接続断を検知した場合は次回取得時に自動で再接続する。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable
+
+from agent_framework import MCPStreamableHTTPTool
+
+logger = logging.getLogger(__name__)
+
+# ヘルスチェック（ping）の最小間隔（秒）
+HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+
+# ping のタイムアウト（秒）
+HEALTH_CHECK_TIMEOUT = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT", "5"))
+
+
+class MCPSessionManager:
+    """長寿命のMCP接続を管理する
+
+    acquire() は接続済みのツールを返す。一定間隔ごと、または
+    リクエスト処理中にエラーが起きた後（mark_suspect()）に ping で
+    死活確認し、応答がなければ接続を張り直す。
+
+    MCPクライアントの接続（anyio の cancel scope・タスクグループ）は開いたタスクでしか
+    正しく閉じられないため、接続ごとに所有タスクを起動し、接続から切断までをそのタスクで行う。
+    リクエスト側は接続済みのツールを借りるだけで、切断は所有タスクへの通知で行う。
+    """
+
+    def __init__(self, factory: Callable[[], MCPStreamableHTTPTool]):
+        self._factory = factory
+        self._tool: MCPStreamableHTTPTool | None = None
+        self._lock = asyncio.Lock()
+        self._checked_at = 0.0
+        # 現在の接続の所有タスクと、切断を指示するイベント
+        self._owner: asyncio.Task | None = None
+        self._release: asyncio.Event | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._tool is not None and getattr(self._tool, "session", None) is not None
+
+    async def acquire(self) -> MCPStreamableHTTPTool:
+        """接続済みのMCPツールを取得（未接続・異常時は再接続）"""
+        if self.connected and time.monotonic() - self._checked_at < HEALTH_CHECK_INTERVAL:
+            return self._tool
+
+        async with self._lock:
+            if self.connected and time.monotonic() - self._checked_at < HEALTH_CHECK_INTERVAL:
+                return self._tool
+            if self.connected and await self._ping():
+                self._checked_at = time.monotonic()
+                return self._tool
+
+            await self._close_current()
+            self._tool = await self._open()
+            self._checked_at = time.monotonic()
+            logger.info("MCP session connected: %s", getattr(self._tool, "url", ""))
+            return self._tool
+
+    async def _open(self) -> MCPStreamableHTTPTool:
+        """所有タスクを起動し、接続が完了するまで待つ"""
+        loop = asyncio.get_running_loop()
+        connected: asyncio.Future = loop.create_future()
+        release = asyncio.Event()
+        owner = loop.create_task(self._own(self._factory(), connected, release), name="mcp-session")
+        try:
+            # 呼び出し元が取り消されても接続処理は所有タスクで終え、そのまま閉じさせる
+            tool = await asyncio.shield(connected)
+        except BaseException:
+            release.set()
+            raise
+        self._owner, self._release = owner, release
+        return tool
+
+    async def _own(self, tool: MCPStreamableHTTPTool, connected: asyncio.Future, release: asyncio.Event) -> None:
+        """接続を開き、切断を指示されるまで保持してから閉じる（所有タスク）"""
+        try:
+            await tool.connect()
+        except BaseException as e:
+            # MCPクライアントは接続エラーを CancelledError として送出することがあり、
+            # 同じタスクで閉じると元の接続エラーが送出される
+            error: BaseException = e
+            try:
+                await tool.close()
+            except BaseException as close_error:
+                error = close_error
+            if not connected.done():
+                connected.set_exception(error)
+            if isinstance(e, asyncio.CancelledError) and asyncio.current_task().cancelling():
+                raise
+            return
+
+        if not connected.done():
+            connected.set_result(tool)
+        try:
+            await release.wait()
+        finally:
+            try:
+                await tool.close()
+            except Exception:
+                logger.debug("Failed to close MCP session", exc_info=True)
+
+    async def _ping(self) -> bool:
+        try:
+            await asyncio.wait_for(self._tool.session.send_ping(), timeout=HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception:
+            logger.warning("MCP session health check failed; reconnecting", exc_info=True)
+            return False
+
+    def mark_suspect(self) -> None:
+        """次回の acquire() で死活確認を行わせる
+
+        他のリクエストも同じ接続を共有しているため、即座には切断しない。
+        """
+        self._checked_at = 0.0
+
+    async def invalidate(self) -> None:
+        """現在の接続を破棄し、次回の acquire() で再接続させる"""
+        async with self._lock:
+            await self._close_current()
+
+    async def _close_current(self) -> None:
+        """所有タスクに切断を指示し、閉じ終わるまで待つ"""
+        owner, release = self._owner, self._release
+        self._tool = self._owner = self._release = None
+        if owner is None:
+            return
+        release.set()
+        try:
+            await owner
+        except Exception:
+            logger.debug("Failed to close MCP session", exc_info=True)
+
+    async def close(self) -> None:
+        """接続を閉じる（サーバー終了時）"""
+        await self.invalidate()
@@ -0,0 +1,251 @@
+"""
+ファストパスルーター
+
+「C001の契約履歴」「SUVの赤の在庫」のような定型的な問い合わせを
+ルールで判定し、LLM を介さずに該当するMCPツールを直接呼び出して
+テンプレートで回答を整形する。判定できない問い合わせは None を返し、
+通常のエージェント処理にフォールバックする。
+"""
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from conversation import CUSTOMER_ID_PATTERN
+from tool_cache import normalize_customer_id
+
+logger = logging.getLogger(__name__)
+
+# ファストパスの有効/無効
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+
+# ファストパスの対象とする最大文字数（長い文は意図が複雑な可能性が高い）
+MAX_MESSAGE_LENGTH = 40
+
+# mcp-server-dealer の search_vehicles の type に指定できる車種
+VEHICLE_TYPES = ("SUV", "セダン", "軽自動車", "ミニバン")
+
+# 色の指定として扱う語（サーバー側で部分一致・エイリアス解決される）
+VEHICLE_COLORS = ("赤", "白", "黒", "グレー", "青", "シルバー", "レッド", "ホワイト", "ブラック", "ブルー")
+
+# 判断・提案を求める語を含む場合は LLM に任せる
+ESCALATION_WORDS = ("おすすめ", "オススメ", "提案", "比較", "なぜ", "理由", "どう思", "まとめて説明", "要約")
+
+# 否定・除外（「赤以外」など）はルールで扱えないため LLM に任せる
+NEGATION_WORDS = ("以外", "除く", "除いて", "除外", "じゃない", "ではない", "でない", "抜き")
+
+# 参照ではなく操作を求める語（解約・予約など）。ファストパスは参照系ツールのみのため LLM に任せる
+ACTION_WORDS = (
+    "解約", "キャンセル", "取り消", "取消", "予約", "入れ", "登録", "変更", "削除", "追加", "更新", "作成", "連絡",
+)
+
+# 顧客IDと組み合わせる意図 -> ツール
+CUSTOMER_INTENTS = (
+    ("get_contracts", ("契約履歴", "契約")),
+    ("get_visit_history", ("来店履歴", "来店", "点検履歴", "整備履歴")),
+    ("get_customer_info", ("顧客情報", "詳細", "情報", "プロフィール")),
+)
+
+# 在庫の問い合わせとして扱う語
+INVENTORY_WORDS = ("在庫", "車両")
+
+# 意味を持たない語（助詞・依頼表現・記号）。問い合わせがこれと認識した語だけで構成される場合のみファストパスで処理する
+FILLER_WORDS = (
+    "を教えてください", "教えてください", "教えて", "見せてください", "見せて", "表示して", "表示", "知りたい",
+    "確認したい", "確認", "お願いします", "お願い", "ください", "まとめて", "一覧", "様", "さん",
+    "の", "を", "は", "と", "や", "で", "、", "。", "・", "？", "?", "！", "!", " ",
+)
+
+
+def _token_pattern(*patterns: str, words: tuple[str, ...] = ()) -> re.Pattern:
+    # 長い語を優先して照合する（「顧客情報」を「情報」より先に取り除く）
+    literals = sorted((re.escape(word) for word in words), key=len, reverse=True)
+    return re.compile("|".join([*patterns, *literals]), re.IGNORECASE)
+
+
+# 顧客IDの問い合わせ・在庫の問い合わせとして認識する語
+_CUSTOMER_TOKENS = _token_pattern(
+    CUSTOMER_ID_PATTERN.pattern,
+    words=tuple(word for _, words in CUSTOMER_INTENTS for word in words) + FILLER_WORDS,
+)
+_VEHICLE_TOKENS = _token_pattern(
+    # 「赤い」「赤色」のような色の表現も含める
+    "(?:" + "|".join(map(re.escape, VEHICLE_COLORS)) + ")(?:い|色)?",
+    words=VEHICLE_TYPES + INVENTORY_WORDS + FILLER_WORDS,
+)
+
+
+def _fully_recognized(text: str, tokens: re.Pattern) -> bool:
+    """問い合わせが認識した語だけで構成されているか（価格・年式などの条件を読み落とさないため）"""
+    return not tokens.sub("", text)
+
+
+@dataclass
+class Route:
+    """ファストパスで実行するツール呼び出し"""
+
+    tool_name: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+def match_route(message: str) -> Route | None:
+    """問い合わせがファストパスで処理できる場合は Route を返す
+
+    顧客ID・意図・車種・色・助詞などの認識した語だけで構成される問い合わせのみを対象とし、
+    価格・年式の条件や否定・操作の依頼など、読み取れない部分が残る場合は None を返す。
+    """
+    if not FAST_PATH_ENABLED or not message:
+        return None
+    text = message.replace("\u3000", " ").strip()
+    if len(text) > MAX_MESSAGE_LENGTH or any(
+        word in text for word in ESCALATION_WORDS + NEGATION_WORDS + ACTION_WORDS
+    ):
+        return None
+
+    customer_ids = {match.upper() for match in CUSTOMER_ID_PATTERN.findall(text)}
+    if len(customer_ids) == 1:
+        if not _fully_recognized(text, _CUSTOMER_TOKENS):
+            return None
+        customer_id = normalize_customer_id(text)
+        intents = [name for name, words in CUSTOMER_INTENTS if any(word in text for word in words)]
+        # 複数の意図（顧客情報と契約など）は一括取得でまとめて答える
+        if len(intents) > 1:
+            return Route("get_customer_360", {"customer_id": customer_id})
+        if intents:
+            return Route(intents[0], {"customer_id": customer_id})
+        return None
+    if customer_ids:
+        return None
+
+    vehicle_types = [vehicle_type for vehicle_type in VEHICLE_TYPES if vehicle_type in text]
+    if len(vehicle_types) == 1 and "在庫" in text and _fully_recognized(text, _VEHICLE_TOKENS):
+        arguments: dict[str, Any] = {"type": vehicle_types[0]}
+        colors = [color for color in VEHICLE_COLORS if color in text]
+        if len(colors) > 1:
+            return None
+        if colors:
+            arguments["color"] = colors[0]
+        return Route("search_vehicles", arguments)
+
+    return None
+
+
+def _parse_tool_result(result: Any) -> Any:
+    """MCPツールの結果（Contents のリスト）から JSON を取り出す"""
+    if isinstance(result, str):
+        return json.loads(result)
+    return json.loads("".join(getattr(content, "text", None) or "" for content in result or []))
+
+
+def _page_items(data: Any) -> tuple[list[dict], int]:
+    """一覧の結果から (今回の件数分の行, 全件数) を取り出す
+
+    一覧を返すツールは {"items", "total", "has_more", "next_cursor"} を返す（リストのままの結果にも対応）。
+    """
+    if isinstance(data, dict) and "items" in data:
+        return data["items"], data.get("total", len(data["items"]))
+    return data, len(data)
+
+
+def _count_label(rows: list[dict], total: int) -> str:
+    if total > len(rows):
+        return f"{total}件、先頭{len(rows)}件を表示"
+    return f"{total}件"
+
+
+def _yen(value: Any) -> str:
+    return f"{value:,}円" if isinstance(value, (int, float)) else "-"
+
+
+def _format_contracts(customer_id: str, contracts: list[dict], total: int | None = None) -> str:
+    if not contracts:
+        return f"{customer_id} の契約履歴は見つかりませんでした。"
+    lines = [f"{customer_id} の契約履歴（{_count_label(contracts, total or len(contracts))}）", ""]
+    for contract in contracts:
+        model = contract.get("vehicle_model") or contract.get("vehicle_id", "")
+        lines.append(
+            f"- {contract.get('contract_date', '')} {contract.get('type', '')} {model} "
+            f"{_yen(contract.get('amount'))}（{contract.get('status', '')}）"
+        )
+    return "\n".join(lines)
+
+
+def _format_visits(customer_id: str, visits: list[dict], total: int | None = None) -> str:
+    if not visits:
+        return f"{customer_id} の来店履歴は見つかりませんでした。"
+    lines = [f"{customer_id} の来店履歴（{_count_label(visits, total or len(visits))}）", ""]
+    for visit in visits:
+        vehicle = visit.get("vehicle_model") or visit.get("vehicle_id", "")
+        notes = f": {visit['notes']}" if visit.get("notes") else ""
+        lines.append(f"- {visit.get('visit_date', '')} {visit.get('type', '')}（{vehicle}）{notes}")
+    return "\n".join(lines)
+
+
+def _format_customer(customer: dict) -> str:
+    current = customer.get("current_vehicle") or {}
+    lines = [
+        f"{customer.get('name', '')} 様（{customer.get('id', '')}）",
+        "",
+        f"- 電話: {customer.get('phone', '-')}",
+        f"- メール: {customer.get('email', '-')}",
+        f"- 住所: {customer.get('address', '-')}",
+        f"- 登録日: {customer.get('registered_date', '-')}",
+    ]
+    if customer.get("occupation"):
+        lines.append(f"- 職業: {customer['occupation']}")
+    if current:
+        lines.append(f"- 現在の車両: {current.get('model', '')}（{current.get('year', '')}年式）")
+    return "\n".join(lines)
+
+
+def _format_vehicles(arguments: dict, vehicles: list[dict], total: int | None = None) -> str:
+    condition = arguments["type"] + (f"・{arguments['color']}" if arguments.get("color") else "")
+    if not vehicles:
+        return f"{condition} の車両在庫は見つかりませんでした。"
+    lines = [f"{condition} の車両在庫（{_count_label(vehicles, total or len(vehicles))}）", ""]
+    for vehicle in vehicles:
+        lines.append(
+            f"- {vehicle.get('id', '')} {vehicle.get('model', '')} {vehicle.get('color', '')} "
+            f"{vehicle.get('year', '')}年式 {_yen(vehicle.get('price'))}（{vehicle.get('status', '')}）"
+        )
+    return "\n".join(lines)
+
+
+def format_result(route: Route, data: Any) -> str:
+    """ツール結果をテンプレートで回答文に整形"""
+    customer_id = route.arguments.get("customer_id", "")
+    if isinstance(data, dict) and "error" in data:
+        if data["error"] == "Customer not found":
+            return f"顧客ID {customer_id} の顧客は見つかりませんでした。IDをご確認ください。"
+        return f"エラーが返されました: {data['error']}"
+    if isinstance(data, list) and data and isinstance(data[0], dict) and "error" in data[0]:
+        return f"エラーが返されました: {data[0]['error']}"
+
+    if route.tool_name == "get_contracts":
+        return _format_contracts(customer_id, *_page_items(data))
+    if route.tool_name == "get_visit_history":
+        return _format_visits(customer_id, *_page_items(data))
+    if route.tool_name == "get_customer_info":
+        return _format_customer(data)
+    if route.tool_name == "get_customer_360":
+        return "\n\n".join([
+            _format_customer(data["customer"]),
+            _format_contracts(customer_id, data["contracts"]),
+            _format_visits(customer_id, data["visits"]),
+        ])
+    if route.tool_name == "search_vehicles":
+        return _format_vehicles(route.arguments, *_page_items(data))
+    raise ValueError(f"No template for tool '{route.tool_name}'")
+
+
+async def run_route(route: Route, tool: Any) -> str | None:
+    """ルートのツールを呼び出して回答文を返す（失敗時は None でフォールバック）"""
+    try:
+        result = await tool.call_tool(route.tool_name, **route.arguments)
+        return format_result(route, _parse_tool_result(result))
+    except Exception:
+        logger.warning("Fast path failed for %s; falling back to agent", route.tool_name, exc_info=True)
+        return None
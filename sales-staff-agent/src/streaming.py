@@ -0,0 +1,269 @@
+"""
+ストリーミング応答
+
+Agent Framework の run_stream() の更新を Foundry Responses API の
+ResponseStreamEvent に変換する。テキストは差分（delta）として、
+ツール呼び出しは開始/完了の出力アイテムとして、引数は断片（arguments.delta）として逐次送出する。
+イベントには送出順の sequence_number を付け、完了イベントの output には送出したアイテムをすべて含める。
+"""
+
+import json
+import uuid
+from typing import Any, AsyncGenerator, AsyncIterable, Callable
+
+from azure.ai.agentserver.core import AgentRunContext
+from azure.ai.agentserver.core.models.projects import (
+    FunctionToolCallItemResource,
+    FunctionToolCallOutputItemResource,
+    ItemContentOutputText,
+    Response,
+    ResponseCompletedEvent,
+    ResponseContentPartAddedEvent,
+    ResponseContentPartDoneEvent,
+    ResponseCreatedEvent,
+    ResponseFunctionCallArgumentsDeltaEvent,
+    ResponseFunctionCallArgumentsDoneEvent,
+    ResponseInProgressEvent,
+    ResponseOutputItemAddedEvent,
+    ResponseOutputItemDoneEvent,
+    ResponsesAssistantMessageItemResource,
+    ResponseStreamEvent,
+    ResponseTextDeltaEvent,
+    ResponseTextDoneEvent,
+)
+
+
+def wants_stream(context: AgentRunContext) -> bool:
+    """リクエストがストリーミングを要求しているか"""
+    stream = getattr(context, "stream", None)
+    if stream is None:
+        request = getattr(context, "request", None) or {}
+        stream = request.get("stream") if isinstance(request, dict) else False
+    return bool(stream)
+
+
+def _new_id(context: AgentRunContext, prefix: str) -> str:
+    generator = getattr(context, "id_generator", None)
+    if generator is not None and hasattr(generator, "generate_message_id"):
+        return generator.generate_message_id()
+    return f"{prefix}_{uuid.uuid4().hex}"
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    try:
+        return json.dumps(value, ensure_ascii=False, default=str)
+    except Exception:
+        return str(value)
+
+
+class ResponseStreamWriter:
+    """ストリーミング応答のイベントを組み立てる
+
+    sequence_number はレスポンスごとに 0 から始まり、イベントごとに1ずつ増える。
+    """
+
+    def __init__(self, context: AgentRunContext):
+        self.context = context
+        self.response_id = context.response_id or "response"
+        self.message_id = _new_id(context, "msg")
+        self.message_index: int | None = None
+        self.output_index = 0
+        self.sequence_number = 0
+        self.text = ""
+        self.tool_calls: dict[str, tuple[int, FunctionToolCallItemResource]] = {}
+        # call_id -> ここまでに受け取った引数（run_stream は引数を複数の断片に分けて返す）
+        self.arguments: dict[str, str] = {}
+        # output_index -> 送出した出力アイテム（完了イベントの output に含める）
+        self.items: dict[int, Any] = {}
+
+    def _event(self, event_type: type[ResponseStreamEvent], **kwargs: Any) -> ResponseStreamEvent:
+        event = event_type(sequence_number=self.sequence_number, **kwargs)
+        self.sequence_number += 1
+        return event
+
+    def created(self) -> list[ResponseStreamEvent]:
+        return [
+            self._event(ResponseCreatedEvent, response=Response(id=self.response_id, output=[], status="in_progress")),
+            self._event(ResponseInProgressEvent, response=Response(id=self.response_id, output=[], status="in_progress")),
+        ]
+
+    def text_delta(self, delta: str) -> list[ResponseStreamEvent]:
+        events: list[ResponseStreamEvent] = []
+        if self.message_index is None:
+            self.message_index = self._next_index()
+            item = ResponsesAssistantMessageItemResource(
+                id=self.message_id,
+                status="in_progress",
+                content=[ItemContentOutputText(text="", annotations=[])],
+            )
+            self.items[self.message_index] = item
+            events.append(self._event(ResponseOutputItemAddedEvent, output_index=self.message_index, item=item))
+            events.append(self._event(
+                ResponseContentPartAddedEvent,
+                item_id=self.message_id,
+                output_index=self.message_index,
+                content_index=0,
+                part=ItemContentOutputText(text="", annotations=[]),
+            ))
+        self.text += delta
+        events.append(self._event(
+            ResponseTextDeltaEvent, item_id=self.message_id, output_index=self.message_index, content_index=0, delta=delta
+        ))
+        return events
+
+    def tool_call(self, call_id: str, name: str, arguments: Any) -> list[ResponseStreamEvent]:
+        """ツール呼び出しの開始、または引数の続きの断片"""
+        events: list[ResponseStreamEvent] = []
+        entry = self.tool_calls.get(call_id)
+        if entry is None:
+            item = FunctionToolCallItemResource(
+                id=_new_id(self.context, "fc"),
+                call_id=call_id,
+                name=name,
+                arguments="",
+                status="in_progress",
+            )
+            index = self._next_index()
+            self.tool_calls[call_id] = (index, item)
+            self.arguments[call_id] = ""
+            self.items[index] = item
+            events.append(self._event(ResponseOutputItemAddedEvent, output_index=index, item=item))
+        else:
+            index, item = entry
+            if item.status != "in_progress":
+                return events
+
+        # 文字列は断片、それ以外（dict など）は引数全体として扱う
+        fragment = arguments if isinstance(arguments, str) else _to_text(arguments or {})
+        if fragment:
+            self.arguments[call_id] += fragment
+            events.append(self._event(
+                ResponseFunctionCallArgumentsDeltaEvent, item_id=item.id, output_index=index, delta=fragment
+            ))
+        return events
+
+    def _finish_tool_call(self, call_id: str, status: str) -> list[ResponseStreamEvent]:
+        """引数を確定してツール呼び出しのアイテムを完了する"""
+        index, item = self.tool_calls[call_id]
+        item.arguments = self.arguments[call_id] or "{}"
+        item.status = status
+        return [
+            self._event(
+                ResponseFunctionCallArgumentsDoneEvent, item_id=item.id, output_index=index, arguments=item.arguments
+            ),
+            self._event(ResponseOutputItemDoneEvent, output_index=index, item=item),
+        ]
+
+    def tool_result(self, call_id: str, result: Any) -> list[ResponseStreamEvent]:
+        events: list[ResponseStreamEvent] = []
+        entry = self.tool_calls.get(call_id)
+        if entry is not None and entry[1].status == "in_progress":
+            events.extend(self._finish_tool_call(call_id, "completed"))
+        output = FunctionToolCallOutputItemResource(
+            id=_new_id(self.context, "fco"),
+            call_id=call_id,
+            output=_to_text(result),
+            status="completed",
+        )
+        index = self._next_index()
+        self.items[index] = output
+        events.append(self._event(ResponseOutputItemAddedEvent, output_index=index, item=output))
+        events.append(self._event(ResponseOutputItemDoneEvent, output_index=index, item=output))
+        return events
+
+    def completed(self, status: str = "completed", metadata: dict[str, str] | None = None) -> list[ResponseStreamEvent]:
+        events: list[ResponseStreamEvent] = []
+        # 結果が返らなかったツール呼び出しは未完了として閉じる
+        for call_id, (_, item) in self.tool_calls.items():
+            if item.status == "in_progress":
+                events.extend(self._finish_tool_call(call_id, "incomplete"))
+        if self.message_index is not None:
+            part = ItemContentOutputText(text=self.text, annotations=[])
+            message = ResponsesAssistantMessageItemResource(id=self.message_id, status="completed", content=[part])
+            self.items[self.message_index] = message
+            events.append(self._event(
+                ResponseTextDoneEvent, item_id=self.message_id, output_index=self.message_index, content_index=0, text=self.text
+            ))
+            events.append(self._event(
+                ResponseContentPartDoneEvent,
+                item_id=self.message_id,
+                output_index=self.message_index,
+                content_index=0,
+                part=part,
+            ))
+            events.append(self._event(ResponseOutputItemDoneEvent, output_index=self.message_index, item=message))
+        events.append(self._event(
+            ResponseCompletedEvent,
+            response=Response(
+                id=self.response_id,
+                output=[self.items[index] for index in sorted(self.items)],
+                output_text=self.text,
+                status=status,
+                metadata=metadata,
+            ),
+        ))
+        return events
+
+    def _next_index(self) -> int:
+        index = self.output_index
+        self.output_index += 1
+        return index
+
+
+async def stream_response(
+    context: AgentRunContext,
+    updates: AsyncIterable[Any],
+    on_complete: Callable[[str], None] | None = None,
+    metadata: Callable[[], dict[str, str]] | None = None,
+) -> AsyncGenerator[ResponseStreamEvent, None]:
+    """run_stream() の更新を ResponseStreamEvent に変換して送出する
+
+    Args:
+        context: リクエストコンテキスト
+        updates: ChatAgent.run_stream() が返す AgentRunResponseUpdate のストリーム
+        on_complete: 正常終了時に最終テキストを受け取るコールバック
+        metadata: 完了イベントのレスポンスに付ける metadata を返すコールバック（完了時に呼び出す）
+    """
+    writer = ResponseStreamWriter(context)
+    for event in writer.created():
+        yield event
+
+    try:
+        async for update in updates:
+            for content in getattr(update, "contents", None) or []:
+                content_type = getattr(content, "type", None)
+                if content_type == "text" and getattr(content, "text", None):
+                    for event in writer.text_delta(content.text):
+                        yield event
+                elif content_type == "function_call":
+                    for event in writer.tool_call(content.call_id, content.name, content.arguments):
+                        yield event
+                elif content_type == "function_result":
+                    for event in writer.tool_result(content.call_id, content.result):
+                        yield event
+    except Exception as e:
+        for event in writer.text_delta(f"エラーが発生しました: {str(e)}"):
+            yield event
+        for event in writer.completed(status="failed", metadata=metadata() if metadata else None):
+            yield event
+        raise
+
+    if on_complete is not None:
+        on_complete(writer.text)
+    for event in writer.completed(metadata=metadata() if metadata else None):
+        yield event
+
+
+async def stream_text(
+    context: AgentRunContext, text: str, metadata: dict[str, str] | None = None
+) -> AsyncGenerator[ResponseStreamEvent, None]:
+    """生成済みのテキストを1つの差分としてストリーミング応答で返す"""
+    writer = ResponseStreamWriter(context)
+    for event in writer.created():
+        yield event
+    for event in writer.text_delta(text):
+        yield event
+    for event in writer.completed(metadata=metadata):
+        yield event
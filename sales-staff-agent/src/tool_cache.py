@@ -0,0 +1,199 @@
+"""
+ツール結果キャッシュ
+
+読み取り専用のMCPツール呼び出し結果を、ツール名 + 正規化した引数をキーに
+ツールごとのTTLでキャッシュする。同じ引数の同時呼び出しは1回にまとめる。
+ヒット/ミス数は OpenTelemetry のメトリクス（enable_instrumentation で有効化）に記録する。
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from agent_framework import MCPStreamableHTTPTool
+from opentelemetry import metrics
+
+# ツールごとのTTL（秒）。ここにないツール・0以下のツールはキャッシュしない
+DEFAULT_TOOL_TTLS = {
+    "search_customer_by_name": 300.0,
+    "get_customer_info": 300.0,
+    "get_contracts": 300.0,
+    "get_visit_history": 300.0,
+    "get_customer_360": 300.0,
+    "get_upcoming_services": 300.0,
+    # 在庫は変動しやすいため短め
+    "search_vehicles": 60.0,
+}
+
+# キャッシュするエントリ数の上限
+MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024"))
+
+# agent-framework が call_tool に渡す実行時の引数（thread など）。MCPTool.call_tool と同じく
+# ツールの引数ではないためキーに含めない（含めると agent.run ごとに別のキーになる）
+FRAMEWORK_KWARGS = frozenset({"chat_options", "tools", "tool_choice", "thread", "conversation_id", "options"})
+
+_meter = metrics.get_meter("sales_staff_agent.tool_cache")
+_hits = _meter.create_counter("tool_cache.hits", description="MCP tool result cache hits")
+_misses = _meter.create_counter("tool_cache.misses", description="MCP tool result cache misses")
+
+
+def normalize_customer_id(value: str) -> str:
+    """顧客IDを正規化（例: 'C001の顧客情報' -> 'C001'）
+
+    mcp-server-dealer の tools.normalize_customer_id と同じ規則。
+    """
+    if not value:
+        return ""
+    text = str(value).replace("\u3000", " ").strip()
+    match = re.search(r"C\d{3,}", text, re.IGNORECASE)
+    if match:
+        return match.group(0).upper()
+    return text
+
+
+def _normalize_arguments(arguments: dict[str, Any]) -> dict[str, Any]:
+    normalized = {}
+    for key, value in arguments.items():
+        if value is None:
+            continue
+        if key == "customer_id":
+            value = normalize_customer_id(value)
+        elif isinstance(value, str):
+            value = value.replace("\u3000", " ").strip()
+        normalized[key] = value
+    return normalized
+
+
+def _parse_ttls(value: str | None) -> dict[str, float]:
+    """TOOL_CACHE_TTLS（例: "search_vehicles=30,get_customer_info=600"）を解釈"""
+    ttls = dict(DEFAULT_TOOL_TTLS)
+    for item in (value or "").split(","):
+        name, _, seconds = item.partition("=")
+        try:
+            ttls[name.strip()] = float(seconds)
+        except ValueError:
+            continue
+    return {name: ttl for name, ttl in ttls.items() if ttl > 0}
+
+
+class _LeaderCancelled(Exception):
+    """実行中の呼び出しが取り消された（待っていた側は自分で呼び出し直す）"""
+
+
+class ToolResultCache:
+    """ツール結果の非同期 LRU キャッシュ（TTL + single-flight）"""
+
+    def __init__(self, ttls: dict[str, float] | None = None, max_entries: int = MAX_ENTRIES):
+        self.ttls = ttls if ttls is not None else _parse_ttls(os.getenv("TOOL_CACHE_TTLS"))
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.ttls
+
+    @staticmethod
+    def key(tool_name: str, arguments: dict[str, Any]) -> str:
+        return tool_name + ":" + json.dumps(
+            _normalize_arguments(arguments), ensure_ascii=False, sort_keys=True, default=str
+        )
+
+    async def get_or_call(
+        self, tool_name: str, arguments: dict[str, Any], call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """キャッシュ済みの結果を返す。なければ call() を実行して保存する
+
+        同じ引数の呼び出しが実行中ならその結果を待つ。実行していた呼び出しが取り消された場合
+        （クライアントの切断など）、待っていた側は取り消さずに自分で call() を実行し直す。
+        """
+        key = self.key(tool_name, arguments)
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                _hits.add(1, {"tool": tool_name})
+                return entry[1]
+
+            # 同じ引数の呼び出しが実行中ならその結果を待つ
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                return await self._call(tool_name, key, call)
+            _hits.add(1, {"tool": tool_name, "inflight": True})
+            try:
+                return await asyncio.shield(inflight)
+            except _LeaderCancelled:
+                continue
+
+    async def _call(self, tool_name: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        _misses.add(1, {"tool": tool_name})
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # 待機者まで取り消さないよう、取り消しではなく再実行を促す例外で起こす
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 待機者がいない場合の "exception was never retrieved" を抑止
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._entries[key] = (time.monotonic() + self.ttls[tool_name], result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class CachingMCPStreamableHTTPTool(MCPStreamableHTTPTool):
+    """ツール結果キャッシュ付きの MCPStreamableHTTPTool
+
+    キーにはツールの入力スキーマで宣言された引数のみを使う（スキーマが不明な場合は
+    agent-framework の実行時の引数を除いたもの）。
+    """
+
+    def __init__(self, *args: Any, cache: ToolResultCache, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+        # ツール名 -> 入力スキーマで宣言された引数名
+        self._declared: dict[str, frozenset[str]] = {}
+
+    def _declared_arguments(self, tool_name: str) -> frozenset[str] | None:
+        declared = self._declared.get(tool_name)
+        if declared is None:
+            for function in self.functions:
+                if function.name == tool_name:
+                    declared = frozenset(function.parameters().get("properties", {}))
+                    self._declared[tool_name] = declared
+                    break
+        return declared
+
+    def cache_arguments(self, tool_name: str, kwargs: dict[str, Any]) -> dict[str, Any]:
+        """キャッシュのキーにする引数"""
+        declared = self._declared_arguments(tool_name)
+        if declared is not None:
+            return {key: value for key, value in kwargs.items() if key in declared}
+        return {key: value for key, value in kwargs.items() if key not in FRAMEWORK_KWARGS}
+
+    async def call_tool(self, tool_name: str, **kwargs: Any) -> Any:
+        if not self.cache.cacheable(tool_name):
+            return await super().call_tool(tool_name, **kwargs)
+        return await self.cache.get_or_call(
+            tool_name,
+            self.cache_arguments(tool_name, kwargs),
+            lambda: super(CachingMCPStreamableHTTPTool, self).call_tool(tool_name, **kwargs),
+        )
@@ -0,0 +1,276 @@
+"""
+トレース・レイテンシ内訳
+
+エージェントのターン（1回の応答）と MCP サーバーのツール実行を同じトレースにつなげ、
+ターンの所要時間をモデル（LLM 呼び出し）・ツール（MCP 呼び出し）・それ以外（オーバーヘッド）に分けて計測する。
+
+トレースコンテキストの伝播:
+    tools/call の params._meta に W3C Trace Context（traceparent / tracestate）を付ける。
+    MCP クライアントは接続時に作成したタスクから HTTP リクエストを送るため、HTTP クライアント側では
+    呼び出し元のコンテキストを参照できない。そのため呼び出し時に _meta に入れ、送信時に同じ値を
+    HTTP ヘッダーにも写す（Functions ホスト側のリクエストテレメトリーにもつながる）。
+
+レイテンシ内訳:
+    モデル時間は ChatMiddleware、ツール時間は MCP ツールの call_tool で計測し、
+    ターン全体から両方を引いた残りをオーバーヘッド（履歴の復元・ルーティング・MCP 接続の取得・応答の組み立てなど）とする。
+    結果はレスポンスの metadata（latency_*_ms など）・スパンの属性・メトリクスに記録する。
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator
+
+import httpx
+from agent_framework import ChatContext, ChatMiddleware
+from mcp.shared._httpx_utils import create_mcp_http_client
+from opentelemetry import metrics, propagate, trace
+
+from tool_cache import CachingMCPStreamableHTTPTool
+
+logger = logging.getLogger(__name__)
+
+# ヘッダーにも写すトレースコンテキストのキー
+TRACE_CONTEXT_KEYS = ("traceparent", "tracestate")
+
+_tracer = trace.get_tracer("sales_staff_agent")
+_meter = metrics.get_meter("sales_staff_agent.tracing")
+_turn_latency = _meter.create_histogram(
+    "sales_agent.turn.duration", unit="s", description="Agent turn latency by phase (model / tool / overhead / total)"
+)
+
+
+class _Phase:
+    """1つのフェーズ（model / tool）の所要時間
+
+    並行して実行された呼び出しは重なった時間を二重に数えない（いずれかが実行中の時間を数える）。
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self._active = 0
+        self._since = 0.0
+
+    def enter(self) -> None:
+        self.calls += 1
+        if self._active == 0:
+            self._since = time.perf_counter()
+        self._active += 1
+
+    def exit(self) -> None:
+        self._active -= 1
+        if self._active == 0:
+            self.seconds += time.perf_counter() - self._since
+
+    def elapsed(self, now: float) -> float:
+        # 終了していない呼び出し（読み切られなかったストリームなど）は now までを数える
+        return self.seconds + (now - self._since if self._active else 0.0)
+
+
+class TurnTimer:
+    """1ターンの所要時間をモデル・ツール・オーバーヘッドに分けて集計する"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {"model": _Phase(), "tool": _Phase()}
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """with ブロックの実行時間を phase（model / tool）に加える"""
+        entry = self.phases[phase]
+        entry.enter()
+        try:
+            yield
+        finally:
+            entry.exit()
+
+    def breakdown(self) -> dict[str, float]:
+        """ここまでの内訳（ミリ秒）と呼び出し回数"""
+        now = time.perf_counter()
+        total = now - self.started
+        model = self.phases["model"].elapsed(now)
+        tool = self.phases["tool"].elapsed(now)
+        return {
+            "total_ms": total * 1000,
+            "model_ms": model * 1000,
+            "tool_ms": tool * 1000,
+            "overhead_ms": max(total - model - tool, 0.0) * 1000,
+            "model_calls": self.phases["model"].calls,
+            "tool_calls": self.phases["tool"].calls,
+        }
+
+
+# 処理中のターン（ツール呼び出し・LLM 呼び出しの計測先）
+_current_turn: ContextVar[TurnTimer | None] = ContextVar("sales_agent_turn", default=None)
+
+
+def start_turn() -> TurnTimer:
+    """ターンの計測を開始し、以降の呼び出しの計測先にする"""
+    turn = TurnTimer()
+    _current_turn.set(turn)
+    return turn
+
+
+def resume_turn(turn: TurnTimer) -> None:
+    """別のタスクで続きを処理する場合（ストリーミング応答）に、計測先を引き継ぐ"""
+    _current_turn.set(turn)
+
+
+@contextmanager
+def measure(phase: str) -> Iterator[None]:
+    """処理中のターンがあれば、with ブロックの実行時間を phase に加える"""
+    turn = _current_turn.get()
+    if turn is None:
+        yield
+        return
+    with turn.measure(phase):
+        yield
+
+
+def finish_turn(turn: TurnTimer) -> dict[str, str]:
+    """ターンの内訳を記録し、レスポンスの metadata に付ける値を返す
+
+    内訳は現在のスパン（記録中の場合）の属性とメトリクス（sales_agent.turn.duration）にも記録する。
+    """
+    breakdown = turn.breakdown()
+    for phase in ("model", "tool", "overhead", "total"):
+        _turn_latency.record(breakdown[f"{phase}_ms"] / 1000, {"phase": phase})
+
+    span = trace.get_current_span()
+    if span.is_recording():
+        for key, value in breakdown.items():
+            span.set_attribute(f"sales_agent.latency.{key}", value)
+
+    logger.info(
+        "Turn latency: total=%.1fms model=%.1fms (%d calls) tool=%.1fms (%d calls) overhead=%.1fms",
+        breakdown["total_ms"],
+        breakdown["model_ms"],
+        breakdown["model_calls"],
+        breakdown["tool_ms"],
+        breakdown["tool_calls"],
+        breakdown["overhead_ms"],
+    )
+
+    # Responses API の metadata は文字列の値のみ
+    metadata = {f"latency_{phase}_ms": f"{breakdown[f'{phase}_ms']:.1f}" for phase in ("total", "model", "tool", "overhead")}
+    metadata["model_calls"] = str(breakdown["model_calls"])
+    metadata["tool_calls"] = str(breakdown["tool_calls"])
+    span_context = span.get_span_context()
+    if span_context.is_valid:
+        metadata["trace_id"] = trace.format_trace_id(span_context.trace_id)
+    return metadata
+
+
+class LatencyMiddleware(ChatMiddleware):
+    """LLM 呼び出しの時間を処理中のターンのモデル時間に加える"""
+
+    async def process(self, context: ChatContext, next: Callable[[ChatContext], Awaitable[None]]) -> None:
+        turn = _current_turn.get()
+        if turn is None:
+            await next(context)
+            return
+        if not context.is_streaming:
+            with turn.measure("model"):
+                await next(context)
+            return
+
+        # ストリーミングは応答を読み切るまでをモデル時間とする
+        phase = turn.phases["model"]
+        phase.enter()
+        try:
+            await next(context)
+        except BaseException:
+            phase.exit()
+            raise
+        stream = context.result
+        if stream is None or not hasattr(stream, "__aiter__"):
+            phase.exit()
+            return
+
+        async def timed() -> AsyncIterator[Any]:
+            try:
+                async for update in stream:
+                    yield update
+            finally:
+                phase.exit()
+
+        context.result = timed()
+
+
+def inject_trace_context(meta: dict[str, Any] | None = None) -> dict[str, Any] | None:
+    """現在のトレースコンテキストを MCP の _meta に加えたコピーを返す"""
+    carrier = dict(meta or {})
+    propagate.inject(carrier)
+    return carrier or None
+
+
+async def _copy_trace_headers(request: httpx.Request) -> None:
+    """JSON-RPC の params._meta にあるトレースコンテキストを HTTP ヘッダーにも付ける"""
+    try:
+        content = request.content
+    except httpx.RequestNotRead:
+        return
+    if b'"traceparent"' not in content:
+        return
+    try:
+        message = json.loads(content)
+    except ValueError:
+        return
+    params = message.get("params") if isinstance(message, dict) else None
+    meta = params.get("_meta") if isinstance(params, dict) else None
+    if not isinstance(meta, dict):
+        return
+    for key in TRACE_CONTEXT_KEYS:
+        if isinstance(meta.get(key), str):
+            request.headers[key] = meta[key]
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """MCP 用の HTTP クライアント（MCP の既定のタイムアウト + トレースヘッダー）
+
+    再接続をまたいで共有し、接続プールを再利用する。MCPStreamableHTTPTool は
+    渡されたクライアントを閉じないため、終了時に aclose() すること。
+    """
+    client = create_mcp_http_client()
+    client.event_hooks = {"request": [_copy_trace_headers], "response": []}
+    return client
+
+
+class TracedMCPStreamableHTTPTool(CachingMCPStreamableHTTPTool):
+    """ツール呼び出しにトレースコンテキストを付け、所要時間を処理中のターンに記録する MCP ツール
+
+    キャッシュのヒットも含めて、ターンから見たツールの待ち時間を計測する。
+    """
+
+    _traced_session: Any = None
+
+    async def connect(self, *, reset: bool = False) -> None:
+        await super().connect(reset=reset)
+        session = self.session
+        if session is not None and session is not self._traced_session:
+            _propagate_trace_context(session)
+            self._traced_session = session
+
+    async def call_tool(self, tool_name: str, **kwargs: Any) -> Any:
+        with _tracer.start_as_current_span(
+            f"tools/call {tool_name}",
+            kind=trace.SpanKind.CLIENT,
+            attributes={"mcp.method.name": "tools/call", "gen_ai.tool.name": tool_name},
+        ), measure("tool"):
+            return await super().call_tool(tool_name, **kwargs)
+
+
+def _propagate_trace_context(session: Any) -> None:
+    """セッションの tools/call が params._meta に現在のトレースコンテキストを付けるようにする
+
+    MCPStreamableHTTPTool.call_tool は _meta を指定しないため、セッションの call_tool を包む。
+    """
+    call_tool = session.call_tool
+
+    async def call_tool_with_trace_context(name: str, arguments: Any = None, *args: Any, meta: Any = None, **kwargs: Any):
+        return await call_tool(name, arguments, *args, meta=inject_trace_context(meta), **kwargs)
+
+    session.call_tool = call_tool_with_trace_context
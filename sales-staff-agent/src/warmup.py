@@ -0,0 +1,134 @@
+"""
+起動時のウォームアップ・レディネス
+
+最初のリクエストで行っていた初期化（資格情報の探索・トークン取得・クライアント作成・MCP接続）を
+コンテナの起動直後にバックグラウンドで済ませ、完了するまで /readiness を not-ready（503）にする。
+/liveness はプロセスが応答できるかのみを返す（ウォームアップの失敗で再起動させない）。
+
+失敗したステップは、そのステップから一定間隔で再試行する（MCPサーバーの起動待ちなど）。
+
+環境変数:
+    AGENT_WARMUP: false でウォームアップを行わない（従来どおり最初のリクエストで初期化し、/readiness は常に ready）
+    AGENT_WARMUP_RETRY_INTERVAL: 失敗したステップの再試行間隔（秒、既定: 5）
+    AGENT_WARMUP_STEP_TIMEOUT: 各ステップのタイムアウト（秒、既定: 60）
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# ウォームアップを行うか
+WARMUP_ENABLED = os.getenv("AGENT_WARMUP", "true").strip().lower() not in ("false", "0", "no")
+
+# 失敗したステップの再試行間隔（秒）
+WARMUP_RETRY_INTERVAL = float(os.getenv("AGENT_WARMUP_RETRY_INTERVAL", "5"))
+
+# 各ステップのタイムアウト（秒）
+WARMUP_STEP_TIMEOUT = float(os.getenv("AGENT_WARMUP_STEP_TIMEOUT", "60"))
+
+# ステップの処理。False を返した場合は省略（skipped）として扱う
+WarmUpStep = Callable[[], Awaitable[bool | None]]
+
+
+def _describe(error: BaseException) -> str:
+    """/readiness に表示するエラー（ExceptionGroup は最初の要因）"""
+    while isinstance(error, BaseExceptionGroup) and error.exceptions:
+        error = error.exceptions[0]
+    return f"{type(error).__name__}: {error}"
+
+
+class WarmUp:
+    """起動時の初期化ステップを順に実行し、完了したかを保持する
+
+    Args:
+        steps: (名前, 処理) のリスト。先頭から順に実行する
+        retry_interval: 失敗したステップの再試行間隔（秒）
+        step_timeout: 各ステップのタイムアウト（秒）
+    """
+
+    def __init__(
+        self,
+        steps: list[tuple[str, WarmUpStep]],
+        retry_interval: float = WARMUP_RETRY_INTERVAL,
+        step_timeout: float = WARMUP_STEP_TIMEOUT,
+    ):
+        self.steps = steps
+        self.retry_interval = retry_interval
+        self.step_timeout = step_timeout
+        self.ready = False
+        # ステップ名 -> {"status": pending / running / ok / skipped / error, "seconds", "attempts", "error"}
+        self.state: dict[str, dict[str, Any]] = {name: {"status": "pending", "attempts": 0} for name, _ in steps}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """バックグラウンドでウォームアップを開始する（起動済みなら何もしない）"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def skip(self) -> None:
+        """ウォームアップを行わずに ready とする"""
+        for state in self.state.values():
+            state["status"] = "skipped"
+        self.ready = True
+
+    async def run(self) -> None:
+        """全ステップを成功するまで実行する"""
+        started = time.perf_counter()
+        for name, step in self.steps:
+            await self._run_step(name, step)
+        self.ready = True
+        logger.info(
+            "Warm-up completed in %.2fs (%s)",
+            time.perf_counter() - started,
+            ", ".join(f"{name}={state.get('seconds', 0.0):.2f}s" for name, state in self.state.items()),
+        )
+
+    async def _run_step(self, name: str, step: WarmUpStep) -> None:
+        state = self.state[name]
+        while True:
+            state["status"] = "running"
+            state["attempts"] += 1
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(step(), timeout=self.step_timeout)
+            except asyncio.CancelledError as e:
+                # このタスク自体の取り消し（サーバー終了）以外は、ライブラリ内部の失敗として扱う
+                if asyncio.current_task().cancelling():
+                    raise
+                failure: BaseException = e
+            except Exception as e:
+                failure = e
+            else:
+                state.pop("error", None)
+                state.update(status="skipped" if result is False else "ok", seconds=time.perf_counter() - start)
+                return
+            state.update(status="error", error=_describe(failure))
+            logger.warning(
+                "Warm-up step '%s' failed (attempt %d); retrying in %.0fs",
+                name, state["attempts"], self.retry_interval, exc_info=failure,
+            )
+            await asyncio.sleep(self.retry_interval)
+
+    def status(self) -> dict[str, Any]:
+        """/readiness の本文"""
+        return {
+            "status": "ready" if self.ready else "starting",
+            "steps": {
+                name: {key: round(value, 3) if isinstance(value, float) else value for key, value in state.items()}
+                for name, state in self.state.items()
+            },
+        }
+
+    async def stop(self) -> None:
+        """実行中のウォームアップを止める（サーバー終了時）"""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,6 @@
+"""テスト共通設定（src のモジュールを container.py と同じくトップレベルで import する）"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,34 @@
+"""会話状態管理のテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from conversation import input_messages, message_role, message_text
+
+
+@pytest.mark.parametrize(
+    ("request_input", "expected"),
+    [
+        ("C001の契約履歴", [("user", "C001の契約履歴")]),
+        ({"messages": [{"role": "user", "content": "田中様を検索して"}]}, [("user", "田中様を検索して")]),
+        (
+            [
+                {"role": "user", "content": "田中様を検索して"},
+                {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": "C001です"}]},
+                {"type": "function_call_output", "call_id": "call_1", "output": "{}"},
+                {"role": "user", "content": [{"type": "input_text", "text": "その方の契約は？"}]},
+            ],
+            [("user", "田中様を検索して"), ("assistant", "C001です"), ("user", "その方の契約は？")],
+        ),
+        (None, []),
+    ],
+)
+def test_input_messages_from_request(request_input, expected):
+    context = SimpleNamespace(request={"input": request_input})
+    assert [(message_role(msg), message_text(msg)) for msg in input_messages(context)] == expected
+
+
+def test_input_messages_prefers_context_attribute():
+    context = SimpleNamespace(input_messages=[{"role": "user", "content": "C001"}], request={"input": "ignored"})
+    assert input_messages(context) == [{"role": "user", "content": "C001"}]
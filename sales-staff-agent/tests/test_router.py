@@ -0,0 +1,53 @@
+"""ファストパスルーターのテスト"""
+
+import pytest
+
+from router import Route, match_route
+
+
+@pytest.mark.parametrize(
+    ("message", "expected"),
+    [
+        ("C001の契約履歴", Route("get_contracts", {"customer_id": "C001"})),
+        ("c001の来店履歴を教えて", Route("get_visit_history", {"customer_id": "C001"})),
+        ("C001の顧客情報", Route("get_customer_info", {"customer_id": "C001"})),
+        ("C001様の詳細を見せてください", Route("get_customer_info", {"customer_id": "C001"})),
+        ("C001の契約と来店をまとめて", Route("get_customer_360", {"customer_id": "C001"})),
+        ("C001の情報とC001の契約", Route("get_customer_360", {"customer_id": "C001"})),
+        ("C001の情報と来店履歴", Route("get_customer_360", {"customer_id": "C001"})),
+        ("SUVの在庫", Route("search_vehicles", {"type": "SUV"})),
+        ("SUVの赤の在庫", Route("search_vehicles", {"type": "SUV", "color": "赤"})),
+        ("赤いSUVの在庫は？", Route("search_vehicles", {"type": "SUV", "color": "赤"})),
+        ("白色のミニバンの在庫一覧", Route("search_vehicles", {"type": "ミニバン", "color": "白"})),
+    ],
+)
+def test_match_route(message, expected):
+    assert match_route(message) == expected
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        # 価格・年式などの読み取れない条件
+        "SUVの在庫で300万円以下",
+        "2024年式のSUVの在庫",
+        "走行距離の少ないSUVの在庫",
+        # 否定・除外
+        "赤以外のSUVの在庫",
+        "C001以外の契約",
+        # 参照ではない操作の依頼
+        "C001の契約を解約したい",
+        "C001の来店予約を入れて",
+        "C001の情報を変更して",
+        # 意図・車種が不明、または複数
+        "C001",
+        "C001とC002の契約",
+        "SUVとセダンの在庫",
+        "赤と白のSUVの在庫",
+        "SUVのおすすめの在庫",
+        # 車両と顧客の混在
+        "C001のSUVの在庫",
+    ],
+)
+def test_match_route_falls_back_to_agent(message):
+    assert match_route(message) is None
@@ -0,0 +1,97 @@
+"""ストリーミング応答のテスト"""
+
+import asyncio
+from types import SimpleNamespace
+
+from agent_framework import Content
+
+from streaming import stream_response
+
+
+def _collect(updates):
+    async def scenario():
+        async def stream():
+            for update in updates:
+                yield update
+
+        context = SimpleNamespace(response_id="resp_1")
+        return [event async for event in stream_response(context, stream(), metadata=lambda: {"tool_calls": "1"})]
+
+    return asyncio.run(scenario())
+
+
+def test_stream_events_are_sequenced_and_complete():
+    events = _collect([
+        SimpleNamespace(contents=[Content.from_function_call(call_id="call_1", name="get_contracts", arguments='{"customer_id": "C001"}')]),
+        SimpleNamespace(contents=[Content.from_function_result(call_id="call_1", result='{"items": []}')]),
+        SimpleNamespace(contents=[Content.from_text("契約は")]),
+        SimpleNamespace(contents=[Content.from_text("ありません")]),
+    ])
+
+    assert [event.sequence_number for event in events] == list(range(len(events)))
+    assert [event.type for event in events] == [
+        "response.created",
+        "response.in_progress",
+        "response.output_item.added",
+        "response.function_call_arguments.delta",
+        "response.function_call_arguments.done",
+        "response.output_item.done",
+        "response.output_item.added",
+        "response.output_item.done",
+        "response.output_item.added",
+        "response.content_part.added",
+        "response.output_text.delta",
+        "response.output_text.delta",
+        "response.output_text.done",
+        "response.content_part.done",
+        "response.output_item.done",
+        "response.completed",
+    ]
+
+    # 完了イベントの output は送出したアイテムと同じ順序・内容
+    response = events[-1].response
+    assert [item.type for item in response.output] == ["function_call", "function_call_output", "message"]
+    assert [item.id for item in response.output] == [
+        event.item.id for event in events if event.type == "response.output_item.added"
+    ]
+    assert response.output[0].status == "completed"
+    assert response.output_text == "契約はありません"
+    assert response.metadata == {"tool_calls": "1"}
+
+
+def test_unfinished_tool_call_is_closed_as_incomplete():
+    events = _collect([
+        SimpleNamespace(contents=[Content.from_function_call(call_id="call_1", name="get_contracts", arguments="{}")]),
+    ])
+
+    assert [event.sequence_number for event in events] == list(range(len(events)))
+    done = [event for event in events if event.type == "response.output_item.done"]
+    assert [event.item.status for event in done] == ["incomplete"]
+    assert [item.type for item in events[-1].response.output] == ["function_call"]
+
+
+def test_function_call_arguments_split_across_chunks():
+    fragments = ['{"cust', 'omer_id"', ': "C001"}']
+    events = _collect([
+        *(SimpleNamespace(contents=[Content.from_function_call(call_id="call_1", name="get_contracts", arguments=fragment)])
+          for fragment in fragments),
+        SimpleNamespace(contents=[Content.from_function_result(call_id="call_1", result='{"items": []}')]),
+    ])
+
+    assert [event.sequence_number for event in events] == list(range(len(events)))
+    assert [event.type for event in events if event.type.startswith("response.output_item")] == [
+        "response.output_item.added",
+        "response.output_item.done",
+        "response.output_item.added",
+        "response.output_item.done",
+    ]
+    deltas = [event for event in events if event.type == "response.function_call_arguments.delta"]
+    assert [event.delta for event in deltas] == fragments
+    item_id = events[2].item.id
+    assert {event.item_id for event in deltas} == {item_id}
+    done = [event for event in events if event.type == "response.function_call_arguments.done"]
+    assert [(event.item_id, event.arguments) for event in done] == [(item_id, '{"customer_id": "C001"}')]
+
+    function_call = events[-1].response.output[0]
+    assert function_call.arguments == '{"customer_id": "C001"}'
+    assert function_call.status == "completed"
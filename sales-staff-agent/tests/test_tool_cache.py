@@ -0,0 +1,137 @@
+"""ツール結果キャッシュのテスト（agent.run 経由）"""
+
+import asyncio
+import json
+
+from agent_framework import (
+    BaseChatClient,
+    ChatAgent,
+    ChatMessage,
+    ChatResponse,
+    ChatResponseUpdate,
+    Content,
+    use_function_invocation,
+)
+from mcp import types
+
+from tool_cache import CachingMCPStreamableHTTPTool, ToolResultCache
+
+
+@use_function_invocation
+class ToolCallingChatClient(BaseChatClient):
+    """1回目は get_customer_info を呼び、ツール結果を受け取ったら回答する"""
+
+    async def _inner_get_response(self, *, messages, options, **kwargs):
+        last = messages[-1]
+        if any(content.type == "function_result" for content in last.contents):
+            return ChatResponse(messages=[ChatMessage(role="assistant", text="田中 太郎 様です")])
+        call = Content.from_function_call(
+            call_id="call-1", name="get_customer_info", arguments=json.dumps({"customer_id": "C001"})
+        )
+        return ChatResponse(messages=[ChatMessage(role="assistant", contents=[call])])
+
+    async def _inner_get_streaming_response(self, *, messages, options, **kwargs):
+        response = await self._inner_get_response(messages=messages, options=options, **kwargs)
+        for message in response.messages:
+            yield ChatResponseUpdate(role=message.role, contents=message.contents)
+
+
+class FakeSession:
+    """MCP の ClientSession の代わり（tools/call の回数を数える）"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: list[tuple[str, dict]] = []
+
+    async def send_ping(self):
+        return types.EmptyResult()
+
+    async def list_tools(self, params=None):
+        schema = {"type": "object", "properties": {"customer_id": {"type": "string"}}, "required": ["customer_id"]}
+        return types.ListToolsResult(tools=[types.Tool(name="get_customer_info", description="", inputSchema=schema)])
+
+    async def call_tool(self, name, arguments=None, *args, **kwargs):
+        self.calls.append((name, arguments))
+        await asyncio.sleep(self.delay)
+        return types.CallToolResult(content=[types.TextContent(type="text", text='{"id": "C001", "name": "田中 太郎"}')])
+
+
+async def _create_tool(session: FakeSession, cache: ToolResultCache) -> CachingMCPStreamableHTTPTool:
+    tool = CachingMCPStreamableHTTPTool(
+        name="dealer-backend", url="http://localhost/mcp", load_prompts=False, session=session, cache=cache
+    )
+    await tool.load_tools()
+    tool.is_connected = True
+    return tool
+
+
+def test_cache_is_shared_across_agent_runs():
+    async def scenario():
+        session = FakeSession()
+        cache = ToolResultCache()
+        tool = await _create_tool(session, cache)
+        agent = ChatAgent(chat_client=ToolCallingChatClient())
+
+        # agent.run ごとに別の thread が call_tool に渡されても同じキーになる
+        first = await agent.run("C001の情報", tools=[tool])
+        second = await agent.run("C001の情報", tools=[tool])
+        return session, cache, first, second
+
+    session, cache, first, second = asyncio.run(scenario())
+    assert first.text == second.text == "田中 太郎 様です"
+    assert session.calls == [("get_customer_info", {"customer_id": "C001"})]
+    assert list(cache._entries) == ['get_customer_info:{"customer_id": "C001"}']
+
+
+def test_concurrent_agent_runs_share_one_call():
+    async def scenario():
+        session = FakeSession(delay=0.05)
+        tool = await _create_tool(session, ToolResultCache())
+        agent = ChatAgent(chat_client=ToolCallingChatClient())
+        await asyncio.gather(*(agent.run("C001の情報", tools=[tool]) for _ in range(3)))
+        return session
+
+    session = asyncio.run(scenario())
+    assert len(session.calls) == 1
+
+
+def test_cache_arguments_drop_framework_kwargs():
+    async def scenario():
+        return await _create_tool(FakeSession(), ToolResultCache())
+
+    tool = asyncio.run(scenario())
+    assert tool.cache_arguments("get_customer_info", {"customer_id": "C001", "thread": object()}) == {
+        "customer_id": "C001"
+    }
+    # スキーマが不明なツールは実行時の引数のみ除く
+    assert tool.cache_arguments("unknown", {"name": "田中", "thread": object(), "options": {}}) == {"name": "田中"}
+
+
+def test_follower_retries_when_leader_is_cancelled():
+    async def scenario():
+        cache = ToolResultCache()
+        calls = []
+        started = asyncio.Event()
+
+        async def call():
+            calls.append(1)
+            started.set()
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        leader = asyncio.create_task(cache.get_or_call("get_customer_info", {"customer_id": "C001"}, call))
+        await started.wait()
+        follower = asyncio.create_task(cache.get_or_call("get_customer_info", {"customer_id": "C001"}, call))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        result = await follower
+        return leader, result, calls, cache
+
+    leader, result, calls, cache = asyncio.run(scenario())
+    assert leader.cancelled()
+    # 待っていた側は取り消されず、自分で呼び出し直した結果を受け取る
+    assert result == 2
+    assert len(calls) == 2
+    assert not cache._inflight
+    assert list(cache._entries) == ['get_customer_info:{"customer_id": "C001"}']